@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from notion_helper import NotionHelper
+from request_scheduler import BACKGROUND
+from google_calendar_helper import GoogleCalendarHelper
+
+def sync_calendar(calendar_id='primary', full_resync=False, dry_run=False):
+    """Push Google Calendar changes since the last run into the meetings database"""
+    notion = NotionHelper(priority=BACKGROUND)
+
+    if not notion.meetings_database_id:
+        return {"error": "Missing required environment variable: MEETINGS_DATABASE_ID"}
+
+    try:
+        calendar = GoogleCalendarHelper()
+        fetch_started = time.perf_counter()
+        events = calendar.get_changed_events(calendar_id, full_resync=full_resync, commit=False)
+        fetch_seconds = time.perf_counter() - fetch_started
+    except Exception as e:
+        return {"error": f"Calendar fetch failed: {str(e)}"}
+
+    stats = notion.sync_calendar_events_to_database(events, dry_run=dry_run)
+    stats['events_changed'] = len(events)
+    stats['timing']['calendar_client_init'] = round(calendar.client_init_seconds, 3)
+    stats['timing']['calendar_fetch'] = round(fetch_seconds, 3)
+    # Only advance the sync token once every change reached Notion, so a dry
+    # run or a failed write sees the same changes next time
+    stats['sync_state_saved'] = not dry_run and not stats['errors']
+    if stats['sync_state_saved']:
+        calendar.commit_sync_state(calendar_id)
+    return stats
+
+def main():
+    """Alfred Script Filter interface"""
+    query = sys.argv[1] if len(sys.argv) > 1 else ""
+    mode = "full" if "full" in query.lower() else "changes"
+
+    print(f'{{"items": [{{"title": "📅 Sync Google Calendar to Notion ({mode})", "subtitle": "Press Enter to push calendar changes to your meetings database", "arg": "{mode}", "valid": true}}]}}')
+
+def run_sync():
+    """Execute the sync operation"""
+    mode = sys.argv[2] if len(sys.argv) > 2 else "changes"
+
+    print(f"🔄 Syncing calendar ({mode})...")
+
+    result = sync_calendar(full_resync=(mode == "full"), dry_run=("--dry-run" in sys.argv))
+
+    if "error" in result:
+        print(f"❌ Error: {result['error']}")
+        return
+
+    print("✅ Calendar sync completed!")
+    print(f"   Changed events: {result['events_changed']}")
+    if result.get('dry_run'):
+        planned = result['planned']
+        print(f"   Would create: {planned['create']}, update: {planned['update']}, skip: {planned['skip']}")
+    else:
+        print(f"   Created: {result['created']}")
+        print(f"   Updated: {result['updated']}")
+        print(f"   Skipped: {result['skipped']}")
+    print(f"   Notion API calls: {result['api_calls']}")
+    timing = result['timing']
+    print(f"   Time: {timing['wall_time']}s sync, {timing['calendar_fetch']}s fetch, {timing['calendar_client_init']}s client setup")
+
+    if result['errors']:
+        print(f"   Errors: {len(result['errors'])}")
+        for error in result['errors']:
+            print(f"   • {error}")
+        print("   Calendar position not saved; the next sync retries these changes")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--sync":
+        run_sync()
+    else:
+        main()
@@ -2,9 +2,16 @@
 
 import sys
 import os
+import json
 from datetime import datetime
-sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from notion_helper import NotionHelper
+from workflow_cache import cache_path, file_lock
+
+# Date -> page id of each day's journal page
+JOURNAL_CACHE = 'journal_pages.json'
+KEEP_DAYS = 7
 
 def main():
     query = sys.argv[1] if len(sys.argv) > 1 else ""
@@ -22,43 +29,95 @@ def main():
     today = datetime.now().strftime("%Y-%m-%d")
     print(f'{{"items": [{{"title": "📔 Add to journal ({today})", "subtitle": "Entry: {query[:50]}...", "arg": "{query}", "valid": true}}]}}')
 
+def load_journal_pages():
+    try:
+        with open(cache_path(JOURNAL_CACHE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_journal_pages(pages):
+    # Only the last few days are worth remembering
+    recent = dict(sorted(pages.items())[-KEEP_DAYS:])
+    path = cache_path(JOURNAL_CACHE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(recent, f)
+    os.replace(path + '.tmp', path)
+
+def find_journal_page(notion, today_title):
+    """Search for an existing journal page with exactly this title"""
+    search_result = notion.search_pages(today_title)
+    if search_result.get('object') == 'error':
+        raise Exception(search_result.get('message', search_result))
+    
+    for page in search_result.get('results', []):
+        page_title = ""
+        if page.get('properties', {}).get('title', {}).get('title'):
+            page_title = page['properties']['title']['title'][0]['text']['content']
+        
+        if page_title == today_title:
+            return page['id']
+    return None
+
 def add_to_journal():
     """Called when user presses Enter"""
-    entry_content = sys.argv[1] if len(sys.argv) > 1 else ""
-    notion = NotionHelper()
+    entry_content = sys.argv[2] if len(sys.argv) > 2 else ""
+    # Searches must see pages created moments ago, so skip the response cache
+    notion = NotionHelper(cache=False)
     
     today = datetime.now().strftime("%Y-%m-%d")
     today_title = f"Journal - {today}"
     timestamp = datetime.now().strftime("%H:%M")
+    content = f"**{timestamp}** - {entry_content}"
     
-    # First, try to find today's journal page
     try:
-        search_result = notion.search_pages(today_title)
-        today_page = None
+        # Fast path: today's page id is known, so the append is the only request
+        page_id = load_journal_pages().get(today)
+        if page_id:
+            result = notion.append_to_page(page_id, content)
+            if result.get('object') != 'error':
+                print(f"✅ Added to today's journal ({today})")
+                return
+            gone = result.get('status') == 404 or 'archived' in str(result.get('message', ''))
+            if not gone:
+                raise Exception(result.get('message', result))
+            # The cached page was deleted or archived; find or create it again
         
-        for page in search_result.get('results', []):
-            page_title = ""
-            if page.get('properties', {}).get('title', {}).get('title'):
-                page_title = page['properties']['title']['title'][0]['text']['content']
+        # One process at a time looks for or creates the day's page, so two
+        # entries arriving together cannot create two pages
+        with file_lock('journal.lock'):
+            pages = load_journal_pages()
+            if pages.get(today) == page_id:
+                pages.pop(today, None)
             
-            if page_title == today_title:
-                today_page = page
-                break
+            if pages.get(today):
+                result = notion.append_to_page(pages[today], content)
+                created = False
+            else:
+                found = find_journal_page(notion, today_title)
+                if found:
+                    result = notion.append_to_page(found, content)
+                    created = False
+                    pages[today] = found
+                else:
+                    # Create new journal page for today
+                    initial_content = f"# Daily Journal - {today}\n\n{content}"
+                    result = notion.create_page(
+                        parent_id=notion.daily_journal_parent_id,
+                        title=today_title,
+                        content=initial_content
+                    )
+                    created = True
+                    if result.get('object') != 'error':
+                        pages[today] = result['id']
+                save_journal_pages(pages)
         
-        if today_page:
-            # Append to existing page
-            content = f"**{timestamp}** - {entry_content}"
-            result = notion.append_to_page(today_page['id'], content)
-            print(f"✅ Added to today's journal ({today})")
-        else:
-            # Create new journal page for today
-            initial_content = f"# Daily Journal - {today}\n\n**{timestamp}** - {entry_content}"
-            result = notion.create_page(
-                parent_id=notion.daily_journal_parent_id,
-                title=today_title,
-                content=initial_content
-            )
+        if result.get('object') == 'error':
+            raise Exception(result.get('message', result))
+        if created:
             print(f"✅ Created new journal for {today}")
+        else:
+            print(f"✅ Added to today's journal ({today})")
     
     except Exception as e:
         print(f"❌ Error: {str(e)}")
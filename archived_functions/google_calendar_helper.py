@@ -1,15 +1,45 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import json
+import time
 from datetime import datetime, timedelta
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from workflow_cache import cache_path
+
+# Calendar API maximum for events().list
+PAGE_SIZE = 250
+# Calendar API maximum number of calls in one batch request
+MAX_BATCH_REQUESTS = 50
+
+# Refresh access tokens that expire within this many seconds
+REFRESH_MARGIN = 300
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/calendar/v3/rest"
+
+# (token file, scopes) -> (credentials, service), reused by every helper in a warm process
+_client_cache = {}
+
+def build_service(document, credentials=None, http=None, api_endpoint=None):
+    """Calendar v3 service from a discovery document, optionally served from api_endpoint
+
+    api_endpoint (e.g. http://127.0.0.1:8080/ for a local fake) replaces the
+    document's rootUrl, so batch requests go there too; googleapiclient's
+    client_options only move the per-call base URL.
+    """
+    if api_endpoint:
+        document = json.loads(document) if isinstance(document, str) else dict(document)
+        document['rootUrl'] = api_endpoint.rstrip('/') + '/'
+    return build_from_document(document, credentials=credentials, http=http)
 
 class GoogleCalendarHelper:
-    def __init__(self):
+    def __init__(self, service=None):
         # Scopes required for reading calendar events
         self.SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
         
@@ -17,44 +47,95 @@ class GoogleCalendarHelper:
         self.credentials_file = os.environ.get('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
         self.token_file = os.environ.get('GOOGLE_TOKEN_FILE', 'token.json')
         
-        self.service = None
-        self._authenticate()
+        self.service = service
+        self.credentials = None
+        # calendar id -> sync state from get_changed_events(commit=False) not saved yet
+        self.pending_sync_state = {}
+        started = time.perf_counter()
+        # A prebuilt service (e.g. pointed at a local fake Calendar API) skips auth
+        if service is None:
+            self._authenticate()
+        # Reported in the sync timing so startup cost stays visible
+        self.client_init_seconds = time.perf_counter() - started
 
     def _authenticate(self):
-        """Authenticate with Google Calendar API"""
+        """Authenticate with Google Calendar API, reusing credentials and service when possible"""
+        key = (self.token_file, tuple(self.SCOPES))
+        if key in _client_cache:
+            creds, service = _client_cache[key]
+            if self._refresh_if_expiring(creds):
+                self.service = service
+                self.credentials = creds
+                return
+
         creds = None
         
         # Check if token file exists (stores user's access and refresh tokens)
         if os.path.exists(self.token_file):
             creds = Credentials.from_authorized_user_file(self.token_file, self.SCOPES)
         
-        # If there are no (valid) credentials available, let the user log in
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_file):
-                    raise FileNotFoundError(f"Google credentials file not found: {self.credentials_file}")
-                
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, self.SCOPES)
-                creds = flow.run_local_server(port=0)
+        # Only refresh when the token is missing, expired or about to expire
+        if not creds or not self._refresh_if_expiring(creds):
+            if not os.path.exists(self.credentials_file):
+                raise FileNotFoundError(f"Google credentials file not found: {self.credentials_file}")
             
-            # Save the credentials for the next run
-            with open(self.token_file, 'w') as token:
-                token.write(creds.to_json())
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, self.SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._save_credentials(creds)
+
+        # Build from a cached discovery document instead of discovering on every run
+        self.service = build_service(self._discovery_document(), credentials=creds,
+                                     api_endpoint=os.environ.get('GOOGLE_CALENDAR_API_ENDPOINT'))
+        self.credentials = creds
+        _client_cache[key] = (creds, self.service)
+
+    def _refresh_if_expiring(self, creds):
+        """Refresh creds if they expire soon; returns False if they cannot be used"""
+        expiring = creds.expiry is None or creds.expiry - datetime.utcnow() < timedelta(seconds=REFRESH_MARGIN)
+        if creds.token and not expiring:
+            return True
+        if not creds.refresh_token:
+            return False
+        creds.refresh(Request())
+        # Save the credentials for the next run
+        self._save_credentials(creds)
+        return True
 
-        self.service = build('calendar', 'v3', credentials=creds)
+    def _save_credentials(self, creds):
+        with open(self.token_file, 'w') as token:
+            token.write(creds.to_json())
 
-    def get_todays_events(self, calendar_id='primary'):
-        """Get today's calendar events"""
+    def _discovery_document(self):
+        """Calendar v3 discovery document, cached in the workflow cache"""
+        path = cache_path('calendar_v3_discovery.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.read()
+
+        # Prefer the copy bundled with google-api-python-client; fetch only if absent
+        document = get_static_doc('calendar', 'v3')
+        if document is None:
+            import requests
+            response = requests.get(DISCOVERY_URL, timeout=30)
+            response.raise_for_status()
+            document = response.text
+
+        with open(path, 'w') as f:
+            f.write(document)
+        return document
+
+    def get_todays_events(self, calendar_id='primary', calendar_ids=None):
+        """Get today's calendar events (merged across calendar_ids if given)"""
+        if calendar_ids:
+            return self.get_events_for_calendars(calendar_ids, datetime.now().date(), datetime.now().date())
         return self.get_events_for_date_range(
             start_date=datetime.now().date(),
             end_date=datetime.now().date(),
             calendar_id=calendar_id
         )
 
-    def get_this_weeks_events(self, from_today_only=False, calendar_id='primary'):
+    def get_this_weeks_events(self, from_today_only=False, calendar_id='primary', calendar_ids=None):
         """Get this week's calendar events (from today onwards if specified)"""
         today = datetime.now().date()
         
@@ -66,8 +147,135 @@ class GoogleCalendarHelper:
         
         end_date = start_date + timedelta(days=6)  # End of week
         
+        if calendar_ids:
+            return self.get_events_for_calendars(calendar_ids, start_date, end_date)
         return self.get_events_for_date_range(start_date, end_date, calendar_id)
 
+    def get_events_for_calendars(self, calendar_ids, start_date, end_date, mode='batch', max_workers=4):
+        """Get events from several calendars as one de-duplicated, time-ordered list
+
+        mode='batch' sends one list request per calendar inside a single HTTP
+        batch call (plus follow-up batches for further pages); mode='parallel'
+        fetches calendars concurrently on a thread pool. Events present in
+        several calendars (same iCalUID and start) are kept once, from the
+        earliest calendar in calendar_ids.
+        """
+        if not self.service:
+            raise Exception("Google Calendar service not initialized")
+
+        params = {
+            'timeMin': datetime.combine(start_date, datetime.min.time()).isoformat() + 'Z',
+            'timeMax': datetime.combine(end_date, datetime.max.time()).isoformat() + 'Z',
+            'singleEvents': True,
+            'orderBy': 'startTime'
+        }
+
+        try:
+            if mode == 'batch':
+                raw_by_calendar = self._batch_list_events(calendar_ids, params)
+            elif mode == 'parallel':
+                raw_by_calendar = self._parallel_list_events(calendar_ids, params, max_workers)
+            else:
+                raise ValueError(f"Unknown fetch mode: {mode}")
+        except Exception as e:
+            raise Exception(f"Failed to fetch Google Calendar events: {str(e)}")
+
+        merged = {}
+        for calendar_id in calendar_ids:
+            for event in raw_by_calendar.get(calendar_id, []):
+                processed_event = self._process_event(event)
+                if not processed_event:
+                    continue
+                processed_event['calendar_id'] = calendar_id
+                key = (processed_event['ical_uid'], processed_event['start_datetime'].timestamp())
+                merged.setdefault(key, processed_event)
+
+        return sorted(merged.values(), key=lambda event: event['start_datetime'].timestamp())
+
+    def _batch_list_events(self, calendar_ids, params):
+        """List events for every calendar through the Calendar API batch endpoint
+
+        Calendars are sent MAX_BATCH_REQUESTS at a time, the most one batch may hold.
+        """
+        events = {calendar_id: [] for calendar_id in calendar_ids}
+        page_tokens = {calendar_id: None for calendar_id in calendar_ids}
+        errors = []
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                errors.append(f"{request_id}: {exception}")
+                page_tokens.pop(request_id, None)
+                return
+            events[request_id].extend(response.get('items', []))
+            if response.get('nextPageToken'):
+                page_tokens[request_id] = response['nextPageToken']
+            else:
+                page_tokens.pop(request_id, None)
+
+        while page_tokens:
+            pending = list(page_tokens.items())
+            for start in range(0, len(pending), MAX_BATCH_REQUESTS):
+                batch = self.service.new_batch_http_request(callback=collect)
+                for calendar_id, page_token in pending[start:start + MAX_BATCH_REQUESTS]:
+                    batch.add(
+                        self.service.events().list(calendarId=calendar_id, maxResults=PAGE_SIZE, pageToken=page_token, **params),
+                        request_id=calendar_id
+                    )
+                batch.execute()
+
+        if errors:
+            raise Exception('; '.join(errors))
+        return events
+
+    def _parallel_list_events(self, calendar_ids, params, max_workers):
+        """List events for every calendar concurrently, one HTTP connection per thread"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        # httplib2 connections are not thread-safe, so each worker gets its own
+        local = threading.local()
+
+        def thread_http():
+            if not hasattr(local, 'http'):
+                local.http = self._copy_service_http()
+            return local.http
+
+        def fetch(calendar_id):
+            items = []
+            page_token = None
+            while True:
+                result = self.service.events().list(
+                    calendarId=calendar_id, maxResults=PAGE_SIZE, pageToken=page_token, **params
+                ).execute(http=thread_http())
+                items.extend(result.get('items', []))
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    return items
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(calendar_ids, executor.map(fetch, calendar_ids)))
+
+    def _copy_service_http(self):
+        """A new transport with the service's credentials and connection settings"""
+        import httplib2
+
+        base = self.service._http
+        inner = getattr(base, 'http', base)
+        if not isinstance(inner, httplib2.Http):
+            return base  # e.g. googleapiclient's HttpMock, which holds no connections
+        http = httplib2.Http(
+            timeout=inner.timeout,
+            proxy_info=inner.proxy_info,
+            ca_certs=inner.ca_certs,
+            disable_ssl_certificate_validation=inner.disable_ssl_certificate_validation
+        )
+        # httplib2.Http has a credentials attribute of its own (basic auth), so
+        # only re-wrap when the service's transport is an authorizing wrapper
+        if base is not inner:
+            from google_auth_httplib2 import AuthorizedHttp
+            http = AuthorizedHttp(base.credentials, http=http)
+        return http
+
     def get_events_for_date_range(self, start_date, end_date, calendar_id='primary'):
         """Get calendar events for a specific date range"""
         if not self.service:
@@ -78,16 +286,13 @@ class GoogleCalendarHelper:
         end_datetime = datetime.combine(end_date, datetime.max.time()).isoformat() + 'Z'
 
         try:
-            events_result = self.service.events().list(
+            events = self._list_all_events(
                 calendarId=calendar_id,
                 timeMin=start_datetime,
                 timeMax=end_datetime,
-                maxResults=50,
                 singleEvents=True,
                 orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            )[0]
             
             # Process events into a standardized format
             processed_events = []
@@ -101,6 +306,102 @@ class GoogleCalendarHelper:
         except Exception as e:
             raise Exception(f"Failed to fetch Google Calendar events: {str(e)}")
 
+    def _list_all_events(self, **params):
+        """Fetch every page of an events().list query; returns (events, nextSyncToken)"""
+        events = []
+        page_token = None
+        while True:
+            result = self.service.events().list(
+                maxResults=PAGE_SIZE,
+                pageToken=page_token,
+                **params
+            ).execute()
+            events.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return events, result.get('nextSyncToken')
+
+    def get_changed_events(self, calendar_id='primary', start_date=None, full_resync=False, commit=True):
+        """Get only events that changed since the last call for this calendar
+
+        The first call (or full_resync) lists events from start_date (default
+        today) onwards and stores Google's nextSyncToken; later calls send the
+        token and receive only deltas, including cancellations. An expired
+        token (HTTP 410) triggers a full resync automatically; events whose
+        'updated' stamp matches the one seen last time are dropped, so that
+        resync does not re-emit untouched events.
+
+        With commit=False the new token and stamps are only saved by
+        commit_sync_state(), so changes that were not applied are fetched again.
+        """
+        if not self.service:
+            raise Exception("Google Calendar service not initialized")
+
+        store = CalendarSyncStore()
+        # An explicit full resync re-emits everything; a 410 fallback keeps the stamps
+        state = {} if full_resync else store.get(calendar_id)
+        raw_events = None
+
+        if state.get('sync_token'):
+            try:
+                raw_events, sync_token = self._list_all_events(
+                    calendarId=calendar_id,
+                    syncToken=state['sync_token'],
+                    singleEvents=True
+                )
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise Exception(f"Failed to fetch Google Calendar changes: {str(e)}")
+                # Sync token expired; fall through to a full resync
+
+        if raw_events is None:
+            start_date = start_date or datetime.now().date()
+            raw_events, sync_token = self._list_all_events(
+                calendarId=calendar_id,
+                timeMin=datetime.combine(start_date, datetime.min.time()).isoformat() + 'Z',
+                singleEvents=True
+            )
+            # Stamps of events that no longer exist would otherwise accumulate
+            seen = {event.get('id') for event in raw_events}
+            state['updated'] = {k: v for k, v in state.get('updated', {}).items() if k in seen}
+
+        changed = []
+        stamps = state.setdefault('updated', {})
+        for event in raw_events:
+            event_id = event.get('id', '')
+            if event_id in stamps and stamps[event_id] == event.get('updated'):
+                continue
+            processed_event = self._process_event(event) if event.get('start') else self._process_cancellation(event)
+            if processed_event:
+                changed.append(processed_event)
+                if event.get('status') == 'cancelled':
+                    stamps.pop(event_id, None)
+                else:
+                    stamps[event_id] = event.get('updated')
+
+        state['sync_token'] = sync_token
+        if commit:
+            store.put(calendar_id, state)
+        else:
+            self.pending_sync_state[calendar_id] = state
+        return changed
+
+    def commit_sync_state(self, calendar_id='primary'):
+        """Save the state of a get_changed_events(commit=False) call once its changes are applied"""
+        if calendar_id in self.pending_sync_state:
+            CalendarSyncStore().put(calendar_id, self.pending_sync_state.pop(calendar_id))
+
+    def _process_cancellation(self, event):
+        """Minimal record for a deleted event, which Google returns as just an id and status"""
+        if event.get('status') != 'cancelled' or not event.get('id'):
+            return None
+        return {
+            'id': event['id'],
+            'google_event_id': event['id'],
+            'status': self._map_google_status_to_notion('cancelled'),
+            'deleted': True
+        }
+
     def _process_event(self, event):
         """Process raw Google Calendar event into standardized format"""
         try:
@@ -155,13 +456,20 @@ class GoogleCalendarHelper:
                 'location': location,
                 'attendees': attendees,
                 'google_event_id': event_id,
-                'last_updated': datetime.now()
+                'ical_uid': event.get('iCalUID', event_id),
+                'last_updated': self._parse_updated(event.get('updated'))
             }
             
         except Exception as e:
             print(f"Warning: Failed to process event {event.get('id', 'unknown')}: {str(e)}")
             return None
 
+    def _parse_updated(self, updated):
+        """Google's last-modification time for an event"""
+        if not updated:
+            return None
+        return datetime.fromisoformat(updated.replace('Z', '+00:00'))
+
     def _map_google_status_to_notion(self, google_status):
         """Map Google Calendar status to Notion status"""
         status_mapping = {
@@ -169,4 +477,36 @@ class GoogleCalendarHelper:
             'tentative': 'Scheduled', 
             'cancelled': 'Cancelled'
         }
-        return status_mapping.get(google_status, 'Scheduled')
\ No newline at end of file
+        return status_mapping.get(google_status, 'Scheduled')
+
+class CalendarSyncStore:
+    """Per-calendar sync tokens and event 'updated' stamps, persisted as JSON"""
+
+    def __init__(self, path=None):
+        self.path = path or cache_path('calendar_sync.json')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def get(self, calendar_id):
+        return self._load().get(calendar_id, {})
+
+    def _save(self, data):
+        # Write to a temporary file first so a crash never leaves a truncated store
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def put(self, calendar_id, state):
+        data = self._load()
+        data[calendar_id] = state
+        self._save(data)
+
+    def reset(self, calendar_id):
+        data = self._load()
+        data.pop(calendar_id, None)
+        self._save(data)
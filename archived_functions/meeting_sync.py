@@ -2,13 +2,87 @@
 
 import sys
 import os
+import time
 from datetime import datetime, timedelta
-sys.path.insert(0, os.path.dirname(__file__))
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from notion_helper import NotionHelper
+from request_scheduler import BACKGROUND
 
-def sync_meetings(today_only=False):
+# Notes generated at once when NOTION_SYNC_CONCURRENCY is not set
+DEFAULT_CONCURRENCY = 4
+
+def classify_meeting(meeting):
+    """Decide what a meeting needs: ('generate', title, meeting), ('cancel', title, note_page_id) or ('skip', ...)"""
+    properties = meeting['properties']
+    meeting_id = meeting['id']
+
+    # Get meeting title
+    title_prop = properties.get('Name') or properties.get('Title')
+    if not title_prop:
+        raise ValueError(f"Meeting {meeting_id}: No title property found")
+
+    meeting_title = title_prop['title'][0]['text']['content'] if title_prop['title'] else "Untitled Meeting"
+
+    # Get meeting date
+    date_prop = properties.get('Date')
+    if not date_prop or not date_prop['date']:
+        raise ValueError(f"Meeting '{meeting_title}': No date found")
+
+    meeting_date = date_prop['date']['start']
+
+    # Get status
+    status_prop = properties.get('Status')
+    status = status_prop['select']['name'] if status_prop and status_prop['select'] else "Scheduled"
+
+    # Get notes generated flag
+    notes_generated_prop = properties.get('Notes Generated')
+    notes_generated = notes_generated_prop['checkbox'] if notes_generated_prop else False
+
+    # Get meeting note page link
+    note_page_prop = properties.get('Meeting Note Page')
+    note_page_id = note_page_prop['relation'][0]['id'] if (note_page_prop and note_page_prop['relation']) else None
+
+    if status == "Cancelled":
+        if note_page_id and not meeting_title.endswith("(Cancelled)"):
+            return 'cancel', meeting_title, note_page_id
+        return 'skip', meeting_title, None
+
+    if status == "Scheduled" and not notes_generated:
+        formatted_date = datetime.fromisoformat(meeting_date.replace('Z', '+00:00')).strftime("%Y-%m-%d")
+        return 'generate', f"{meeting_title} - {formatted_date}", meeting_id
+
+    return 'skip', meeting_title, None
+
+def window_filter(start_date, end_date):
+    """Meetings dated within [start_date, end_date] that are not completed"""
+    return {
+        "and": [
+            {
+                "property": "Date",
+                "date": {
+                    "on_or_after": start_date.isoformat()
+                }
+            },
+            {
+                "property": "Date", 
+                "date": {
+                    "on_or_before": end_date.isoformat()
+                }
+            },
+            {
+                "property": "Status",
+                "select": {
+                    "does_not_equal": "Completed"
+                }
+            }
+        ]
+    }
+
+def sync_meetings(today_only=False, concurrency=None):
     """Generate meeting notes from existing Notion database entries"""
-    notion = NotionHelper()
+    notion = NotionHelper(priority=BACKGROUND)
     
     # Check required configuration
     if not all([notion.meetings_database_id, notion.meeting_template_page_id, notion.meeting_notes_parent_id]):
@@ -16,6 +90,7 @@ def sync_meetings(today_only=False):
             "error": "Missing required environment variables: MEETINGS_DATABASE_ID, MEETING_TEMPLATE_PAGE_ID, MEETING_NOTES_PARENT_ID"
         }
     
+    started = time.monotonic()
     try:
         # Get meetings from database for the specified time period
         today = datetime.now().date()
@@ -28,30 +103,6 @@ def sync_meetings(today_only=False):
             start_date = today
             end_date = today + timedelta(days=6)  # Next 7 days
         
-        # Filter meetings for the date range and not completed
-        filter_obj = {
-            "and": [
-                {
-                    "property": "Date",
-                    "date": {
-                        "on_or_after": start_date.isoformat()
-                    }
-                },
-                {
-                    "property": "Date", 
-                    "date": {
-                        "on_or_before": end_date.isoformat()
-                    }
-                },
-                {
-                    "property": "Status",
-                    "select": {
-                        "does_not_equal": "Completed"
-                    }
-                }
-            ]
-        }
-        
         sorts = [
             {
                 "property": "Date",
@@ -59,103 +110,119 @@ def sync_meetings(today_only=False):
             }
         ]
         
-        meetings_result = notion.query_database(notion.meetings_database_id, filter_obj, sorts)
-        meetings = meetings_result.get('results', [])
-        
-        # Statistics
-        stats = {
-            "meetings_found": len(meetings),
-            "notes_created": 0,
-            "cancelled_updated": 0,
-            "skipped": 0,
-            "errors": []
-        }
-        
-        for meeting in meetings:
-            try:
-                # Extract meeting properties
-                properties = meeting['properties']
-                meeting_id = meeting['id']
-                
-                # Get meeting title
-                title_prop = properties.get('Name') or properties.get('Title')
-                if not title_prop:
-                    notes_stats["errors"].append(f"Meeting {meeting_id}: No title property found")
-                    continue
-                    
-                meeting_title = title_prop['title'][0]['text']['content'] if title_prop['title'] else "Untitled Meeting"
-                
-                # Get meeting date
-                date_prop = properties.get('Date')
-                if not date_prop or not date_prop['date']:
-                    notes_stats["errors"].append(f"Meeting '{meeting_title}': No date found")
-                    continue
-                
-                meeting_date = date_prop['date']['start']
-                
-                # Get status
-                status_prop = properties.get('Status')
-                status = status_prop['select']['name'] if status_prop and status_prop['select'] else "Scheduled"
-                
-                # Get notes generated flag
-                notes_generated_prop = properties.get('Notes Generated')
-                notes_generated = notes_generated_prop['checkbox'] if notes_generated_prop else False
-                
-                # Get meeting note page link
-                note_page_prop = properties.get('Meeting Note Page')
-                note_page_id = note_page_prop['relation'][0]['id'] if (note_page_prop and note_page_prop['relation']) else None
-                
-                # Process based on status and current state
-                if status == "Cancelled":
-                    # Update meeting note page title if exists
-                    if note_page_id and not meeting_title.endswith("(Cancelled)"):
-                        cancelled_title = f"{meeting_title} (Cancelled)"
-                        notion.update_page_properties(note_page_id, {
-                            "title": {
-                                "title": [{"text": {"content": cancelled_title}}]
-                            }
-                        })
-                        stats["cancelled_updated"] += 1
-                    else:
-                        stats["skipped"] += 1
-                        
-                elif status == "Scheduled" and not notes_generated:
-                    # Create meeting note from template
-                    formatted_date = datetime.fromisoformat(meeting_date.replace('Z', '+00:00')).strftime("%Y-%m-%d")
-                    note_title = f"{meeting_title} - {formatted_date}"
-                    
-                    # Clone template page
-                    new_page_result = notion.duplicate_page(
-                        notion.meeting_template_page_id,
-                        note_title,
-                        notion.meeting_notes_parent_id
-                    )
-                    
-                    if 'id' in new_page_result:
-                        new_page_id = new_page_result['id']
-                        
-                        # Update meeting database entry
-                        notion.update_page_properties(meeting_id, {
-                            "Notes Generated": {"checkbox": True},
-                            "Meeting Note Page": {
-                                "relation": [{"id": new_page_id}]
-                            }
-                        })
-                        
-                        stats["notes_created"] += 1
-                    else:
-                        stats["errors"].append(f"Failed to create note for '{meeting_title}': {new_page_result}")
-                        
-                else:
-                    stats["skipped"] += 1
-                    
-            except Exception as e:
-                stats["errors"].append(f"Error processing meeting: {str(e)}")
-        
-        return stats
-        
+        meetings = list(notion.iter_database(notion.meetings_database_id, window_filter(start_date, end_date), sorts, prefetch=True))
     except Exception as e:
         return {"error": f"Sync failed: {str(e)}"}
+    query_seconds = time.monotonic() - started
+    
+    stats = process_meetings(notion, meetings, concurrency)
+    stats["timing"]["query"] = round(query_seconds, 3)
+    stats["timing"]["wall_time"] = round(time.monotonic() - started, 3)
+    stats["api_calls"] = notion.request_count
+    return stats
+
+def process_meetings(notion, meetings, concurrency=None):
+    """Generate notes and mark cancellations for a list of meeting rows
+
+    Meetings are classified first, then notes are generated on a bounded
+    thread pool; each finished note is handed straight to the write-back
+    stage, which links it from the meeting and sets Notes Generated.
+    Cancelled meetings only need the write-back stage. A failing meeting is
+    reported in errors without holding up the others. Meetings whose note
+    or cancellation mark was not written are listed in failed_ids so a
+    caller can retry them. Two cases are left out. Meetings that cannot be
+    classified need an edit first. A note that was created but not linked
+    would be created twice.
+    """
+    concurrency = int(concurrency or os.environ.get('NOTION_SYNC_CONCURRENCY') or DEFAULT_CONCURRENCY)
+    
+    # Statistics
+    stats = {
+        "meetings_found": len(meetings),
+        "notes_created": 0,
+        "cancelled_updated": 0,
+        "skipped": 0,
+        "errors": [],
+        "failed_ids": []
+    }
+    
+    # Stage 1: classify
+    stage_started = time.monotonic()
+    to_generate, to_cancel = [], []
+    for meeting in meetings:
+        try:
+            action, title, target = classify_meeting(meeting)
+        except Exception as e:
+            stats["errors"].append(str(e))
+            continue
+        if action == 'generate':
+            to_generate.append((title, target))
+        elif action == 'cancel':
+            to_cancel.append((title, target, meeting['id']))
+        else:
+            stats["skipped"] += 1
+    classify_seconds = time.monotonic() - stage_started
+    
+    def generate(item):
+        note_title, meeting_id = item
+        result = notion.duplicate_page(notion.meeting_template_page_id, note_title, notion.meeting_notes_parent_id)
+        if 'id' not in result:
+            raise Exception(f"Failed to create note for '{note_title}': {result}")
+        return result['id']
+    
+    def link_note(meeting_id, note_title, note_page_id):
+        result = notion.update_page_properties(meeting_id, {
+            "Notes Generated": {"checkbox": True},
+            "Meeting Note Page": {
+                "relation": [{"id": note_page_id}]
+            }
+        })
+        if result.get('object') == 'error':
+            raise Exception(f"Created note for '{note_title}' ({note_page_id}) but could not link it: {result.get('message', result)}")
+        return 'notes_created'
+    
+    def mark_cancelled(meeting_title, note_page_id):
+        result = notion.update_page_properties(note_page_id, {
+            "title": {
+                "title": [{"text": {"content": f"{meeting_title} (Cancelled)"}}]
+            }
+        })
+        if result.get('object') == 'error':
+            raise Exception(f"Failed to mark '{meeting_title}' cancelled: {result.get('message', result)}")
+        return 'cancelled_updated'
+    
+    # Stages 2 and 3: generate notes, writing each one back as soon as it exists
+    stage_started = time.monotonic()
+    generate_done = stage_started
+    writebacks = []
+    with ThreadPoolExecutor(max_workers=concurrency) as writer, ThreadPoolExecutor(max_workers=concurrency) as generator:
+        cancels = {writer.submit(mark_cancelled, title, note_page_id): meeting_id for title, note_page_id, meeting_id in to_cancel}
+        writebacks.extend(cancels)
+        pending = {generator.submit(generate, item): item for item in to_generate}
+        for future in as_completed(pending):
+            note_title, meeting_id = pending[future]
+            try:
+                writebacks.append(writer.submit(link_note, meeting_id, note_title, future.result()))
+            except Exception as e:
+                stats["errors"].append(str(e))
+                stats["failed_ids"].append(meeting_id)
+        generate_done = time.monotonic()
+        for future in writebacks:
+            try:
+                stats[future.result()] += 1
+            except Exception as e:
+                stats["errors"].append(str(e))
+                if future in cancels:
+                    stats["failed_ids"].append(cancels[future])
+    finished = time.monotonic()
+    
+    stats["timing"] = {
+        "classify": round(classify_seconds, 3),
+        "generate": round(generate_done - stage_started, 3),
+        "write_back": round(finished - generate_done, 3),
+        "concurrency": concurrency
+    }
+    return stats
 
 def main():
     """Alfred Script Filter interface"""
@@ -186,6 +253,8 @@ def run_sync():
     print(f"   Meeting notes created: {result['notes_created']}")
     print(f"   Cancelled meetings updated: {result['cancelled_updated']}")  
     print(f"   Skipped: {result['skipped']}")
+    timing = result['timing']
+    print(f"   Time: {timing['wall_time']}s ({timing['query']}s query, {timing['generate']}s generating notes, {timing['write_back']}s writing back)")
     
     if result['errors']:
         print(f"   Errors: {len(result['errors'])}")
@@ -195,5 +264,8 @@ def run_sync():
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--sync":
         run_sync()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--watch":
+        from meeting_watcher import watch
+        watch(once="--once" in sys.argv)
     else:
         main()
\ No newline at end of file
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Watch the meetings database and react to edits as they happen.
+
+Usage:
+    python3 meeting_watcher.py [--once]
+
+Instead of re-reading the whole week on every run, each poll asks Notion only
+for rows whose last_edited_time is at or after the stored high-water mark.
+Rows are compared against a local snapshot of their last seen property
+values; rows that really changed are passed to the handlers (note
+generation and cancellation marking) along with the names of the changed
+properties. Rows a handler failed on are left out of the snapshot and the
+high-water mark stays at them, so the next poll hands them over again.
+Polls speed up to NOTION_WATCH_MIN_INTERVAL while changes keep
+arriving and back off to NOTION_WATCH_MAX_INTERVAL when the database is
+quiet. Once a day the whole week is swept, which picks up meetings that
+moved into the window without being edited.
+"""
+
+import os
+import sys
+import json
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from workflow_cache import open_database, get_meta, set_meta
+from meeting_sync import process_meetings, window_filter
+
+DEFAULT_MIN_INTERVAL = 15
+DEFAULT_MAX_INTERVAL = 300
+# Rows kept in the snapshot; the least recently seen are dropped first
+MAX_SNAPSHOT_ROWS = 2000
+WINDOW_DAYS = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meeting_snapshot (
+    page_id TEXT PRIMARY KEY,
+    last_edited_time TEXT NOT NULL,
+    properties TEXT NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def connect():
+    return open_database('meeting_watch.sqlite3', SCHEMA)
+
+def row_state(row):
+    """Comparable value of every property of a database row"""
+    from notion_helper import property_value
+    return {name: property_value(prop) for name, prop in row['properties'].items()}
+
+def diff_rows(connection, rows):
+    """Changes for rows whose properties differ from the snapshot"""
+    changes = []
+    for row in rows:
+        state = row_state(row)
+        stored = connection.execute(
+            "SELECT properties FROM meeting_snapshot WHERE page_id = ?", (row['id'],)
+        ).fetchone()
+        previous = json.loads(stored[0]) if stored else None
+        if previous is None:
+            changed = sorted(state)
+        else:
+            changed = sorted(name for name in set(state) | set(previous) if state.get(name) != previous.get(name))
+        if changed:
+            changes.append({'row': row, 'previous': previous, 'changed': changed})
+    return changes
+
+def save_snapshot(connection, rows, failed_ids=()):
+    """Record the rows as seen, except failed ones, which are dropped so they are diffed again"""
+    now = time.time()
+    connection.execute("BEGIN")
+    for row in rows:
+        if row['id'] in failed_ids:
+            connection.execute("DELETE FROM meeting_snapshot WHERE page_id = ?", (row['id'],))
+            continue
+        connection.execute(
+            """
+            INSERT INTO meeting_snapshot (page_id, last_edited_time, properties, seen_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(page_id) DO UPDATE SET
+                last_edited_time = excluded.last_edited_time, properties = excluded.properties, seen_at = excluded.seen_at
+            """,
+            (row['id'], row.get('last_edited_time', ''), json.dumps(row_state(row), default=str), now)
+        )
+    connection.execute(
+        "DELETE FROM meeting_snapshot WHERE page_id NOT IN (SELECT page_id FROM meeting_snapshot ORDER BY seen_at DESC LIMIT ?)",
+        (MAX_SNAPSHOT_ROWS,)
+    )
+    connection.execute("COMMIT")
+
+def in_window(row, start_date, end_date):
+    date_prop = row['properties'].get('Date')
+    if not date_prop or not date_prop.get('date'):
+        return True  # let the handlers report the missing date
+    day = date_prop['date']['start'][:10]
+    return start_date.isoformat() <= day <= end_date.isoformat()
+
+def handle_meetings(notion, changes):
+    """Generate notes for new meetings and mark cancelled ones"""
+    today = datetime.now().date()
+    end_date = today + timedelta(days=WINDOW_DAYS - 1)
+    rows = [change['row'] for change in changes if in_window(change['row'], today, end_date)]
+    return process_meetings(notion, rows)
+
+# Each handler receives the helper and the list of changes for one poll and
+# returns a summary; rows it failed on go in the summary's failed_ids
+HANDLERS = [handle_meetings]
+
+def dispatch(notion, changes):
+    """Run every handler; returns (results, ids of rows a handler failed on)"""
+    results = []
+    failed_ids = set()
+    for handler in HANDLERS:
+        try:
+            result = handler(notion, changes)
+        except Exception as e:
+            result = {"errors": [f"{handler.__name__} failed: {str(e)}"]}
+            failed_ids.update(change['row']['id'] for change in changes)
+        failed_ids.update(result.get('failed_ids', []))
+        results.append(result)
+    return results, failed_ids
+
+def poll(notion, connection):
+    """One watcher iteration; returns a summary of what was seen and done"""
+    started = time.monotonic()
+    # Start of the poll, in Notion's format; becomes the next mark if nothing newer is seen
+    poll_started = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z')
+    high_water_mark = get_meta(connection, 'high_water_mark')
+    today = datetime.now().date().isoformat()
+
+    if high_water_mark is None or get_meta(connection, 'last_sweep') != today:
+        # Whole-window sweep: on first run and when the date rolls over
+        end_date = datetime.now().date() + timedelta(days=WINDOW_DAYS - 1)
+        rows = list(notion.iter_database(
+            notion.meetings_database_id, window_filter(datetime.now().date(), end_date), prefetch=True
+        ))
+        changes = [{'row': row, 'previous': None, 'changed': []} for row in rows]
+        set_meta(connection, 'last_sweep', today)
+        newest = poll_started
+    else:
+        # last_edited_time has minute precision, so re-read the mark's own minute
+        filter_obj = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": high_water_mark}}
+        sorts = [{"timestamp": "last_edited_time", "direction": "ascending"}]
+        rows = list(notion.iter_database(notion.meetings_database_id, filter_obj, sorts, prefetch=True))
+        changes = diff_rows(connection, rows)
+        newest = max([high_water_mark] + [row.get('last_edited_time', '') for row in rows])
+
+    results, failed_ids = dispatch(notion, changes) if changes else ([], set())
+    save_snapshot(connection, rows, failed_ids)
+    failed_marks = [row['last_edited_time'] for row in rows if row['id'] in failed_ids and row.get('last_edited_time')]
+    if failed_marks:
+        # The mark filter is on_or_after, so failed rows come back on the next poll
+        newest = min(failed_marks)
+    set_meta(connection, 'high_water_mark', newest)
+    set_meta(connection, 'last_poll', time.time())
+    return {
+        'rows': len(rows),
+        'changes': len(changes),
+        'failed': len(failed_ids),
+        'changed_properties': sorted({name for change in changes for name in change['changed']}),
+        'results': results,
+        'seconds': round(time.monotonic() - started, 3)
+    }
+
+def next_interval(interval, summary, min_interval, max_interval):
+    """Poll again soon while changes are arriving, back off while quiet"""
+    # Rows that keep failing do not count, or a persistent error would poll at full speed
+    if summary and summary['changes'] > summary['failed']:
+        return min_interval
+    return min(max(interval, min_interval) * 2, max_interval)
+
+def watch(once=False):
+    from notion_helper import NotionHelper
+    from request_scheduler import BACKGROUND
+
+    notion = NotionHelper(priority=BACKGROUND)
+    if not all([notion.meetings_database_id, notion.meeting_template_page_id, notion.meeting_notes_parent_id]):
+        print("❌ Missing required environment variables: MEETINGS_DATABASE_ID, MEETING_TEMPLATE_PAGE_ID, MEETING_NOTES_PARENT_ID")
+        return
+
+    min_interval = float(os.environ.get('NOTION_WATCH_MIN_INTERVAL') or DEFAULT_MIN_INTERVAL)
+    max_interval = float(os.environ.get('NOTION_WATCH_MAX_INTERVAL') or DEFAULT_MAX_INTERVAL)
+    interval = min_interval
+
+    with closing(connect()) as connection:
+        while True:
+            try:
+                summary = poll(notion, connection)
+                print(f"🔎 {summary['rows']} rows, {summary['changes']} changed in {summary['seconds']}s")
+                for result in summary['results']:
+                    if result.get('notes_created') or result.get('cancelled_updated'):
+                        print(f"   Notes created: {result['notes_created']}, cancelled updated: {result['cancelled_updated']}")
+                    for error in result.get('errors', []):
+                        print(f"   • {error}")
+            except Exception as e:
+                summary = None
+                print(f"❌ Poll failed: {str(e)}")
+            if once:
+                return
+            interval = next_interval(interval, summary, min_interval, max_interval)
+            time.sleep(interval)
+
+if __name__ == "__main__":
+    watch(once="--once" in sys.argv)
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""asyncio counterpart of NotionHelper.
+
+    async with AsyncNotionHelper() as notion:
+        pages = await asyncio.gather(*(notion.get_page(page_id) for page_id in page_ids))
+
+AsyncNotionHelper has the same methods as NotionHelper as coroutines (the
+iter_* methods are async iterators), built on aiohttp. Each helper keeps one
+ClientSession with up to pool_size keep-alive connections, and a semaphore
+bounds the requests in flight to `concurrency`. Requests draw from the same
+per-token RequestScheduler as the blocking helper, waiting with
+asyncio.sleep, so asyncio.gather fan-out stays within Notion's rate limit and
+still yields to interactive actions. Retries, the response cache and tracing
+behave as in NotionHelper.
+
+aiohttp is optional (pip install aiohttp). NotionHelper only delegates to
+this helper when available() says it is installed.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from request_scheduler import INTERACTIVE, scheduler_for, retry_after_delay, retry_safe
+from notion_helper import (
+    DEFAULT_BASE_URL, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES, NotionHelper, batch_children,
+    dry_run_plan, finish_sync_stats, first_result, google_id_filter, index_meetings, meeting_entry_action,
+    meeting_page_body, meeting_window_filter, missing_meeting_filters, new_sync_stats, page_url, paragraph_block,
+    plan_known_meetings, plan_unknown_meetings, record_meeting_sync_result, sync_item_error
+)
+
+DEFAULT_CONCURRENCY = 8
+
+def available():
+    """Whether aiohttp is installed (and NOTION_ASYNC is not set to 0)"""
+    if os.environ.get('NOTION_ASYNC', '1') == '0':
+        return False
+    from importlib.util import find_spec
+    return find_spec('aiohttp') is not None
+
+class AsyncNotionHelper:
+    def __init__(self, base_url=None, pool_size=None, timeout=None, priority=None, max_retries=None, cache=None, concurrency=None):
+        self.token = os.environ.get('NOTION_TOKEN', '')
+        self.headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json",
+            "Notion-Version": "2022-06-28"
+        }
+
+        self.base_url = (base_url or os.environ.get('NOTION_API_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.pool_size = int(pool_size or os.environ.get('NOTION_POOL_SIZE') or DEFAULT_POOL_SIZE)
+        self.timeout = float(timeout or os.environ.get('NOTION_TIMEOUT') or DEFAULT_TIMEOUT)
+        self.concurrency = int(concurrency or os.environ.get('NOTION_ASYNC_CONCURRENCY') or DEFAULT_CONCURRENCY)
+        self.request_count = 0
+        # The session and semaphore belong to an event loop, so they are made on first use
+        self.session = None
+        self.semaphore = None
+        self.connections = {'created': 0, 'reused': 0}
+
+        self.priority = priority or os.environ.get('NOTION_PRIORITY') or INTERACTIVE
+        self.max_retries = int(max_retries if max_retries is not None else os.environ.get('NOTION_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+        self.scheduler = scheduler_for(self.token)
+
+        self.cache = None
+        if os.environ.get('NOTION_RESPONSE_CACHE', '1') != '0':
+            from response_cache import cache_for
+            self.cache = cache_for()
+        self.cache_reads = cache if cache is not None else self.priority == INTERACTIVE
+        self.revalidating = set()
+        self.background = set()
+
+        self.tracer = None
+        if os.environ.get('NOTION_TRACE', '0') not in ('', '0'):
+            import tracing
+            self.tracer = tracing
+
+        self.info_dump_page_id = os.environ.get('INFO_DUMP_PAGE_ID', '')
+        self.task_database_id = os.environ.get('TASK_DATABASE_ID', '')
+        self.meeting_notes_parent_id = os.environ.get('MEETING_NOTES_PARENT_ID', '')
+        self.daily_journal_parent_id = os.environ.get('DAILY_JOURNAL_PARENT_ID', '')
+        self.meetings_database_id = os.environ.get('MEETINGS_DATABASE_ID', '')
+        self.meeting_template_page_id = os.environ.get('MEETING_TEMPLATE_PAGE_ID', '')
+
+    def _get_session(self):
+        """The helper's pooled ClientSession, created in the running event loop"""
+        if self.session is None:
+            import aiohttp
+
+            async def created(session, context, params):
+                self.connections['created'] += 1
+
+            async def reused(session, context, params):
+                self.connections['reused'] += 1
+
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(created)
+            trace_config.on_connection_reuseconn.append(reused)
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace_config]
+            )
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self.session
+
+    async def _request(self, method, path, json_body=None, params=None, timeout=None):
+        """Send a request through the pooled session, semaphore and rate limiter
+
+        429 and 5xx responses are retried up to max_retries times, honoring
+        Retry-After and otherwise backing off exponentially with jitter.
+        """
+        session = self._get_session()
+        url = f"{self.base_url}{path}"
+        options = {}
+        if params:
+            options['params'] = {key: str(value) for key, value in params.items()}
+        if timeout:
+            import aiohttp
+            options['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        attempt = 0
+        started = time.perf_counter()
+        queue_wait = 0.0
+        while True:
+            async with self.semaphore:
+                queue_wait += await self.scheduler.acquire_async(self.priority)
+                self.request_count += 1
+                try:
+                    async with session.request(method, url, json=json_body, **options) as response:
+                        status = response.status
+                        headers = response.headers
+                        body = await response.read()
+                except Exception as e:
+                    if self.tracer:
+                        self._trace(method, path, None, json_body, 0, queue_wait, attempt, started, f"{type(e).__name__}: {e}")
+                    raise
+
+            retryable = status == 429 or (status >= 500 and retry_safe(method, path))
+            if not retryable or attempt >= self.max_retries:
+                result = json.loads(body)
+                if self.tracer:
+                    error = result.get('code') if result.get('object') == 'error' else None
+                    self._trace(method, path, status, json_body, len(body), queue_wait, attempt, started, error)
+                if self.cache and method != "GET" and result.get('object') != 'error':
+                    from response_cache import best_effort, write_tags
+                    best_effort(self.cache.invalidate, write_tags(method, path, json_body))
+                return result
+
+            delay = retry_after_delay(headers, attempt)
+            self.scheduler.record_retry()
+            if status == 429:
+                # Rate limits apply to the whole token, so hold every caller
+                self.scheduler.throttled(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    def _trace(self, method, path, status, json_body, bytes_in, queue_wait, retries, started, error=None):
+        bytes_out = len(json.dumps(json_body)) if json_body is not None else 0
+        self.tracer.api_span(method, path, status, bytes_out, bytes_in, queue_wait, retries, time.perf_counter() - started, error)
+
+    async def _cached_request(self, kind, method, path, json_body=None, tags=()):
+        """Read through the response cache; stale entries are served while a refresh runs"""
+        if not (self.cache and self.cache_reads):
+            return await self._request(method, path, json_body)
+
+        from response_cache import STALE, request_key
+        key = request_key(self.token, method, f"{self.base_url}{path}", json_body)
+        result, state = self.cache.get(key)
+        if state == STALE:
+            self._revalidate(key, kind, method, path, json_body, tags)
+        if result is not None:
+            return result
+        return await self._fetch_into_cache(key, kind, method, path, json_body, tags)
+
+    async def _fetch_into_cache(self, key, kind, method, path, json_body, tags):
+        from response_cache import best_effort, result_tags
+        result = await self._request(method, path, json_body)
+        if result.get('object') != 'error':
+            best_effort(self.cache.put, key, kind, result, list(tags) + result_tags(result))
+        return result
+
+    def _revalidate(self, key, kind, method, path, json_body, tags):
+        """Refresh a stale entry in a background task, once per key at a time"""
+        if key in self.revalidating or not self.cache.claim_refresh(key):
+            return
+        self.revalidating.add(key)
+
+        async def refresh():
+            try:
+                await self._fetch_into_cache(key, kind, method, path, json_body, tags)
+            except Exception:
+                pass  # the stale entry simply expires
+            finally:
+                self.revalidating.discard(key)
+
+        task = asyncio.ensure_future(refresh())
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    def cache_stats(self):
+        """Hit/miss/byte counters of the response cache"""
+        return self.cache.stats() if self.cache else {}
+
+    def connection_stats(self):
+        """Report how many requests reused an already-open connection"""
+        return {
+            'requests': self.connections['created'] + self.connections['reused'],
+            'connections': self.connections['created'],
+            'reused': self.connections['reused'],
+            'helper_requests': self.request_count
+        }
+
+    def scheduler_stats(self):
+        """Queue depth, wait time, throttle and retry metrics for this token"""
+        return self.scheduler.metrics()
+
+    async def close(self):
+        """Finish background refreshes and close pooled connections"""
+        if self.background:
+            await asyncio.gather(*self.background, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def create_page(self, parent_id, title, content=""):
+        """Create a new page under a parent page"""
+        properties = {
+            "title": {
+                "title": [{"text": {"content": title}}]
+            }
+        }
+        return await self.create_page_with_children({"page_id": parent_id}, properties, [paragraph_block(content)] if content else None)
+
+    async def create_page_with_children(self, parent, properties, children=None):
+        """Create a page from raw properties and at most one request's worth of blocks
+
+        parent is {"page_id": ...} or {"database_id": ...}; append further
+        content with append_blocks.
+        """
+        data = {"parent": parent, "properties": properties}
+        if children:
+            data["children"] = children
+        return await self._request("POST", "/pages", data)
+
+    async def append_to_page(self, page_id, content):
+        """Append content to an existing page"""
+        return await self.append_blocks(page_id, [paragraph_block(content)])
+
+    async def append_blocks(self, page_id, blocks):
+        """Append any number of blocks to a page in size-bounded requests, in order"""
+        appended = []
+        for batch in batch_children(blocks):
+            result = await self._request("PATCH", f"/blocks/{page_id}/children", {"children": batch})
+            if result.get('object') == 'error':
+                # Earlier chunks are already on the page; report how far we got
+                result['appended'] = len(appended)
+                return result
+            appended.extend(result.get('results', []))
+        return {"object": "list", "results": appended}
+
+    async def create_task(self, title, description="", database_id=None):
+        """Create a task in the task database"""
+        data = {
+            "parent": {"database_id": database_id or self.task_database_id},
+            "properties": {
+                "Task": {
+                    "title": [{"text": {"content": title}}]
+                }
+            }
+        }
+        if description:
+            data["children"] = [paragraph_block(description)]
+        return await self._request("POST", "/pages", data)
+
+    async def search_pages(self, query, start_cursor=None, page_size=None):
+        """Search for pages matching query"""
+        data = {
+            "query": query,
+            "filter": {
+                "value": "page",
+                "property": "object"
+            },
+            "sort": {
+                "direction": "descending",
+                "timestamp": "last_edited_time"
+            }
+        }
+        if start_cursor:
+            data["start_cursor"] = start_cursor
+        if page_size:
+            data["page_size"] = page_size
+        return await self._cached_request('search', "POST", "/search", data)
+
+    def get_page_url(self, page_id):
+        """Get the Notion URL for a page"""
+        return page_url(page_id)
+
+    async def query_database(self, database_id, filter_obj=None, sorts=None, start_cursor=None, page_size=None):
+        """Query database with optional filters and sorts"""
+        data = {}
+        if filter_obj:
+            data["filter"] = filter_obj
+        if sorts:
+            data["sorts"] = sorts
+        if start_cursor:
+            data["start_cursor"] = start_cursor
+        if page_size:
+            data["page_size"] = page_size
+        return await self._cached_request('database_query', "POST", f"/databases/{database_id}/query", data, tags=[f"db:{database_id}"])
+
+    async def get_page(self, page_id, fresh=False):
+        """Get a page object (properties, parent, last_edited_time)
+
+        fresh=True skips the response cache, for checks that must see the latest edit.
+        """
+        if fresh:
+            return await self._request("GET", f"/pages/{page_id}")
+        return await self._cached_request('page', "GET", f"/pages/{page_id}")
+
+    async def get_database(self, database_id):
+        """Get a database object, including its property schema"""
+        return await self._request("GET", f"/databases/{database_id}")
+
+    async def archive_page(self, page_id):
+        """Move a page to the trash"""
+        return await self._request("PATCH", f"/pages/{page_id}", {"archived": True})
+
+    async def get_block_children(self, block_id, start_cursor=None, page_size=None):
+        """Get one page of a block's children"""
+        params = {}
+        if start_cursor:
+            params["start_cursor"] = start_cursor
+        if page_size:
+            params["page_size"] = page_size
+        return await self._request("GET", f"/blocks/{block_id}/children", params=params or None)
+
+    async def _paginate(self, fetch, prefetch=False):
+        """Yield results from every page of a cursor-paginated endpoint
+
+        fetch(cursor) is a coroutine returning one page of results. With
+        prefetch, the next page is requested while the caller consumes the
+        current one.
+        """
+        async def checked(cursor):
+            result = await fetch(cursor)
+            if result.get('object') == 'error':
+                raise Exception(f"Notion API error ({result.get('status')}): {result.get('message', result)}")
+            return result
+
+        pending = asyncio.ensure_future(checked(None)) if prefetch else None
+        cursor = None
+        try:
+            while True:
+                result = await (pending if pending else checked(cursor))
+                pending = None
+                cursor = result.get('next_cursor') if result.get('has_more') else None
+                if cursor and prefetch:
+                    pending = asyncio.ensure_future(checked(cursor))
+                for item in result.get('results', []):
+                    yield item
+                if not cursor:
+                    return
+        finally:
+            if pending:
+                pending.cancel()
+
+    def iter_database(self, database_id, filter_obj=None, sorts=None, page_size=None, prefetch=False):
+        """Iterate (async for) over every row of a database query"""
+        return self._paginate(
+            lambda cursor: self.query_database(database_id, filter_obj, sorts, start_cursor=cursor, page_size=page_size),
+            prefetch
+        )
+
+    def iter_search(self, query, page_size=None, prefetch=False):
+        """Iterate (async for) over every page matching a search"""
+        return self._paginate(
+            lambda cursor: self.search_pages(query, start_cursor=cursor, page_size=page_size),
+            prefetch
+        )
+
+    def iter_block_children(self, block_id, page_size=None, prefetch=False):
+        """Iterate (async for) over every child of a block"""
+        return self._paginate(
+            lambda cursor: self.get_block_children(block_id, start_cursor=cursor, page_size=page_size),
+            prefetch
+        )
+
+    async def update_page_properties(self, page_id, properties):
+        """Update properties of an existing page"""
+        return await self._request("PATCH", f"/pages/{page_id}", {"properties": properties})
+
+    async def duplicate_page(self, template_page_id, new_title, parent_id):
+        """Clone a template page with a new title under specified parent
+
+        Template copies go through page_template's cached block tree, which is
+        blocking code, so the copy runs on a thread with a NotionHelper that
+        shares this helper's settings and rate limiter.
+        """
+        notion = NotionHelper(self.base_url, self.pool_size, self.timeout, self.priority, self.max_retries, self.cache_reads)
+        return await asyncio.to_thread(notion.duplicate_page, template_page_id, new_title, parent_id)
+
+    async def create_or_update_meeting_entry(self, calendar_event, existing_meeting=None, lookup=True):
+        """Create or update a meeting entry in Notion database from calendar event"""
+        if existing_meeting is None and lookup:
+            existing_meeting = await self.find_meeting_by_google_id(calendar_event['google_event_id'])
+
+        action, properties = meeting_entry_action(calendar_event, existing_meeting)
+        if action == 'skipped':
+            return {'action': action, 'result': existing_meeting, 'meeting_id': existing_meeting['id']}
+        if action == 'updated':
+            result = await self.update_page_properties(existing_meeting['id'], properties)
+            return {'action': action, 'result': result, 'meeting_id': existing_meeting['id']}
+        result = await self._request("POST", "/pages", meeting_page_body(self.meetings_database_id, properties))
+        return {'action': action, 'result': result, 'meeting_id': result.get('id')}
+
+    async def find_meeting_by_google_id(self, google_event_id):
+        """Find existing meeting in Notion database by Google event ID"""
+        return first_result(await self.query_database(self.meetings_database_id, google_id_filter([google_event_id]), page_size=1))
+
+    async def index_meetings_by_google_id(self, calendar_events):
+        """Map google_event_id -> meeting page for the given events with paginated bulk queries
+
+        Same queries as NotionHelper.index_meetings_by_google_id, except that
+        the OR-filter lookups of events outside the date window run at once.
+        """
+        index = {}
+        wanted = {event['google_event_id'] for event in calendar_events}
+        if not wanted:
+            return index
+
+        async def rows(filter_obj, prefetch=False):
+            return [meeting async for meeting in self.iter_database(self.meetings_database_id, filter_obj, page_size=100, prefetch=prefetch)]
+
+        window_filter = meeting_window_filter(calendar_events)
+        if window_filter:
+            index_meetings(index, wanted, await rows(window_filter, prefetch=True))
+        for meetings in await asyncio.gather(*(rows(id_filter) for id_filter in missing_meeting_filters(wanted, index))):
+            index_meetings(index, wanted, meetings)
+        return index
+
+    async def plan_meeting_sync(self, calendar_events, state=None):
+        """Decide locally whether each event needs a create, an update or nothing"""
+        plan, unknown = plan_known_meetings(calendar_events, state)
+        existing = await self.index_meetings_by_google_id([event for event, _ in unknown]) if unknown else {}
+        return plan + plan_unknown_meetings(unknown, existing)
+
+    async def apply_meeting_sync_item(self, action, event, page_id, properties, state=None):
+        """Carry out one planned meeting write and record it in the sync state"""
+        if action == 'create':
+            result = await self._request("POST", "/pages", meeting_page_body(self.meetings_database_id, properties))
+            page_id = result.get('id')
+        elif action == 'update':
+            result = await self.update_page_properties(page_id, properties)
+        else:
+            result = {}
+        return record_meeting_sync_result(result, event, page_id, state)
+
+    async def sync_calendar_events_to_database(self, calendar_events, dry_run=False, use_state=True, concurrency=None):
+        """Sync multiple calendar events to Notion database
+
+        Same plan and stats as NotionHelper.sync_calendar_events_to_database;
+        the writes are gathered on the event loop, at most `concurrency` (by
+        default the helper's own limit) in flight, and a failing event does
+        not affect the others.
+        """
+        concurrency = int(concurrency or self.concurrency)
+        started = time.monotonic()
+        sync_stats = new_sync_stats()
+        calls_before = self.request_count
+        state = None
+        if use_state:
+            from sync_state import SyncState
+            state = SyncState()
+
+        try:
+            plan = await self.plan_meeting_sync(calendar_events, state)
+        except Exception as e:
+            sync_stats['errors'].append(f"Failed to load existing meetings: {str(e)}")
+            plan = []
+        if dry_run:
+            plan = dry_run_plan(sync_stats, plan)
+
+        latencies = []
+        limit = asyncio.Semaphore(concurrency)
+
+        async def apply(item):
+            action, event, page_id, properties = item
+            async with limit:
+                op_started = time.monotonic()
+                try:
+                    await self.apply_meeting_sync_item(action, event, page_id, properties, state)
+                    return action, None
+                except Exception as e:
+                    return action, sync_item_error(event, e)
+                finally:
+                    if action != 'skip':
+                        latencies.append(time.monotonic() - op_started)
+
+        outcomes = await asyncio.gather(*(apply(item) for item in plan))
+        if state:
+            state.close()
+        return finish_sync_stats(sync_stats, outcomes, self.request_count - calls_before, started, latencies, concurrency, 'asyncio')
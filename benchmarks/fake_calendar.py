@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""In-process stand-in for the Google Calendar API used by the tests.
+
+Implements events().list (with pageToken pagination and timeMin/timeMax
+filtering) and the multipart batch endpoint on an in-memory store, and
+records the size of every batch and the Authorization header of every call.
+Point a GoogleCalendarHelper at it with
+GOOGLE_CALENDAR_API_ENDPOINT=<server.root_url>, or pass
+build_service(document, http=httplib2.Http(), api_endpoint=server.root_url).
+"""
+
+import json
+import uuid
+import email
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The real API allows up to 2500 events per page
+MAX_PAGE_SIZE = 2500
+EVENTS_PATH = "/calendar/v3/calendars/"
+BATCH_PATH = "/batch/calendar/v3"
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+class FakeCalendar:
+    """In-memory calendars plus the HTTP server that serves them"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calendars = {}
+        self.stats = {'requests': 0, 'batches': [], 'authorization': set()}
+        self.server = None
+        self.thread = None
+
+    # Server lifecycle
+
+    def start(self, port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                with fake.lock:
+                    fake.stats['authorization'].add(self.headers.get('Authorization'))
+                status, content_type, body = fake.dispatch(self.command, self.path, raw, self.headers.get('Content-Type'))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    @property
+    def root_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    # Data setup
+
+    def add_calendar(self, calendar_id):
+        with self.lock:
+            self.calendars.setdefault(calendar_id, [])
+        return calendar_id
+
+    def add_event(self, calendar_id, summary, start, minutes=30, ical_uid=None):
+        """Add a timed event starting at start (an aware datetime); returns its id"""
+        event_id = uuid.uuid4().hex
+        event = {
+            'kind': 'calendar#event',
+            'id': event_id,
+            'iCalUID': ical_uid or f"{event_id}@google.com",
+            'status': 'confirmed',
+            'summary': summary,
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': (start + timedelta(minutes=minutes)).isoformat()},
+            'updated': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        }
+        with self.lock:
+            self.calendars.setdefault(calendar_id, []).append(event)
+        return event_id
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'batches': [], 'authorization': set()}
+
+    # Request handling
+
+    def dispatch(self, method, path, raw, content_type):
+        if method == 'POST' and urlparse(path).path == BATCH_PATH:
+            return self.batch(raw, content_type)
+        status, payload = self.route(method, path)
+        return status, 'application/json', json.dumps(payload).encode('utf-8')
+
+    def route(self, method, path):
+        with self.lock:
+            self.stats['requests'] += 1
+        url = urlparse(path)
+        if method != 'GET' or not url.path.startswith(EVENTS_PATH) or not url.path.endswith('/events'):
+            return 404, error(404, f"No route for {method} {url.path}")
+        calendar_id = unquote(url.path[len(EVENTS_PATH):-len('/events')])
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        return self.list_events(calendar_id, query)
+
+    def list_events(self, calendar_id, query):
+        with self.lock:
+            if calendar_id not in self.calendars:
+                return 404, error(404, "Not Found")
+            events = list(self.calendars[calendar_id])
+
+        if 'timeMin' in query:
+            events = [e for e in events if parse_time(e['end']['dateTime']) > parse_time(query['timeMin'])]
+        if 'timeMax' in query:
+            events = [e for e in events if parse_time(e['start']['dateTime']) < parse_time(query['timeMax'])]
+        if query.get('orderBy') == 'startTime':
+            events.sort(key=lambda e: parse_time(e['start']['dateTime']))
+
+        size = min(int(query.get('maxResults', 250)), MAX_PAGE_SIZE)
+        offset = int(query.get('pageToken') or 0)
+        result = {'kind': 'calendar#events', 'items': events[offset:offset + size]}
+        if offset + size < len(events):
+            result['nextPageToken'] = str(offset + size)
+        return 200, result
+
+    def batch(self, raw, content_type):
+        """Answer a multipart/mixed batch with one application/http part per call"""
+        message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + raw)
+        parts = message.get_payload()
+        with self.lock:
+            self.stats['batches'].append(len(parts))
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        lines = []
+        for part in parts:
+            request_line = part.get_payload().lstrip().split('\n', 1)[0].strip()
+            method, path, _ = request_line.split(' ')
+            status, payload = self.route(method, path)
+            content_id = part['Content-ID'].strip('<>')
+            lines += [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <response-{content_id}>",
+                "",
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}",
+                "Content-Type: application/json; charset=UTF-8",
+                "",
+                json.dumps(payload)
+            ]
+        lines.append(f"--{boundary}--")
+        body = "\r\n".join(lines).encode('utf-8')
+        return 200, f"multipart/mixed; boundary={boundary}", body
+
+def error(status, message):
+    return {'error': {'code': status, 'message': message, 'errors': [{'message': message}]}}
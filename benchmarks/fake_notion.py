@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""In-process stand-in for the Notion API used by the benchmarks and tests.
+
+Implements the endpoints this workflow calls (pages, block children,
+search and database queries) on an in-memory store, with cursor pagination,
+a configurable per-request latency and a token-bucket rate limit that
+answers 429 with Retry-After like the real API. fail_next() makes a route
+answer with an error status, for testing failure handling. Point a
+NotionHelper at it with NOTION_API_BASE_URL=<server.base_url>.
+"""
+
+import json
+import time
+import uuid
+import random
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_PAGE_SIZE = 100
+# Notion's limits on one rich_text object's content and on rich_text objects per property
+MAX_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+def new_id():
+    return str(uuid.uuid4())
+
+def plain_text(rich_text):
+    return ''.join(part.get('plain_text') or part.get('text', {}).get('content', '') for part in rich_text or [])
+
+def with_plain_text(value):
+    """Fill in plain_text on rich text objects the way the API does on read"""
+    if isinstance(value, list):
+        return [with_plain_text(item) for item in value]
+    if isinstance(value, dict):
+        value = {key: with_plain_text(item) for key, item in value.items()}
+        if value.get('type') == 'text' or ('text' in value and isinstance(value['text'], dict) and 'content' in value['text']):
+            value.setdefault('type', 'text')
+            value.setdefault('plain_text', value['text'].get('content', ''))
+        return value
+    return value
+
+def check_rich_text(rich_text):
+    """Reject rich text over Notion's size limits with the API's validation error"""
+    if len(rich_text) > MAX_RICH_TEXT_ITEMS:
+        raise ApiError(400, 'validation_error', f"rich_text.length should be ≤ `{MAX_RICH_TEXT_ITEMS}`, instead was `{len(rich_text)}`.")
+    for item in rich_text:
+        content = item.get('text', {}).get('content', '')
+        if len(content) > MAX_TEXT_LENGTH:
+            raise ApiError(400, 'validation_error', f"text.content.length should be ≤ `{MAX_TEXT_LENGTH}`, instead was `{len(content)}`.")
+
+class ApiError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+class FakeNotion:
+    """In-memory workspace plus the HTTP server that serves it"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_limit=None, burst=10, retry_after=1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.blocks = {}
+        self.children = {}
+        self.schemas = {}
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.stats = {'requests': 0, 'throttled': 0, 'errors': 0, 'by_route': {}}
+        # route -> [status, remaining] of injected failures, see fail_next()
+        self.faults = {}
+        self.server = None
+        self.thread = None
+
+    # Server lifecycle
+
+    def start(self, port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                status, payload, headers = fake.dispatch(self.command, self.path, raw)
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def request_count(self):
+        with self.lock:
+            return self.stats['requests']
+
+    def snapshot_stats(self):
+        with self.lock:
+            return {
+                'requests': self.stats['requests'],
+                'throttled': self.stats['throttled'],
+                'errors': self.stats['errors'],
+                'by_route': dict(self.stats['by_route'])
+            }
+
+    # Seeding
+
+    def add_page(self, title, parent=None, properties=None, children=None):
+        """Create a page directly in the store; returns its id"""
+        parent = parent or {"type": "workspace", "workspace": True}
+        if properties is None:
+            properties = {"title": {"title": [{"text": {"content": title}}]}}
+        page = self._create_page({"parent": parent, "properties": properties, "children": children or []})
+        return page['id']
+
+    def add_database(self, properties=None):
+        """Create an empty database; properties is its schema as GET /databases returns it"""
+        database_id = new_id()
+        self.children.setdefault(database_id, [])
+        self.schemas[database_id] = properties or {"Name": {"id": "title", "type": "title", "title": {}}}
+        return database_id
+
+    # Request handling
+
+    def fail_next(self, route, status=500, count=1, after=0):
+        """Answer count requests to route (e.g. 'PATCH /blocks/children') with status, after letting after through"""
+        with self.lock:
+            self.faults[route] = [status, count, after]
+
+    def _admit(self):
+        """Token bucket shared by all callers, like Notion's per-integration limit"""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate_limit)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def dispatch(self, method, raw_path, raw_body):
+        url = urlparse(raw_path)
+        parts = url.path.strip('/').split('/')
+        if parts and parts[0] == 'v1':
+            parts = parts[1:]
+        route = f"{method} /{parts[0]}" + ("/children" if parts[-1] == 'children' else "")
+        if parts[0] == 'databases':
+            route = f"{method} /databases" + ("/query" if parts[-1] == 'query' else "")
+
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['by_route'][route] = self.stats['by_route'].get(route, 0) + 1
+            admitted = self._admit()
+            if not admitted:
+                self.stats['throttled'] += 1
+            fault = self.faults.get(route)
+            injected = False
+            if admitted and fault and fault[2] > 0:
+                fault[2] -= 1
+            elif admitted and fault and fault[1] > 0:
+                fault[1] -= 1
+                self.stats['errors'] += 1
+                injected = True
+
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+        if not admitted:
+            return 429, self._error(429, 'rate_limited', 'Rate limited'), {'Retry-After': str(self.retry_after)}
+        if injected:
+            return fault[0], self._error(fault[0], 'injected_failure', 'Injected failure'), {}
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            with self.lock:
+                return 200, self._route(method, parts, body, query), {}
+        except ApiError as e:
+            with self.lock:
+                self.stats['errors'] += 1
+            return e.status, self._error(e.status, e.code, str(e)), {}
+
+    def _error(self, status, code, message):
+        return {"object": "error", "status": status, "code": code, "message": message}
+
+    def _route(self, method, parts, body, query):
+        if parts == ['pages'] and method == 'POST':
+            return self._create_page(body)
+        if parts[0] == 'pages' and len(parts) == 2:
+            page = self._page(parts[1])
+            if method == 'GET':
+                return page
+            if method == 'PATCH':
+                page['properties'].update(with_plain_text(body.get('properties', {})))
+                if 'archived' in body:
+                    page['archived'] = body['archived']
+                    if page['id'] in self.blocks:
+                        self.blocks[page['id']]['archived'] = body['archived']
+                page['last_edited_time'] = now_iso()
+                return page
+        if parts[0] == 'blocks' and len(parts) == 3 and parts[2] == 'children':
+            parent_id = self._known(parts[1])
+            if method == 'GET':
+                live = [child for child in self.children.get(parent_id, []) if not self.blocks.get(child, {}).get('archived')]
+                return self._paginate(live, query.get('start_cursor'), query.get('page_size'))
+            if method == 'PATCH':
+                created = self._append(parent_id, body.get('children', []))
+                self._touch(parent_id)
+                return {"object": "list", "results": created, "has_more": False, "next_cursor": None}
+        if parts == ['search'] and method == 'POST':
+            text = (body.get('query') or '').lower()
+            found = [page for page in self.pages.values()
+                     if not page.get('archived') and text in self._title(page).lower()]
+            found.sort(key=lambda page: page['last_edited_time'], reverse=True)
+            return self._paginate(found, body.get('start_cursor'), body.get('page_size'))
+        if parts[0] == 'databases' and len(parts) == 2 and method == 'GET':
+            database_id = self._dashed(parts[1]) if self._dashed(parts[1]) in self.schemas else parts[1]
+            if database_id not in self.schemas:
+                raise ApiError(404, 'object_not_found', f"Could not find database with ID: {parts[1]}")
+            return {"object": "database", "id": database_id, "properties": self.schemas[database_id]}
+        if parts[0] == 'databases' and len(parts) == 3 and parts[2] == 'query' and method == 'POST':
+            rows = [self.pages[row_id] for row_id in self.children.get(parts[1], [])
+                    if row_id in self.pages and not self.pages[row_id].get('archived')]
+            if body.get('filter'):
+                rows = [row for row in rows if self._matches(row, body['filter'])]
+            return self._paginate(rows, body.get('start_cursor'), body.get('page_size'))
+        raise ApiError(400, 'invalid_request_url', f"Unsupported route: {method} /{'/'.join(parts)}")
+
+    def _known(self, object_id):
+        for candidate in (object_id, self._dashed(object_id)):
+            if candidate in self.pages or candidate in self.blocks:
+                return candidate
+        raise ApiError(404, 'object_not_found', f"Could not find block with ID: {object_id}")
+
+    def _dashed(self, object_id):
+        raw = object_id.replace('-', '')
+        if len(raw) != 32:
+            return object_id
+        return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+    def _page(self, page_id):
+        page_id = self._known(page_id)
+        if page_id not in self.pages:
+            raise ApiError(404, 'object_not_found', f"Could not find page with ID: {page_id}")
+        return self.pages[page_id]
+
+    def _touch(self, block_id):
+        if block_id in self.pages:
+            self.pages[block_id]['last_edited_time'] = now_iso()
+
+    def _title(self, page):
+        for prop in page['properties'].values():
+            if 'title' in prop:
+                return plain_text(prop['title'])
+        return ''
+
+    def _create_page(self, body):
+        parent = body.get('parent', {})
+        parent_id = parent.get('page_id') or parent.get('database_id')
+        if parent_id:
+            parent_id = self._dashed(parent_id) if self._dashed(parent_id) in self.children else parent_id
+        page_id = new_id()
+        stamp = now_iso()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": stamp,
+            "last_edited_time": stamp,
+            "archived": False,
+            "parent": parent,
+            "properties": with_plain_text(body.get('properties', {})),
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}"
+        }
+        self.pages[page_id] = page
+        self.children[page_id] = []
+        if parent.get('database_id'):
+            self.children.setdefault(parent_id, []).append(page_id)
+        elif parent_id in self.children:
+            # Subpages are listed among their parent's children as child_page blocks
+            self.blocks[page_id] = {
+                "object": "block", "id": page_id, "type": "child_page", "created_time": stamp,
+                "last_edited_time": stamp, "has_children": False, "archived": False,
+                "child_page": {"title": self._title(page)}
+            }
+            self.children[parent_id].append(page_id)
+        self._append(page_id, body.get('children', []))
+        return page
+
+    def _append(self, parent_id, blocks, depth=0):
+        if len(blocks) > MAX_PAGE_SIZE:
+            raise ApiError(400, 'validation_error', f"body.children.length should be ≤ `{MAX_PAGE_SIZE}`, instead was `{len(blocks)}`.")
+        if depth > 2 and blocks:
+            raise ApiError(400, 'validation_error', "Children may only be nested two levels deep in one request.")
+        created = []
+        for block in blocks:
+            block_type = block['type']
+            check_rich_text(block[block_type].get('rich_text', []))
+            payload = with_plain_text(dict(block[block_type]))
+            nested = payload.pop('children', [])
+            block_id = new_id()
+            stamp = now_iso()
+            stored = {
+                "object": "block",
+                "id": block_id,
+                "type": block_type,
+                "created_time": stamp,
+                "last_edited_time": stamp,
+                "has_children": bool(nested),
+                "archived": False,
+                block_type: payload
+            }
+            self.blocks[block_id] = stored
+            self.children.setdefault(parent_id, []).append(block_id)
+            self.children[block_id] = []
+            if nested:
+                self._append(block_id, nested, depth + 1)
+            created.append(stored)
+        if parent_id in self.blocks and created:
+            self.blocks[parent_id]['has_children'] = True
+        return created
+
+    def _paginate(self, items, cursor, page_size):
+        start = int(cursor or 0)
+        size = min(int(page_size or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        page = items[start:start + size]
+        resolved = [self.blocks.get(item) or self.pages.get(item) if isinstance(item, str) else item for item in page]
+        more = start + size < len(items)
+        return {"object": "list", "results": resolved, "has_more": more, "next_cursor": str(start + size) if more else None}
+
+    def _matches(self, row, condition):
+        """Evaluate the subset of Notion filter syntax used by this workflow"""
+        if 'and' in condition:
+            return all(self._matches(row, part) for part in condition['and'])
+        if 'or' in condition:
+            return any(self._matches(row, part) for part in condition['or'])
+        if condition.get('timestamp'):
+            stamp = row[condition['timestamp']]
+            return self._compare(stamp, condition[condition['timestamp']])
+        prop = row['properties'].get(condition.get('property'), {})
+        if 'title' in condition:
+            return self._compare(plain_text(prop.get('title')), condition['title'])
+        if 'rich_text' in condition:
+            value = plain_text(prop.get('rich_text'))
+            return self._compare(value, condition['rich_text'])
+        if 'select' in condition:
+            value = (prop.get('select') or {}).get('name')
+            test = condition['select']
+            if 'equals' in test:
+                return value == test['equals']
+            if 'does_not_equal' in test:
+                return value != test['does_not_equal']
+            return True
+        if 'date' in condition:
+            value = (prop.get('date') or {}).get('start')
+            return value is not None and self._compare(value[:10], {k: v[:10] for k, v in condition['date'].items()})
+        if 'checkbox' in condition:
+            return bool(prop.get('checkbox')) == condition['checkbox'].get('equals')
+        return True
+
+    def _compare(self, value, test):
+        if 'equals' in test:
+            return value == test['equals']
+        if 'on_or_after' in test:
+            return value >= test['on_or_after']
+        if 'on_or_before' in test:
+            return value <= test['on_or_before']
+        return True
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the Script Filter entry points.
+
+Usage:
+    python3 benchmarks/startup.py [--runs N] [--budget-ms MS]
+
+Each entry point is launched as a fresh interpreter (with the warm worker
+bypassed) and timed end to end. A second run with ``-X importtime`` records how
+long imports take (interpreter startup included) and whether the HTTP stack was loaded.
+Exits non-zero when any median wall time exceeds the budget.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (entry point, Script Filter arguments)
+PREVIEWS = [
+    ("quick_task.py", ["Buy groceries"]),
+    ("clipboard_keyword.py", ["Some typed text"]),
+    ("page_access.py", [""]),
+]
+
+# Modules that must not be imported on a preview path
+HEAVY_MODULES = ("requests", "urllib3", "ssl")
+
+DEFAULT_BUDGET_MS = 150
+
+def preview_env():
+    env = dict(os.environ)
+    env.update({
+        "NOTION_WORKER": "0",
+        "NOTION_TOKEN": env.get("NOTION_TOKEN", "secret_benchmark"),
+        "TASK_DATABASE_ID": env.get("TASK_DATABASE_ID", "benchmark-task-db"),
+        "INFO_DUMP_PAGE_ID": env.get("INFO_DUMP_PAGE_ID", "benchmark-dump-page"),
+        "COMMAND_CENTER_PAGE_ID": env.get("COMMAND_CENTER_PAGE_ID", "benchmark-command-center"),
+    })
+    return env
+
+def time_cold_start(script, args, runs, env):
+    """Wall time in ms of each fresh-process run"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, script)] + args,
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def import_profile(script, args, env):
+    """Total import time in ms and the set of top-level modules imported"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(ROOT, script)] + args,
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            # Only top-level imports, so nested ones are not counted twice
+            total_us += cumulative
+        modules.add(name.strip().split(".")[0])
+    return total_us / 1000, modules
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Script Filter cold-start time")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    args = parser.parse_args()
+
+    env = preview_env()
+    over_budget = False
+
+    print(f"{'entry point':<22} {'median':>8} {'p95':>8} {'imports':>8}  heavy modules")
+    for script, script_args in PREVIEWS:
+        samples = time_cold_start(script, script_args, args.runs, env)
+        import_ms, modules = import_profile(script, script_args, env)
+        heavy = sorted(m for m in HEAVY_MODULES if m in modules)
+        median = statistics.median(samples)
+
+        flags = []
+        if median > args.budget_ms:
+            flags.append("over budget")
+            over_budget = True
+        if heavy:
+            flags.append("loads " + ", ".join(heavy))
+            over_budget = True
+
+        print(f"{script:<22} {median:>6.1f}ms {percentile(samples, 0.95):>6.1f}ms {import_ms:>6.1f}ms  {', '.join(flags) or 'ok'}")
+
+    print(f"Budget: {args.budget_ms:.0f}ms median per entry point")
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
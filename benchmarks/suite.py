@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""End-to-end benchmarks of every entry point against a local fake Notion API.
+
+Usage:
+    python3 benchmarks/suite.py [--runs N] [--latency-ms MS] [--no-throttle]
+                                [--output FILE] [--compare FILE]
+
+A FakeNotion server (benchmarks/fake_notion.py) is started in-process with
+per-request latency and Notion's rate limit, and each entry point is run the
+way Alfred runs it: as a fresh interpreter with NOTION_API_BASE_URL pointing
+at the fake. Captures bypass the outbox so the Notion round trips are timed.
+Calendar sync runs in-process through sync_calendar_events_to_database with
+generated events, since the Google Calendar side needs real credentials,
+both serially and with concurrent writes.
+
+The report covers cold-start time of the Script Filter previews, end-to-end
+latency percentiles, requests per operation, throughput and 429s per
+scenario. Results are written as JSON (benchmarks/results/ by default);
+pass --compare with an earlier file to print the changes.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT)
+from fake_notion import FakeNotion
+from startup import PREVIEWS, percentile, time_cold_start
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_RUNS = 5
+DEFAULT_LATENCY_MS = 50
+DEFAULT_JITTER_MS = 30
+# Notion averages three requests per second per integration, with some burst
+FAKE_RATE_LIMIT = 3
+FAKE_BURST = 10
+SEARCH_PAGES = 300
+MEETINGS_PER_SYNC = 5
+CALENDAR_EVENTS = 20
+SYNC_CONCURRENCY = 4
+DUMP_LINES = 3000
+
+class Bench:
+    def __init__(self, fake, env):
+        self.fake = fake
+        self.env = env
+
+    def run_script(self, script, args, stdin=None, env=None):
+        """Run an entry point as Alfred would; returns (seconds, requests made)"""
+        before = self.fake.request_count()
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, script)] + args,
+            env=env or self.env, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            text=True, check=True
+        )
+        return time.perf_counter() - started, self.fake.request_count() - before
+
+    def measure(self, runs, operation):
+        """Time runs calls of operation(i) -> (seconds, requests)"""
+        throttled_before = self.fake.snapshot_stats()['throttled']
+        started = time.perf_counter()
+        samples = [operation(i) for i in range(runs)]
+        wall = time.perf_counter() - started
+        latencies = [seconds * 1000 for seconds, _ in samples]
+        requests = [count for _, count in samples]
+        return {
+            'runs': runs,
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'mean_ms': round(statistics.mean(latencies), 1),
+            'requests_per_op': round(statistics.mean(requests), 2),
+            'throughput_ops': round(runs / wall, 2) if wall else 0.0,
+            'throttled': self.fake.snapshot_stats()['throttled'] - throttled_before
+        }
+
+def dump_text(lines):
+    """A clipboard-sized mix of prose and log output"""
+    out = []
+    for i in range(lines):
+        if i % 10 < 6:
+            out.append(f"2026-01-01 12:00:{i % 60:02d} INFO worker-{i % 4} processed request {i} in {i % 97}ms")
+        else:
+            out.append(f"Note {i}: the quick brown fox jumps over the lazy dog while the build keeps running.")
+    return "\n".join(out) + "\n"
+
+def seed_meetings(fake, count):
+    """A meetings database with count scheduled meetings this week"""
+    database_id = fake.add_database()
+    today = datetime.now().date()
+    for i in range(count):
+        day = today + timedelta(days=i % 7)
+        fake.add_page(f"Meeting {i}", parent={"type": "database_id", "database_id": database_id}, properties={
+            "Name": {"title": [{"text": {"content": f"Meeting {i}"}}]},
+            "Date": {"date": {"start": f"{day.isoformat()}T10:00:00Z"}},
+            "Status": {"select": {"name": "Scheduled"}},
+            "Notes Generated": {"checkbox": False},
+            "Meeting Note Page": {"relation": []}
+        })
+    return database_id
+
+def template_blocks():
+    heading = {"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "Agenda"}}]}}
+    bullets = [{"object": "block", "type": "bulleted_list_item", "bulleted_list_item": {
+        "rich_text": [{"type": "text", "text": {"content": f"Item {i}"}}],
+        "children": [{"object": "block", "type": "paragraph", "paragraph": {"rich_text": [{"type": "text", "text": {"content": "Details"}}]}}]
+    }} for i in range(5)]
+    return [heading] + bullets
+
+def calendar_events(count, prefix='bench-event'):
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    # Same shape as GoogleCalendarHelper._process_event output
+    return [{
+        'id': f"{prefix}-{i}",
+        'title': f"Event {i}",
+        'start_datetime': start + timedelta(hours=i),
+        'end_datetime': start + timedelta(hours=i, minutes=30),
+        'date': (start + timedelta(hours=i)).date(),
+        'is_all_day': False,
+        'status': 'Scheduled',
+        'description': '',
+        'location': '',
+        'attendees': [],
+        'google_event_id': f"{prefix}-{i}",
+        'ical_uid': f"{prefix}-{i}",
+        'last_updated': start
+    } for i in range(count)]
+
+def run_calendar_sync(bench, runs, events, concurrency=None):
+    """Sync generated events in-process; the first run creates, later runs skip"""
+    from notion_helper import NotionHelper
+    from request_scheduler import BACKGROUND
+
+    os.environ.update(bench.env)
+
+    def operation(i):
+        # Every other run edits one event so updates are measured too
+        if i % 2:
+            events[0]['title'] = f"Event 0 (v{i})"
+        notion = NotionHelper(priority=BACKGROUND)
+        before = bench.fake.request_count()
+        started = time.perf_counter()
+        notion.sync_calendar_events_to_database(events, concurrency=concurrency)
+        return time.perf_counter() - started, bench.fake.request_count() - before
+
+    return bench.measure(runs, operation)
+
+def run_suite(args):
+    fake = FakeNotion(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=None if args.no_throttle else FAKE_RATE_LIMIT,
+        burst=FAKE_BURST
+    ).start()
+    cache_dir = tempfile.mkdtemp(prefix='notion-bench-')
+
+    try:
+        dump_page = fake.add_page("Info Dump")
+        task_db = fake.add_database()
+        journal_parent = fake.add_page("Journal")
+        notes_parent = fake.add_page("Meeting Notes")
+        template = fake.add_page("Meeting Template", children=template_blocks())
+        for i in range(SEARCH_PAGES):
+            fake.add_page(f"Project page {i}")
+
+        env = dict(os.environ)
+        env.update({
+            'NOTION_API_BASE_URL': fake.base_url,
+            'NOTION_TOKEN': 'secret_benchmark',
+            'NOTION_WORKER': '0',
+            'NOTION_OUTBOX': '0',
+            'NOTION_HELPER_CACHE_DIR': cache_dir,
+            'INFO_DUMP_PAGE_ID': dump_page,
+            'TASK_DATABASE_ID': task_db,
+            'COMMAND_CENTER_PAGE_ID': dump_page,
+            'DAILY_JOURNAL_PARENT_ID': journal_parent,
+            'MEETING_NOTES_PARENT_ID': notes_parent,
+            'MEETING_TEMPLATE_PAGE_ID': template,
+        })
+        if args.no_throttle:
+            env['NOTION_RATE_LIMIT'] = '1000'
+            env['NOTION_RATE_BURST'] = '1000'
+        bench = Bench(fake, env)
+        results = {}
+
+        print("cold start...", file=sys.stderr)
+        cold = {}
+        for script, script_args in PREVIEWS:
+            samples = time_cold_start(script, script_args, args.runs, env)
+            cold[script] = {'median_ms': round(statistics.median(samples), 1), 'p95_ms': round(percentile(samples, 0.95), 1)}
+
+        print("quick_task...", file=sys.stderr)
+        results['quick_task'] = bench.measure(args.runs, lambda i: bench.run_script('quick_task.py', ['--create', f"Task {i}"]))
+
+        print("clipboard_keyword --dump...", file=sys.stderr)
+        results['clipboard_keyword_dump'] = bench.measure(
+            args.runs, lambda i: bench.run_script('clipboard_keyword.py', ['--dump', f"Typed note {i}"])
+        )
+
+        print("clipboard_dump...", file=sys.stderr)
+        text = dump_text(DUMP_LINES)
+        results['clipboard_dump'] = bench.measure(args.runs, lambda i: bench.run_script('clipboard_dump.py', ['--stdin'], stdin=text))
+
+        print("page index refresh...", file=sys.stderr)
+        results['page_index_refresh'] = bench.measure(1, lambda i: bench.run_script('page_index.py', ['refresh', '--full']))
+
+        print("page_access...", file=sys.stderr)
+        results['page_access'] = bench.measure(args.runs, lambda i: bench.run_script('page_access.py', [f"project {i}"]))
+
+        print("calendar sync...", file=sys.stderr)
+        calendar_env = dict(env, MEETINGS_DATABASE_ID=fake.add_database())
+        results['calendar_sync'] = run_calendar_sync(Bench(fake, calendar_env), args.runs, calendar_events(CALENDAR_EVENTS))
+
+        # AsyncNotionHelper when aiohttp is installed, otherwise the thread pool
+        print("calendar sync (concurrent)...", file=sys.stderr)
+        calendar_env = dict(env, MEETINGS_DATABASE_ID=fake.add_database())
+        results['calendar_sync_concurrent'] = run_calendar_sync(
+            Bench(fake, calendar_env), args.runs, calendar_events(CALENDAR_EVENTS, 'bench-concurrent-event'), concurrency=SYNC_CONCURRENCY
+        )
+
+        print("meeting sync...", file=sys.stderr)
+
+        def meeting_sync(i):
+            # A fresh week of meetings each run, so every run generates notes
+            run_env = dict(env, MEETINGS_DATABASE_ID=seed_meetings(fake, MEETINGS_PER_SYNC))
+            return bench.run_script(os.path.join('archived_functions', 'meeting_sync.py'), ['--sync'], env=run_env)
+
+        results['meeting_sync'] = bench.measure(args.runs, meeting_sync)
+
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'config': {
+                'runs': args.runs,
+                'latency_ms': args.latency_ms,
+                'jitter_ms': args.jitter_ms,
+                'fake_rate_limit': None if args.no_throttle else FAKE_RATE_LIMIT,
+                'meetings_per_sync': MEETINGS_PER_SYNC,
+                'calendar_events': CALENDAR_EVENTS,
+                'sync_concurrency': SYNC_CONCURRENCY,
+                'dump_lines': DUMP_LINES
+            },
+            'cold_start': cold,
+            'scenarios': results,
+            'server': fake.snapshot_stats()
+        }
+    finally:
+        fake.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+def print_report(report, baseline=None):
+    print(f"{'cold start':<24} {'median':>9} {'p95':>9}")
+    for script, row in report['cold_start'].items():
+        print(f"{script:<24} {row['median_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms")
+    print()
+    print(f"{'scenario':<24} {'p50':>9} {'p95':>9} {'p99':>9} {'req/op':>7} {'ops/s':>7} {'429s':>5}")
+    for name, row in report['scenarios'].items():
+        line = (f"{name:<24} {row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms "
+                f"{row['requests_per_op']:>7.2f} {row['throughput_ops']:>7.2f} {row['throttled']:>5}")
+        previous = (baseline or {}).get('scenarios', {}).get(name)
+        if previous and previous['p50_ms']:
+            change = (row['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100
+            line += f"  p50 {change:+.0f}%, req/op {previous['requests_per_op']:.2f} -> {row['requests_per_op']:.2f}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workflow against a fake Notion API")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=DEFAULT_JITTER_MS)
+    parser.add_argument("--no-throttle", action="store_true", help="disable the fake's and the client's rate limits")
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run_suite(args)
+    print_report(report, baseline)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""Resumable bulk import of tasks into a database and of Markdown notes into pages.
+
+Usage:
+    python3 bulk_import.py tasks FILE [--database ID] [--concurrency N] [--dry-run]
+    python3 bulk_import.py notes DIR --parent ID [--concurrency N] [--dry-run]
+    python3 bulk_import.py status
+
+FILE is CSV with a header row, or JSONL with one object per line. Every
+column names a property of the target database (TASK_DATABASE_ID unless
+--database is given), except a `body` column, which becomes the page
+content. Rows are checked against the database schema before they are sent;
+rows that do not fit are reported and skipped. Notes are the *.md files in
+DIR, titled by their first "# " heading or else their file name.
+
+Input is read as a stream and rows are created on a thread pool under the
+shared rate limiter. Progress goes to a journal in the workflow cache: a row
+is marked as sending before its request and done after it, so a crashed or
+interrupted run can simply be started again. Done rows are skipped, and a
+row left in flight is first looked up in Notion so it is not created twice.
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+from contextlib import closing
+from datetime import datetime, timezone
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import open_database
+
+DEFAULT_CONCURRENCY = 4
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2
+# Rows created before an interrupted one was sent may carry an earlier created_time
+LOOKUP_MARGIN = 120
+MAX_REPORTED_ERRORS = 20
+BODY_COLUMN = 'body'
+TRUE_VALUES = ('true', 'yes', 'y', '1', 'x')
+FALSE_VALUES = ('false', 'no', 'n', '0', '')
+
+SENDING = 'sending'
+DONE = 'done'
+FAILED = 'failed'
+INVALID = 'invalid'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_jobs (
+    job TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS import_rows (
+    job TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    label TEXT NOT NULL,
+    status TEXT NOT NULL,
+    page_id TEXT,
+    error TEXT,
+    sent_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, row_key)
+);
+"""
+
+def connect():
+    return open_database('bulk_import.sqlite3', SCHEMA, synchronous='NORMAL')
+
+class Journal:
+    """Per-row progress of one import job (source file or folder plus target)"""
+
+    def __init__(self, connection, kind, source, target):
+        self.connection = connection
+        self.job = hashlib.sha1(json.dumps([kind, os.path.abspath(source), target]).encode('utf-8')).hexdigest()[:16]
+        now = time.time()
+        connection.execute(
+            """
+            INSERT INTO import_jobs (job, kind, source, target, started_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job) DO UPDATE SET updated_at = excluded.updated_at
+            """,
+            (self.job, kind, os.path.abspath(source), target, now, now)
+        )
+
+    def get(self, row_key):
+        row = self.connection.execute(
+            "SELECT status, page_id, sent_at, error FROM import_rows WHERE job = ? AND row_key = ?", (self.job, row_key)
+        ).fetchone()
+        return {'status': row[0], 'page_id': row[1], 'sent_at': row[2], 'error': row[3]} if row else None
+
+    def mark(self, row_key, label, status, page_id=None, error=None, sent_at=None):
+        self.connection.execute(
+            """
+            INSERT INTO import_rows (job, row_key, label, status, page_id, error, sent_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job, row_key) DO UPDATE SET
+                label = excluded.label, status = excluded.status, page_id = COALESCE(excluded.page_id, page_id),
+                error = excluded.error, sent_at = COALESCE(excluded.sent_at, sent_at), updated_at = excluded.updated_at
+            """,
+            (self.job, row_key, label, status, page_id, error, sent_at, time.time())
+        )
+
+    def forget(self, row_key):
+        self.connection.execute("DELETE FROM import_rows WHERE job = ? AND row_key = ?", (self.job, row_key))
+
+    def resumable(self):
+        """Whether a row of this job may have reached Notion without being marked done"""
+        return self.connection.execute(
+            "SELECT 1 FROM import_rows WHERE job = ? AND status IN (?, ?) AND sent_at IS NOT NULL LIMIT 1",
+            (self.job, SENDING, FAILED)
+        ).fetchone() is not None
+
+    def page_ids(self, except_key=None):
+        """Pages this job already accounts for, other than the given row's"""
+        return {row[0] for row in self.connection.execute(
+            "SELECT page_id FROM import_rows WHERE job = ? AND page_id IS NOT NULL AND row_key IS NOT ?", (self.job, except_key)
+        )}
+
+# Input
+
+def read_rows(path):
+    """(label, row) for each record of a CSV or JSONL file, read as a stream"""
+    with open(path, newline='') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    yield f"line {number}", json.loads(line)
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield f"line {reader.line_num}", row
+
+def keyed(records):
+    """Give every record a key that survives edits elsewhere in the file
+
+    The key is the hash of the record's content plus how many identical
+    records came before it, so reordered or inserted rows keep their keys.
+    """
+    seen = {}
+    for label, row in records:
+        digest = hashlib.sha1(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()
+        seen[digest] = seen.get(digest, 0) + 1
+        yield f"{digest}:{seen[digest]}", label, row
+
+def read_notes(folder):
+    """(label, path) for each Markdown note in a folder, in name order"""
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.md'):
+            yield name, os.path.join(folder, name)
+
+def note_content(path):
+    """Title and body text of a note; a leading "# " heading becomes the title"""
+    with open(path) as f:
+        text = f.read()
+    first, _, rest = text.partition('\n')
+    if first.startswith('# '):
+        return first[2:].strip(), rest
+    return os.path.splitext(os.path.basename(path))[0], text
+
+# Validation
+
+def text_items(text):
+    """rich_text for text of any length, cut into Notion-sized pieces"""
+    from notion_helper import MAX_TEXT_LENGTH, MAX_RICH_TEXT_ITEMS
+    if len(text) > MAX_TEXT_LENGTH * MAX_RICH_TEXT_ITEMS:
+        raise Exception(f"text longer than {MAX_TEXT_LENGTH * MAX_RICH_TEXT_ITEMS} characters")
+    return [{"text": {"content": text[start:start + MAX_TEXT_LENGTH]}} for start in range(0, len(text), MAX_TEXT_LENGTH)]
+
+def property_payload(schema, value):
+    """Request form of a CSV/JSON value for a database property; raises when the value does not fit"""
+    kind = schema['type']
+    text = value if isinstance(value, str) else json.dumps(value)
+    if kind in ('title', 'rich_text'):
+        return {kind: text_items(str(value))}
+    if kind == 'number':
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise Exception(f"{text!r} is not a number")
+        return {"number": int(number) if number.is_integer() else number}
+    if kind in ('select', 'status'):
+        options = [option['name'] for option in schema.get(kind, {}).get('options', [])]
+        # New select options are created on write; status options must already exist
+        if kind == 'status' and value not in options:
+            raise Exception(f"{text!r} is not one of {', '.join(options)}")
+        return {kind: {"name": str(value)}}
+    if kind == 'multi_select':
+        names = value if isinstance(value, list) else [name.strip() for name in str(value).split(',')]
+        return {"multi_select": [{"name": str(name)} for name in names if name]}
+    if kind == 'date':
+        try:
+            datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            raise Exception(f"{text!r} is not an ISO date")
+        return {"date": {"start": str(value)}}
+    if kind == 'checkbox':
+        if isinstance(value, bool):
+            return {"checkbox": value}
+        if str(value).strip().lower() not in TRUE_VALUES + FALSE_VALUES:
+            raise Exception(f"{text!r} is not a checkbox value")
+        return {"checkbox": str(value).strip().lower() in TRUE_VALUES}
+    if kind in ('url', 'email', 'phone_number'):
+        return {kind: str(value)}
+    raise Exception(f"{kind} properties cannot be imported")
+
+def task_item(schema, row):
+    """Title, properties and content blocks for a row; raises when the row does not fit the schema"""
+    from chunker import text_blocks
+
+    properties, body, title = {}, '', None
+    unknown = [column for column in row if column not in schema and column != BODY_COLUMN]
+    if unknown:
+        raise Exception(f"unknown column {', '.join(repr(column) for column in unknown)}")
+    for column, value in row.items():
+        if column == BODY_COLUMN and column not in schema:
+            body = str(value or '')
+            continue
+        if value is None or value == '':
+            continue
+        try:
+            properties[column] = property_payload(schema[column], value)
+        except Exception as e:
+            raise Exception(f"{column}: {str(e)}")
+        if schema[column]['type'] == 'title':
+            title = str(value)
+    if not title:
+        raise Exception("missing title")
+    return {'title': title, 'properties': properties, 'blocks': list(text_blocks(io.StringIO(body))) if body.strip() else []}
+
+def note_item(path):
+    from chunker import text_blocks
+
+    title, body = note_content(path)
+    properties = {"title": {"title": text_items(title)}}
+    return {'title': title, 'properties': properties, 'blocks': list(text_blocks(io.StringIO(body)))}
+
+# Import
+
+def child_pages(notion, parent_id, exclude=()):
+    """Title -> ids of a page's child pages, oldest first, leaving out the given ids"""
+    pages = {}
+    for block in notion.iter_block_children(parent_id, page_size=100):
+        if block['type'] == 'child_page' and block['id'] not in exclude:
+            pages.setdefault(block['child_page'].get('title'), []).append(block['id'])
+    return pages
+
+def existing_page(notion, target, item, sent_at, known, children=None):
+    """A page created for this item by an interrupted run, if there is one
+
+    Notes are looked up in children, the parent's child_pages() listed once
+    per run; the id found is taken out so no other row claims it.
+    """
+    if target['type'] == 'page':
+        candidates = children.get(item['title']) if children else None
+        return candidates.pop(0) if candidates else None
+
+    title_property = next(name for name, prop in target['schema'].items() if prop['type'] == 'title')
+    since = datetime.fromtimestamp(sent_at - LOOKUP_MARGIN, timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z')
+    filter_obj = {"and": [
+        {"property": title_property, "title": {"equals": item['title']}},
+        {"timestamp": "created_time", "created_time": {"on_or_after": since}}
+    ]}
+    for page in notion.iter_database(target['id'], filter_obj, page_size=100):
+        if page['id'] not in known:
+            return page['id']
+    return None
+
+def create_item(notion, target, item, resume=None, known=(), children=None):
+    """Create one row's page; returns its id. Raises on failure, leaving no partial page behind."""
+    from notion_helper import batch_children
+
+    batches = list(batch_children(item['blocks']))
+    if resume:
+        page_id = existing_page(notion, target, item, resume['sent_at'], known, children)
+        if page_id and len(batches) <= 1:
+            return page_id  # created in one request, so it is complete
+        if page_id:
+            # Its appends may not all have landed; start over
+            notion.archive_page(page_id)
+
+    parent = {f"{target['type']}_id": target['id']}
+    page = notion.create_page_with_children(parent, item['properties'], batches[0] if batches else None)
+    if page.get('object') == 'error':
+        raise Exception(page.get('message', page))
+    for batch in batches[1:]:
+        result = notion.append_blocks(page['id'], batch)
+        if result.get('object') == 'error':
+            notion.archive_page(page['id'])
+            raise Exception(result.get('message', result))
+    return page['id']
+
+class Progress:
+    def __init__(self):
+        self.counts = {DONE: 0, 'skipped': 0, FAILED: 0, INVALID: 0, 'valid': 0}
+        self.started = time.monotonic()
+        self.reported = self.started
+        self.errors = []
+
+    def add(self, status, label=None, error=None):
+        self.counts[status] += 1
+        if error and len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{label}: {error}")
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.counts[DONE] / elapsed if elapsed else 0.0
+
+    def line(self):
+        counts = self.counts
+        return (f"{counts[DONE]} imported, {counts['skipped']} already done, {counts[FAILED]} failed, "
+                f"{counts[INVALID]} invalid, {self.rate():.1f} rows/s")
+
+    def report(self, force=False):
+        now = time.monotonic()
+        if force or now - self.reported >= PROGRESS_INTERVAL:
+            self.reported = now
+            print(self.line(), file=sys.stderr, flush=True)
+
+def run_import(kind, source, target, items, concurrency, dry_run=False):
+    """Validate and create every item not yet done; returns the Progress"""
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    from notion_helper import NotionHelper
+    from request_scheduler import BACKGROUND
+
+    notion = NotionHelper(priority=BACKGROUND, cache=False)
+    progress = Progress()
+    in_flight = {}
+
+    def settle(done_futures):
+        for future in done_futures:
+            key, label, _ = in_flight.pop(future)
+            try:
+                journal.mark(key, label, DONE, page_id=future.result())
+                progress.add(DONE)
+            except Exception as e:
+                journal.mark(key, label, FAILED, error=str(e))
+                progress.add(FAILED, label, str(e))
+        progress.report()
+
+    with closing(connect()) as connection, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        journal = Journal(connection, kind, source, target['id'])
+        children = None
+        if target['type'] == 'page' and not dry_run and journal.resumable():
+            # Listed before this run creates anything; pages of done rows are not candidates
+            children = child_pages(notion, target['id'], journal.page_ids())
+        try:
+            for key, label, build in items:
+                record = journal.get(key)
+                if record and record['status'] == DONE:
+                    progress.add('skipped')
+                    continue
+                try:
+                    item = build()
+                except Exception as e:
+                    if not dry_run:
+                        journal.mark(key, label, INVALID, error=str(e))
+                    progress.add(INVALID, label, str(e))
+                    continue
+                if dry_run:
+                    progress.add('valid')
+                    continue
+
+                # A row that was in flight or failed may still have reached Notion
+                resume = record if record and record['status'] in (SENDING, FAILED) and record['sent_at'] else None
+                known = journal.page_ids(except_key=key) if resume and target['type'] == 'database' else ()
+                journal.mark(key, label, SENDING, sent_at=None if resume else time.time())
+                future = executor.submit(create_item, notion, target, item, resume, known, children)
+                in_flight[future] = (key, label, record)
+                # Keep memory bounded: only a couple of rows per worker are held at once
+                if len(in_flight) >= concurrency * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    settle(done)
+            settle(wait(in_flight)[0])
+        except KeyboardInterrupt:
+            # Rows not yet started go back to their previous state; started ones finish
+            for future, (key, label, record) in list(in_flight.items()):
+                if not future.cancel():
+                    continue
+                in_flight.pop(future)
+                if record:
+                    # Keep the earlier send time so the next run still checks Notion for it
+                    journal.mark(key, label, record['status'], error=record['error'], sent_at=record['sent_at'])
+                else:
+                    journal.forget(key)
+            settle(wait(in_flight)[0])
+            progress.report(force=True)
+            print("Interrupted; run the same command again to resume", file=sys.stderr)
+            raise
+    progress.report(force=True)
+    return progress
+
+def import_tasks(path, database_id, concurrency, dry_run=False):
+    from notion_helper import NotionHelper
+
+    database = NotionHelper(cache=False).get_database(database_id)
+    if database.get('object') == 'error':
+        raise Exception(f"Could not read the database schema: {database.get('message', database)}")
+    target = {'type': 'database', 'id': database_id, 'schema': database['properties']}
+    items = (
+        (key, label, lambda row=row: task_item(target['schema'], row))
+        for key, label, row in keyed(read_rows(path))
+    )
+    return run_import('tasks', path, target, items, concurrency, dry_run)
+
+def import_notes(folder, parent_id, concurrency, dry_run=False):
+    target = {'type': 'page', 'id': parent_id}
+    # A note is identified by its file name, so edited notes that were imported stay done
+    items = ((f"note:{label}", label, lambda path=path: note_item(path)) for label, path in read_notes(folder))
+    return run_import('notes', folder, target, items, concurrency, dry_run)
+
+def status():
+    with closing(connect()) as connection:
+        jobs = connection.execute("SELECT job, kind, source, target, updated_at FROM import_jobs ORDER BY updated_at DESC").fetchall()
+        if not jobs:
+            print("No imports yet")
+        for job, kind, source, target, updated_at in jobs:
+            counts = dict(connection.execute(
+                "SELECT status, COUNT(*) FROM import_rows WHERE job = ? GROUP BY status", (job,)
+            ).fetchall())
+            when = datetime.fromtimestamp(updated_at).strftime('%Y-%m-%d %H:%M')
+            summary = ', '.join(f"{count} {state}" for state, count in sorted(counts.items())) or 'no rows'
+            print(f"{when}  {kind} {source} -> {target}: {summary}")
+
+def option(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    concurrency = int(option('--concurrency') or DEFAULT_CONCURRENCY)
+    dry_run = '--dry-run' in sys.argv
+
+    if command == "status":
+        status()
+        sys.exit(0)
+    if command not in ("tasks", "notes") or len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(2)
+
+    try:
+        if command == "tasks":
+            database_id = option('--database') or os.environ.get('TASK_DATABASE_ID', '')
+            if not database_id:
+                print("❌ Set TASK_DATABASE_ID or pass --database")
+                sys.exit(2)
+            progress = import_tasks(sys.argv[2], database_id, concurrency, dry_run)
+        else:
+            parent_id = option('--parent')
+            if not parent_id:
+                print("❌ Pass --parent with the page to create notes under")
+                sys.exit(2)
+            progress = import_notes(sys.argv[2], parent_id, concurrency, dry_run)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except Exception as e:
+        print(f"❌ Import failed: {str(e)}")
+        sys.exit(1)
+
+    if dry_run:
+        print(f"Dry run: {progress.counts['valid']} to import, {progress.counts[INVALID]} invalid, {progress.counts['skipped']} already done")
+    else:
+        print(f"✅ {progress.line()}")
+    for error in progress.errors:
+        print(f"   • {error}")
+    sys.exit(1 if progress.counts[FAILED] else 0)
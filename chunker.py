@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Streaming conversion of large text (clipboard, stdin) into Notion blocks.
+
+Text is read a line at a time and packed into rich_text segments of at most
+MAX_TEXT_LENGTH characters, split on line boundaries where possible. Runs of
+log-like lines (timestamps, log levels, stack traces) become code blocks and
+everything else becomes paragraphs. Blocks are yielded lazily, so memory use
+does not grow with the size of the input.
+"""
+
+import re
+from notion_helper import MAX_TEXT_LENGTH, MAX_RICH_TEXT_ITEMS
+
+# Lines inspected before deciding whether a run of text is log-like
+LOOKAHEAD_LINES = 5
+# Segments per block; keeps blocks readable and well under MAX_RICH_TEXT_ITEMS
+MAX_SEGMENTS_PER_BLOCK = min(10, MAX_RICH_TEXT_ITEMS)
+
+LOG_LINE = re.compile(
+    r'^\s*('
+    r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}'          # ISO timestamps
+    r'|\d{2}:\d{2}:\d{2}'                        # bare times
+    r'|\[?(TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b'
+    r'|Traceback \(most recent call last\)'
+    r'|File "[^"]+", line \d+'                   # Python frames
+    r'|at [\w$.<>]+\('                           # JVM / JS frames
+    r'|[\w.]+(Error|Exception)\b'
+    r')'
+)
+
+def read_lines(stream):
+    """Yield lines, cutting any line longer than MAX_TEXT_LENGTH into pieces"""
+    return iter(lambda: stream.readline(MAX_TEXT_LENGTH), '')
+
+def looks_like_log(lines):
+    matches = sum(1 for line in lines if LOG_LINE.match(line))
+    return matches * 2 >= len(lines)
+
+def classified_lines(lines):
+    """Yield (is_log, line), deciding the kind once per blank-line-separated run
+
+    Blank lines are yielded as (None, line) and end the current run.
+    """
+    lookahead = []
+    is_log = None
+    for line in lines:
+        if not line.strip():
+            if lookahead:
+                is_log = looks_like_log(lookahead)
+                for pending in lookahead:
+                    yield is_log, pending
+                lookahead = []
+            is_log = None
+            yield None, line
+            continue
+
+        if is_log is not None:
+            yield is_log, line
+            continue
+
+        lookahead.append(line)
+        if len(lookahead) >= LOOKAHEAD_LINES:
+            is_log = looks_like_log(lookahead)
+            for pending in lookahead:
+                yield is_log, pending
+            lookahead = []
+
+    if lookahead:
+        is_log = looks_like_log(lookahead)
+        for pending in lookahead:
+            yield is_log, pending
+
+def text_block(is_log, segments):
+    """Build a code or paragraph block from rich_text segments"""
+    segments[-1] = segments[-1].rstrip('\n')
+    rich_text = [{"type": "text", "text": {"content": segment}} for segment in segments if segment]
+    if is_log:
+        return {
+            "object": "block",
+            "type": "code",
+            "code": {"rich_text": rich_text, "language": "plain text"}
+        }
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {"rich_text": rich_text}
+    }
+
+def text_blocks(stream):
+    """Lazily convert a text stream into compliant paragraph and code blocks"""
+    segments, current, kind = [], "", None
+
+    def finish_block():
+        if current:
+            segments.append(current)
+        block = text_block(kind, segments) if any(s.strip() for s in segments) else None
+        return block
+
+    for is_log, line in classified_lines(read_lines(stream)):
+        if is_log is None or (kind is not None and is_log != kind):
+            block = finish_block()
+            if block:
+                yield block
+            segments, current, kind = [], "", None
+            if is_log is None:
+                continue
+
+        kind = is_log
+        if len(current) + len(line) > MAX_TEXT_LENGTH:
+            segments.append(current)
+            current = ""
+            if len(segments) >= MAX_SEGMENTS_PER_BLOCK:
+                yield text_block(kind, segments)
+                segments = []
+        current += line
+
+    block = finish_block()
+    if block:
+        yield block
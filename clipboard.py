@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Clipboard reads for the dump entry points, with snapshots shared between invocations.
+
+Script Filter previews only read a bounded prefix of the clipboard. Each
+preview is recorded as a snapshot named by the hash of that prefix, and the
+Alfred item passes the snapshot handle instead of the clipboard text. The
+dump streams the clipboard once, after checking it still starts with the
+previewed prefix. Clipboard content is never written to disk; only the hash
+and a short preview are kept, readable by the owner alone.
+
+NOTION_CLIPBOARD picks the backend: pbpaste (default), xclip, wl-paste, or
+file:<path> to stand in for the clipboard on other systems and in tests.
+Backends that can tell cheaply whether the clipboard changed (file) skip the
+read entirely while it has not.
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import hashlib
+import subprocess
+from contextlib import contextmanager
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import cache_path
+
+# Characters a preview reads; larger clipboards are streamed by the dump itself
+PREVIEW_CHARS = 64 * 1024
+# Characters shown in the preview subtitle
+PREVIEW_LENGTH = 100
+HANDLE_PREFIX = 'clipboard-snapshot:'
+
+class CommandBackend:
+    """A clipboard read by running a command that writes it to stdout"""
+
+    def __init__(self, name, command):
+        self.name = name
+        self.command = command
+
+    @contextmanager
+    def open(self):
+        try:
+            process = subprocess.Popen(self.command, stdout=subprocess.PIPE, text=True)
+        except OSError:
+            yield io.StringIO("")
+            return
+        try:
+            yield process.stdout
+        finally:
+            # Closing early makes the command exit on SIGPIPE after a prefix read
+            process.stdout.close()
+            process.wait()
+
+    def change_token(self):
+        """No cheap way to tell whether the clipboard changed"""
+        return None
+
+class FileBackend:
+    """A file standing in for the clipboard"""
+
+    def __init__(self, path):
+        self.name = f"file:{path}"
+        self.path = path
+
+    @contextmanager
+    def open(self):
+        try:
+            f = open(self.path)
+        except OSError:
+            yield io.StringIO("")
+            return
+        with f:
+            yield f
+
+    def change_token(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+BACKENDS = {
+    'pbpaste': lambda arg: CommandBackend('pbpaste', ['pbpaste']),
+    'xclip': lambda arg: CommandBackend('xclip', ['xclip', '-selection', 'clipboard', '-o']),
+    'wl-paste': lambda arg: CommandBackend('wl-paste', ['wl-paste', '--no-newline']),
+    'file': lambda arg: FileBackend(arg),
+}
+
+def backend():
+    """The clipboard backend selected by NOTION_CLIPBOARD"""
+    name, _, arg = (os.environ.get('NOTION_CLIPBOARD') or 'pbpaste').partition(':')
+    if name not in BACKENDS:
+        raise Exception(f"Unknown clipboard backend: {name}")
+    return BACKENDS[name](arg)
+
+def clipboard_stream():
+    """Open the clipboard as a text stream without loading it all at once"""
+    return backend().open()
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def snapshot():
+    """Hash, preview text and emptiness of the clipboard from a bounded read
+
+    The last snapshot is remembered, so an unchanged clipboard is not read
+    again by backends that report changes.
+    """
+    source = backend()
+    token = source.change_token()
+    meta_path = cache_path('clipboard_snapshot.json')
+    try:
+        with open(meta_path) as f:
+            cached = json.load(f)
+        if token is not None and cached['backend'] == source.name and cached['token'] == token:
+            return cached
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with source.open() as stream:
+        text = stream.read(PREVIEW_CHARS + 1)
+    complete = len(text) <= PREVIEW_CHARS
+    text = text[:PREVIEW_CHARS]
+    digest = text_hash(text)
+    # Earlier versions kept whole clipboards here
+    legacy = cache_path('clipboard')
+    if os.path.isdir(legacy):
+        shutil.rmtree(legacy, ignore_errors=True)
+
+    meta = {
+        'backend': source.name,
+        'token': token,
+        'hash': digest,
+        'complete': complete,
+        'empty': not text.strip(),
+        'preview': text[:PREVIEW_LENGTH],
+        'truncated': not complete or len(text) > PREVIEW_LENGTH
+    }
+    # The preview is clipboard text too, so keep it private
+    fd = os.open(meta_path + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+    return meta
+
+def handle(meta):
+    """What a Script Filter item passes on instead of the clipboard text"""
+    return f"{HANDLE_PREFIX}{meta['hash']}"
+
+def is_handle(arg):
+    digest = arg[len(HANDLE_PREFIX):] if arg.startswith(HANDLE_PREFIX) else ''
+    return len(digest) == 40 and all(c in '0123456789abcdef' for c in digest)
+
+class PrefixedStream:
+    """A prefix that was already read, followed by the rest of the stream"""
+
+    def __init__(self, prefix, stream):
+        self.head = io.StringIO(prefix)
+        self.stream = stream
+
+    def readline(self, size=-1):
+        line = self.head.readline(size)
+        if line.endswith('\n') or (size >= 0 and len(line) >= size):
+            return line
+        # The prefix ended mid-line; finish the line from the stream
+        return line + self.stream.readline(size - len(line) if size >= 0 else -1)
+
+    def read(self, size=-1):
+        text = self.head.read(size)
+        if size < 0:
+            return text + self.stream.read()
+        return text + self.stream.read(size - len(text)) if len(text) < size else text
+
+@contextmanager
+def open_snapshot(arg):
+    """Stream the clipboard content a preview handed out, reading it once
+
+    Raises if the clipboard no longer matches the preview.
+    """
+    digest = arg[len(HANDLE_PREFIX):]
+    with clipboard_stream() as stream:
+        prefix = stream.read(PREVIEW_CHARS)
+        if text_hash(prefix) != digest:
+            raise Exception("Clipboard changed since the preview; open the dump again")
+        yield PrefixedStream(prefix, stream)
@@ -2,42 +2,55 @@
 
 import sys
 import os
-import subprocess
 from datetime import datetime
+from itertools import chain
 sys.path.insert(0, os.path.dirname(__file__))
-from notion_helper import NotionHelper
-
-def get_clipboard():
-    """Get text from clipboard"""
-    try:
-        result = subprocess.run(['pbpaste'], capture_output=True, text=True)
-        return result.stdout
-    except:
-        return ""
+from notion_helper import paragraph_block
+from chunker import text_blocks
+from clipboard import clipboard_stream
+import outbox
+from tracing import invocation
 
 def main():
-    notion = NotionHelper()
-    
-    # Get clipboard content
-    clipboard_content = get_clipboard()
+    # Read from stdin with --stdin, otherwise stream the clipboard
+    if len(sys.argv) > 1 and sys.argv[1] == "--stdin":
+        dump_stream(sys.stdin)
+    else:
+        with clipboard_stream() as stream:
+            dump_stream(stream)
+
+def dump_stream(stream):
+    """Chunk a text stream into blocks and append them to the info dump page"""
+    page_id = os.environ.get('INFO_DUMP_PAGE_ID', '')
+    blocks = text_blocks(stream)
+    first_block = next(blocks, None)
     
-    if not clipboard_content.strip():
+    if first_block is None:
         print('{"items": [{"title": "No clipboard content", "subtitle": "Copy some text first", "valid": false}]}')
         return
     
-    if not notion.info_dump_page_id:
+    if not page_id:
         print('{"items": [{"title": "Configuration needed", "subtitle": "Set INFO_DUMP_PAGE_ID in workflow settings", "valid": false}]}')
         return
     
     # Prepare content with timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    content = f"[{timestamp}]\n{clipboard_content}"
+    blocks = chain([paragraph_block(f"[{timestamp}]"), first_block], blocks)
+    
+    if outbox.enabled():
+        # Commit locally and let the background flusher talk to Notion
+        outbox.submit_blocks(page_id, blocks)
+        print('{"items": [{"title": "✅ Queued for Notion", "subtitle": "Clipboard content saved and will sync in the background", "valid": false}]}')
+        return
+    
+    from notion_helper import NotionHelper
+    notion = NotionHelper()
     
     try:
-        # Append to info dump page
-        result = notion.append_to_page(notion.info_dump_page_id, content)
+        # Append to info dump page in size-bounded batches
+        result = notion.append_blocks(page_id, blocks)
         
-        if 'id' in result:
+        if result.get('object') != 'error':
             print('{"items": [{"title": "✅ Dumped to Notion", "subtitle": "Clipboard content added successfully", "valid": false}]}')
         else:
             print('{"items": [{"title": "❌ Failed to dump", "subtitle": "Check your configuration", "valid": false}]}')
@@ -45,5 +58,12 @@ def main():
     except Exception as e:
         print(f'{{"items": [{{"title": "❌ Error", "subtitle": "{str(e)}", "valid": false}}]}}')
 
+def run():
+    with invocation("clipboard_dump", "--stdin" if sys.argv[1:2] == ["--stdin"] else "clipboard"):
+        main()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from notion_worker import forward_to_worker
+    # stdin cannot be forwarded to the worker, so --stdin always runs in-process
+    if "--stdin" in sys.argv or not forward_to_worker("clipboard_dump"):
+        run()
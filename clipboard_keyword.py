@@ -1,75 +1,99 @@
 #!/usr/bin/env python3
 
+import io
 import sys
 import os
-import subprocess
+import json
 from datetime import datetime
+from itertools import chain
 sys.path.insert(0, os.path.dirname(__file__))
-from notion_helper import NotionHelper
-
-def get_clipboard():
-    """Get text from clipboard"""
-    try:
-        result = subprocess.run(['pbpaste'], capture_output=True, text=True)
-        return result.stdout
-    except:
-        return ""
+from tracing import invocation, span
 
 def main():
     query = sys.argv[1] if len(sys.argv) > 1 else ""
-    notion = NotionHelper()
     
-    if not notion.info_dump_page_id:
+    # Preview only: read config directly instead of building a NotionHelper
+    if not os.environ.get('INFO_DUMP_PAGE_ID'):
         print('{"items": [{"title": "Configuration needed", "subtitle": "Set INFO_DUMP_PAGE_ID in workflow settings", "valid": false}]}')
         return
     
-    # Use typed text if provided, otherwise use clipboard
+    # Use typed text if provided, otherwise a bounded snapshot of the clipboard
     if query.strip():
         content = query.strip()
+        preview = content[:100] + "..." if len(content) > 100 else content
         source = "typed text"
+        arg = content
     else:
-        content = get_clipboard()
+        import clipboard
+        with span("clipboard_read"):
+            snapshot = clipboard.snapshot()
+        if snapshot['empty']:
+            print('{"items": [{"title": "No content to dump", "subtitle": "Type something or copy text to clipboard first", "valid": false}]}')
+            return
+        preview = snapshot['preview'] + ("..." if snapshot['truncated'] else "")
         source = "clipboard"
+        # The dump reads the clipboard itself, so only the snapshot handle travels through Alfred
+        arg = clipboard.handle(snapshot)
     
-    if not content.strip():
-        print('{"items": [{"title": "No content to dump", "subtitle": "Type something or copy text to clipboard first", "valid": false}]}')
-        return
-    
-    # Show preview of what will be dumped
-    preview = content[:100] + "..." if len(content) > 100 else content
-    # Escape quotes in preview
-    preview = preview.replace('"', '\\"').replace('\n', ' ')
-    print(f'{{"items": [{{"title": "📝 Dump {source} to Notion", "subtitle": "Preview: {preview}", "arg": "{content}", "valid": true}}]}}')
+    # Show preview of what will be dumped; json.dumps escapes quotes, newlines and backslashes
+    preview = preview.replace('\n', ' ')
+    item = {"title": f"📝 Dump {source} to Notion", "subtitle": f"Preview: {preview}", "arg": arg, "valid": True}
+    print(json.dumps({"items": [item]}, ensure_ascii=False))
 
 def dump_content():
     """Actually dump the content"""
-    # Debug: print all arguments to see what we're getting
-    print(f"DEBUG: sys.argv = {sys.argv}", file=sys.stderr)
-    
     # The content should be in sys.argv[2] after --dump
     content_to_dump = sys.argv[2] if len(sys.argv) > 2 else ""
-    notion = NotionHelper()
     
-    print(f"DEBUG: content_to_dump = '{content_to_dump}'", file=sys.stderr)
-    
-    # If no argument passed, try to get from clipboard
-    if not content_to_dump.strip():
-        content_to_dump = get_clipboard()
-        print(f"DEBUG: using clipboard = '{content_to_dump}'", file=sys.stderr)
+    from clipboard import is_handle
+    if is_handle(content_to_dump):
+        # The clipboard as previewed: read once, if it still matches the preview
+        from clipboard import open_snapshot
+        try:
+            with open_snapshot(content_to_dump) as stream:
+                dump_stream(stream)
+        except Exception as e:
+            print(f"❌ {str(e)}")
+    # If no argument passed, stream the clipboard instead of loading it at once
+    elif not content_to_dump.strip():
+        from clipboard import clipboard_stream
+        with clipboard_stream() as stream:
+            dump_stream(stream)
+    else:
+        dump_stream(io.StringIO(content_to_dump))
+
+def dump_stream(stream):
+    """Chunk a text stream into blocks and append them to the info dump page"""
+    from notion_helper import paragraph_block
+    from chunker import text_blocks
+
+    blocks = text_blocks(stream)
+    first_block = next(blocks, None)
     
-    if not content_to_dump.strip():
+    if first_block is None:
         print("❌ No content to dump")
         return
     
     # Prepare content with timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    content = f"[{timestamp}]\n{content_to_dump}"
+    blocks = chain([paragraph_block(f"[{timestamp}]"), first_block], blocks)
+    page_id = os.environ.get('INFO_DUMP_PAGE_ID', '')
+    
+    import outbox
+    if outbox.enabled():
+        # Commit locally and let the background flusher talk to Notion
+        outbox.submit_blocks(page_id, blocks)
+        print("✅ Content queued for Notion")
+        return
+    
+    from notion_helper import NotionHelper
+    notion = NotionHelper()
     
     try:
-        # Append to info dump page
-        result = notion.append_to_page(notion.info_dump_page_id, content)
+        # Append to info dump page in size-bounded batches
+        result = notion.append_blocks(page_id, blocks)
         
-        if 'id' in result:
+        if result.get('object') != 'error':
             print("✅ Content dumped to Notion successfully")
         else:
             print(f"❌ Failed to dump: {result}")
@@ -77,8 +101,14 @@ def dump_content():
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
+def run():
+    with invocation("clipboard_keyword", "--dump" if sys.argv[1:2] == ["--dump"] else "preview"):
+        if len(sys.argv) > 1 and sys.argv[1] == "--dump":
+            dump_content()
+        else:
+            main()
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--dump":
-        dump_content()
-    else:
-        main()
\ No newline at end of file
+    from notion_worker import forward_to_worker
+    if not forward_to_worker("clipboard_keyword"):
+        run()
\ No newline at end of file
@@ -3,11 +3,280 @@
 import os
 import sys
 import json
-import requests
+import time
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from request_scheduler import INTERACTIVE, scheduler_for, retry_after_delay, retry_safe
+
+DEFAULT_BASE_URL = "https://api.notion.com/v1"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+# Notion accepts at most this many children in one append or page create
+MAX_CHILDREN_PER_REQUEST = 100
+# Notion rejects request bodies over 500KB; leave headroom for the envelope
+MAX_REQUEST_BYTES = 450000
+# Notion accepts at most this many blocks in one request, nested ones included
+MAX_BLOCKS_PER_REQUEST = 1000
+# Notion limits on a single rich_text object and on rich_text objects per block
+MAX_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+# sync_stats counter for each planned meeting sync action
+SYNC_STAT_KEYS = {'create': 'created', 'update': 'updated', 'skip': 'skipped'}
+# Notion compound filters accept at most this many conditions
+MAX_FILTER_CONDITIONS = 100
+# Set by the warm worker, which outlives each invocation and can refresh stale
+# cache entries on a thread; one-shot processes hand them to a detached process
+REFRESH_IN_PROCESS = False
+
+def page_url(page_id):
+    """Get the Notion URL for a page without building a helper"""
+    # Remove any dashes and ensure proper format
+    clean_id = page_id.replace('-', '')
+    return f"https://www.notion.so/{clean_id}"
+
+def paragraph_block(content):
+    """Build a paragraph block holding plain text"""
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [{"type": "text", "text": {"content": content}}]
+        }
+    }
+
+def block_count(block):
+    """Number of blocks in a block and any children nested inside it"""
+    children = block.get(block.get('type'), {}).get('children', [])
+    return 1 + sum(block_count(child) for child in children)
+
+def batch_children(blocks):
+    """Group blocks into lists that fit one request's child count, block count and payload size"""
+    batch, batch_bytes, batch_blocks = [], 0, 0
+    for block in blocks:
+        block_bytes = len(json.dumps(block))
+        nested = block_count(block)
+        if batch and (len(batch) >= MAX_CHILDREN_PER_REQUEST
+                      or batch_bytes + block_bytes > MAX_REQUEST_BYTES
+                      or batch_blocks + nested > MAX_BLOCKS_PER_REQUEST):
+            yield batch
+            batch, batch_bytes, batch_blocks = [], 0, 0
+        batch.append(block)
+        batch_bytes += block_bytes
+        batch_blocks += nested
+    if batch:
+        yield batch
+
+def meeting_properties(calendar_event):
+    """Notion properties for a meeting entry built from a calendar event"""
+    if calendar_event.get('deleted'):
+        # Deleted events arrive as just an id and status; only mark them cancelled
+        return {"Status": {"select": {"name": calendar_event['status']}}}
+
+    properties = {
+        "Name": {
+            "title": [{"text": {"content": calendar_event['title']}}]
+        },
+        "Date": {
+            "date": {"start": calendar_event['date'].isoformat()}
+        },
+        "Status": {
+            "select": {"name": calendar_event['status']}
+        },
+        "Google Event ID": {
+            "rich_text": [{"text": {"content": calendar_event['google_event_id']}}]
+        }
+    }
+    
+    # Add optional properties if they exist
+    if calendar_event.get('description'):
+        properties["Description"] = {
+            "rich_text": [{"text": {"content": calendar_event['description'][:MAX_TEXT_LENGTH]}}]  # Notion limit
+        }
+    
+    if calendar_event.get('location'):
+        properties["Location"] = {
+            "rich_text": [{"text": {"content": calendar_event['location']}}]
+        }
+    return properties
+
+def property_value(prop):
+    """Comparable plain value of a property, in read (page) or write (request) form"""
+    for kind in ('title', 'rich_text'):
+        if kind in prop:
+            return ''.join(
+                part.get('plain_text', part.get('text', {}).get('content', ''))
+                for part in prop[kind] or []
+            )
+    if 'select' in prop:
+        return (prop['select'] or {}).get('name')
+    if 'date' in prop:
+        return (prop['date'] or {}).get('start')
+    if 'checkbox' in prop:
+        return prop['checkbox']
+    if 'relation' in prop:
+        return sorted(item['id'] for item in prop['relation'] or [])
+    return json.dumps(prop, sort_keys=True)
+
+def changed_properties(page, properties):
+    """The subset of properties whose values differ from the page's current ones"""
+    current = page.get('properties', {})
+    return {
+        name: prop for name, prop in properties.items()
+        if name not in current or property_value(current[name]) != property_value(prop)
+    }
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of samples (0.0 when there are none)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+# Meeting sync logic shared by NotionHelper and AsyncNotionHelper; the helpers
+# only add the requests
+
+def google_id_filter(google_ids):
+    """Meetings database filter matching any of the Google event ids"""
+    conditions = [{"property": "Google Event ID", "rich_text": {"equals": google_id}} for google_id in google_ids]
+    return conditions[0] if len(conditions) == 1 else {"or": conditions}
+
+def first_result(result):
+    """First row of a query response, raising on an API error"""
+    if result.get('object') == 'error':
+        raise Exception(f"Notion API error ({result.get('status')}): {result.get('message', result)}")
+    return next(iter(result.get('results', [])), None)
+
+def meeting_window_filter(calendar_events):
+    """Filter for the date window the events span, or None if none has a date"""
+    dates = [event['date'] for event in calendar_events if event.get('date')]
+    if not dates:
+        return None
+    return {
+        "and": [
+            {"property": "Date", "date": {"on_or_after": min(dates).isoformat()}},
+            {"property": "Date", "date": {"on_or_before": max(dates).isoformat()}}
+        ]
+    }
+
+def missing_meeting_filters(wanted, index):
+    """OR filters of up to MAX_FILTER_CONDITIONS ids for the wanted events not yet indexed"""
+    missing = sorted(wanted - set(index))
+    return [google_id_filter(missing[start:start + MAX_FILTER_CONDITIONS]) for start in range(0, len(missing), MAX_FILTER_CONDITIONS)]
+
+def index_meetings(index, wanted, meetings):
+    """Add the meetings of wanted events to a google_event_id -> page index"""
+    for meeting in meetings:
+        google_id = property_value(meeting.get('properties', {}).get('Google Event ID', {}))
+        if google_id in wanted:
+            index.setdefault(google_id, meeting)
+
+def meeting_entry_action(calendar_event, existing_meeting):
+    """What create_or_update_meeting_entry does for an event: (action, properties to send)"""
+    properties = meeting_properties(calendar_event)
+    if not existing_meeting:
+        return 'created', properties
+    changed = changed_properties(existing_meeting, properties)
+    # Nothing to write when Notion already matches the calendar
+    return ('updated' if changed else 'skipped'), properties
+
+def plan_known_meetings(calendar_events, state=None):
+    """Plan the events the sync state already knows; returns (plan, unknown)
+
+    Known events are compared against their stored property hashes without
+    touching the API. unknown holds (event, properties) for the rest, which
+    must be matched against the meetings database.
+    """
+    # Keep the last occurrence of each event
+    events = list({event['google_event_id']: event for event in calendar_events}.values())
+    plan = []
+    unknown = []
+    for event in events:
+        properties = meeting_properties(event)
+        record = state.get(event['google_event_id']) if state else None
+        if record:
+            changed = state.changed(record, properties)
+            plan.append(('update' if changed else 'skip', event, record['page_id'], changed))
+        else:
+            unknown.append((event, properties))
+    return plan, unknown
+
+def plan_unknown_meetings(unknown, existing):
+    """Plan events the sync state does not know, given the meetings found for them"""
+    plan = []
+    for event, properties in unknown:
+        meeting = existing.get(event['google_event_id'])
+        if meeting:
+            changed = changed_properties(meeting, properties)
+            plan.append(('update' if changed else 'skip', event, meeting['id'], changed))
+        elif event.get('deleted'):
+            # Never synced, so there is nothing to mark cancelled
+            plan.append(('skip', event, None, {}))
+        else:
+            plan.append(('create', event, None, properties))
+    return plan
+
+def meeting_page_body(database_id, properties):
+    return {
+        "parent": {"database_id": database_id},
+        "properties": properties
+    }
+
+def record_meeting_sync_result(result, event, page_id, state=None):
+    """Raise on a failed meeting write, otherwise record it in the sync state"""
+    if result.get('object') == 'error':
+        if state and result.get('status') == 404:
+            # The page is gone; let the next sync look the event up again
+            state.forget(event['google_event_id'])
+        raise Exception(result.get('message', result))
+    if state and page_id:
+        state.record(event['google_event_id'], page_id, meeting_properties(event))
+    return page_id
+
+def new_sync_stats():
+    return {
+        'created': 0,
+        'updated': 0,
+        'skipped': 0,
+        'errors': [],
+        'api_calls': 0
+    }
+
+def dry_run_plan(sync_stats, plan):
+    """Report the planned actions in sync_stats; returns the (empty) plan left to apply"""
+    sync_stats['dry_run'] = True
+    sync_stats['planned'] = {action: sum(1 for item in plan if item[0] == action) for action in ('create', 'update', 'skip')}
+    return []
+
+def sync_item_error(event, error):
+    return f"Failed to sync event '{event.get('title', event['google_event_id'])}': {str(error)}"
+
+def finish_sync_stats(sync_stats, outcomes, api_calls, started, latencies, concurrency, transport):
+    """Tally (action, error) outcomes and add the call count and timing to sync_stats"""
+    for action, error in outcomes:
+        if error:
+            sync_stats['errors'].append(error)
+        else:
+            sync_stats[SYNC_STAT_KEYS[action]] += 1
+    sync_stats['api_calls'] = api_calls
+    wall_time = time.monotonic() - started
+    sync_stats['timing'] = {
+        'wall_time': round(wall_time, 3),
+        'concurrency': concurrency,
+        'transport': transport,
+        'p50_latency': round(percentile(latencies, 0.50), 3),
+        'p95_latency': round(percentile(latencies, 0.95), 3),
+        'requests_per_second': round(api_calls / wall_time, 2) if wall_time else 0.0
+    }
+    return sync_stats
+
+# Sessions are shared per (base URL, pool size, token) so a long-lived process
+# such as notion_worker.py keeps its connections warm across helper instances
+_session_cache = {}
 
 class NotionHelper:
-    def __init__(self):
+    def __init__(self, base_url=None, pool_size=None, timeout=None, priority=None, max_retries=None, cache=None):
         # Get token from Alfred workflow environment variables
         self.token = os.environ.get('NOTION_TOKEN', '')
         self.headers = {
@@ -15,6 +284,36 @@ class NotionHelper:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+
+        # Transport settings (NOTION_API_BASE_URL lets a local stand-in server be used)
+        self.base_url = (base_url or os.environ.get('NOTION_API_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.pool_size = int(pool_size or os.environ.get('NOTION_POOL_SIZE') or DEFAULT_POOL_SIZE)
+        self.timeout = float(timeout or os.environ.get('NOTION_TIMEOUT') or DEFAULT_TIMEOUT)
+        self.request_count = 0
+        self.count_lock = threading.Lock()
+        self.session = self._get_session()
+
+        # Requests for the same token share one rate limiter; background work
+        # (outbox flushes, index refreshes, syncs) yields to interactive actions
+        self.priority = priority or os.environ.get('NOTION_PRIORITY') or INTERACTIVE
+        self.max_retries = int(max_retries if max_retries is not None else os.environ.get('NOTION_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+        self.scheduler = scheduler_for(self.token)
+
+        # Shared on-disk cache of read responses. Every helper's writes invalidate
+        # it, but only interactive helpers read from it by default; background
+        # jobs (syncs, flushes, crawls) want fresh data unless cache=True
+        self.cache = None
+        if os.environ.get('NOTION_RESPONSE_CACHE', '1') != '0':
+            from response_cache import cache_for
+            self.cache = cache_for()
+        self.cache_reads = cache if cache is not None else self.priority == INTERACTIVE
+        self.revalidating = set()
+
+        # Opt-in span per API call (NOTION_TRACE=1); see tracing.py
+        self.tracer = None
+        if os.environ.get('NOTION_TRACE', '0') not in ('', '0'):
+            import tracing
+            self.tracer = tracing
         
         # Page/Database IDs (to be configured)
         self.info_dump_page_id = os.environ.get('INFO_DUMP_PAGE_ID', '')
@@ -24,58 +323,256 @@ class NotionHelper:
         self.meetings_database_id = os.environ.get('MEETINGS_DATABASE_ID', '')
         self.meeting_template_page_id = os.environ.get('MEETING_TEMPLATE_PAGE_ID', '')
 
+    def _session_key(self):
+        return (self.base_url, self.pool_size, self.token)
+
+    def _get_session(self):
+        """Return the process-wide keep-alive session for this configuration"""
+        key = self._session_key()
+        if key not in _session_cache:
+            _session_cache[key] = self._build_session()
+        return _session_cache[key]
+
+    def _build_session(self):
+        """Create a keep-alive session whose connection pool is shared by every call"""
+        # Imported here so Script Filter previews can import this module cheaply
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method, path, json_body=None, params=None, timeout=None):
+        """Send a request to the Notion API through the pooled session and rate limiter
+
+        429 and 5xx responses are retried up to max_retries times, honoring
+        Retry-After and otherwise backing off exponentially with jitter.
+        """
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        started = time.perf_counter()
+        queue_wait = 0.0
+        while True:
+            queue_wait += self.scheduler.acquire(self.priority)
+            with self.count_lock:
+                self.request_count += 1
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    json=json_body,
+                    params=params,
+                    timeout=timeout or self.timeout
+                )
+            except Exception as e:
+                if self.tracer:
+                    self._trace(method, path, None, json_body, 0, queue_wait, attempt, started, f"{type(e).__name__}: {e}")
+                raise
+
+            retryable = response.status_code == 429 or (response.status_code >= 500 and retry_safe(method, path))
+            if not retryable or attempt >= self.max_retries:
+                result = response.json()
+                if self.tracer:
+                    error = result.get('code') if result.get('object') == 'error' else None
+                    self._trace(method, path, response.status_code, json_body, len(response.content), queue_wait, attempt, started, error)
+                if self.cache and method != "GET" and result.get('object') != 'error':
+                    from response_cache import best_effort, write_tags
+                    best_effort(self.cache.invalidate, write_tags(method, path, json_body))
+                return result
+
+            delay = retry_after_delay(response.headers, attempt)
+            self.scheduler.record_retry()
+            if response.status_code == 429:
+                # Rate limits apply to the whole token, so hold every caller
+                self.scheduler.throttled(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def _trace(self, method, path, status, json_body, bytes_in, queue_wait, retries, started, error=None):
+        bytes_out = len(json.dumps(json_body)) if json_body is not None else 0
+        self.tracer.api_span(method, path, status, bytes_out, bytes_in, queue_wait, retries, time.perf_counter() - started, error)
+
+    def _cached_request(self, kind, method, path, json_body=None, tags=()):
+        """Read through the response cache; stale entries are served while a refresh runs"""
+        if not (self.cache and self.cache_reads):
+            return self._request(method, path, json_body)
+
+        from response_cache import STALE, request_key
+        key = request_key(self.token, method, f"{self.base_url}{path}", json_body)
+        result, state = self.cache.get(key)
+        if state == STALE:
+            self._revalidate(key, kind, method, path, json_body, tags)
+        if result is not None:
+            return result
+        return self._fetch_into_cache(key, kind, method, path, json_body, tags)
+
+    def _fetch_into_cache(self, key, kind, method, path, json_body, tags):
+        from response_cache import best_effort, result_tags
+        result = self._request(method, path, json_body)
+        if result.get('object') != 'error':
+            best_effort(self.cache.put, key, kind, result, list(tags) + result_tags(result))
+        return result
+
+    def _revalidate(self, key, kind, method, path, json_body, tags):
+        """Refresh a stale entry in the background, once per key at a time
+
+        A thread would die with a one-shot entry point before the refresh
+        lands, so outside the warm worker it runs in a detached process.
+        The cache's refresh claim keeps other processes from starting another.
+        """
+        with self.count_lock:
+            if key in self.revalidating:
+                return
+            self.revalidating.add(key)
+        if not self.cache.claim_refresh(key):
+            with self.count_lock:
+                self.revalidating.discard(key)
+            return
+
+        if not REFRESH_IN_PROCESS:
+            start_detached_refresh({
+                'base_url': self.base_url, 'key': key, 'kind': kind, 'method': method,
+                'path': path, 'json_body': json_body, 'tags': list(tags)
+            })
+            return
+
+        def refresh():
+            try:
+                self._fetch_into_cache(key, kind, method, path, json_body, tags)
+            except Exception:
+                pass  # the stale entry simply expires
+            finally:
+                with self.count_lock:
+                    self.revalidating.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def cache_stats(self):
+        """Hit/miss/byte counters of the response cache"""
+        return self.cache.stats() if self.cache else {}
+
+    def connection_stats(self):
+        """Report how many requests reused an already-open connection"""
+        stats = {'requests': 0, 'connections': 0, 'reused': 0, 'helper_requests': self.request_count}
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats['requests'] += pool.num_requests
+                stats['connections'] += pool.num_connections
+        stats['reused'] = max(stats['requests'] - stats['connections'], 0)
+        return stats
+
+    def scheduler_stats(self):
+        """Queue depth, wait time, throttle and retry metrics for this token"""
+        return self.scheduler.metrics()
+
+    def close(self):
+        """Close pooled connections"""
+        _session_cache.pop(self._session_key(), None)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run_async(self, work):
+        """Await work(async_helper) on a fresh event loop with an AsyncNotionHelper sharing these settings"""
+        import asyncio
+        from async_notion_helper import AsyncNotionHelper
+
+        async def run():
+            async with AsyncNotionHelper(self.base_url, self.pool_size, self.timeout, self.priority, self.max_retries, self.cache_reads) as notion:
+                try:
+                    return await work(notion)
+                finally:
+                    with self.count_lock:
+                        self.request_count += notion.request_count
+
+        return asyncio.run(run())
+
+    def run_concurrently(self, calls, concurrency=None):
+        """Run independent calls such as [('get_page', page_id), ...] at once; results come back in order
+
+        With aiohttp installed the calls are gathered on AsyncNotionHelper's
+        event loop, otherwise they run on a thread pool. A call that raises
+        returns its exception in place of a result.
+        """
+        from async_notion_helper import available
+        concurrency = int(concurrency or self.pool_size)
+        if available():
+            import asyncio
+
+            async def gather(notion):
+                limit = asyncio.Semaphore(concurrency)
+
+                async def call(name, *args):
+                    async with limit:
+                        return await getattr(notion, name)(*args)
+
+                return await asyncio.gather(*(call(*item) for item in calls), return_exceptions=True)
+
+            return self._run_async(gather)
+
+        def call(item):
+            try:
+                return getattr(self, item[0])(*item[1:])
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, self.pool_size)) as executor:
+            return list(executor.map(call, calls))
+
     def create_page(self, parent_id, title, content=""):
         """Create a new page under a parent page"""
-        url = "https://api.notion.com/v1/pages"
-        
-        data = {
-            "parent": {"page_id": parent_id},
-            "properties": {
-                "title": {
-                    "title": [{"text": {"content": title}}]
-                }
+        properties = {
+            "title": {
+                "title": [{"text": {"content": title}}]
             }
         }
-        
-        if content:
-            data["children"] = [
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": content}}]
-                    }
-                }
-            ]
-        
-        response = requests.post(url, headers=self.headers, json=data)
-        return response.json()
+        return self.create_page_with_children({"page_id": parent_id}, properties, [paragraph_block(content)] if content else None)
+
+    def create_page_with_children(self, parent, properties, children=None):
+        """Create a page from raw properties and at most one request's worth of blocks
+
+        parent is {"page_id": ...} or {"database_id": ...}; append further
+        content with append_blocks.
+        """
+        data = {"parent": parent, "properties": properties}
+        if children:
+            data["children"] = children
+        return self._request("POST", "/pages", data)
 
     def append_to_page(self, page_id, content):
         """Append content to an existing page"""
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        
-        data = {
-            "children": [
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": content}}]
-                    }
-                }
-            ]
-        }
-        
-        response = requests.patch(url, headers=self.headers, json=data)
-        return response.json()
+        return self.append_blocks(page_id, [paragraph_block(content)])
+
+    def append_blocks(self, page_id, blocks):
+        """Append any number of blocks (list or iterator) to a page in size-bounded requests"""
+        appended = []
+        for batch in batch_children(blocks):
+            data = {"children": batch}
+            result = self._request("PATCH", f"/blocks/{page_id}/children", data)
+            if result.get('object') == 'error':
+                # Earlier chunks are already on the page; report how far we got
+                result['appended'] = len(appended)
+                return result
+            appended.extend(result.get('results', []))
+        return {"object": "list", "results": appended}
 
-    def create_task(self, title, description=""):
+    def create_task(self, title, description="", database_id=None):
         """Create a task in the task database"""
-        url = "https://api.notion.com/v1/pages"
-        
         data = {
-            "parent": {"database_id": self.task_database_id},
+            "parent": {"database_id": database_id or self.task_database_id},
             "properties": {
                 "Task": {
                     "title": [{"text": {"content": title}}]
@@ -84,23 +581,12 @@ class NotionHelper:
         }
         
         if description:
-            data["children"] = [
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": description}}]
-                    }
-                }
-            ]
+            data["children"] = [paragraph_block(description)]
         
-        response = requests.post(url, headers=self.headers, json=data)
-        return response.json()
+        return self._request("POST", "/pages", data)
 
-    def search_pages(self, query):
+    def search_pages(self, query, start_cursor=None, page_size=None):
         """Search for pages matching query"""
-        url = "https://api.notion.com/v1/search"
-        
         data = {
             "query": query,
             "filter": {
@@ -112,138 +598,259 @@ class NotionHelper:
                 "timestamp": "last_edited_time"
             }
         }
+        if start_cursor:
+            data["start_cursor"] = start_cursor
+        if page_size:
+            data["page_size"] = page_size
         
-        response = requests.post(url, headers=self.headers, json=data)
-        return response.json()
+        return self._cached_request('search', "POST", "/search", data)
 
     def get_page_url(self, page_id):
         """Get the Notion URL for a page"""
-        # Remove any dashes and ensure proper format
-        clean_id = page_id.replace('-', '')
-        return f"https://www.notion.so/{clean_id}"
+        return page_url(page_id)
 
-    def query_database(self, database_id, filter_obj=None, sorts=None):
+    def query_database(self, database_id, filter_obj=None, sorts=None, start_cursor=None, page_size=None):
         """Query database with optional filters and sorts"""
-        url = f"https://api.notion.com/v1/databases/{database_id}/query"
-        
         data = {}
         if filter_obj:
             data["filter"] = filter_obj
         if sorts:
             data["sorts"] = sorts
+        if start_cursor:
+            data["start_cursor"] = start_cursor
+        if page_size:
+            data["page_size"] = page_size
             
-        response = requests.post(url, headers=self.headers, json=data)
-        return response.json()
+        return self._cached_request('database_query', "POST", f"/databases/{database_id}/query", data, tags=[f"db:{database_id}"])
+
+    def get_page(self, page_id, fresh=False):
+        """Get a page object (properties, parent, last_edited_time)
+
+        fresh=True skips the response cache, for checks that must see the latest edit.
+        """
+        if fresh:
+            return self._request("GET", f"/pages/{page_id}")
+        return self._cached_request('page', "GET", f"/pages/{page_id}")
+
+    def get_database(self, database_id):
+        """Get a database object, including its property schema"""
+        return self._request("GET", f"/databases/{database_id}")
+
+    def archive_page(self, page_id):
+        """Move a page to the trash"""
+        return self._request("PATCH", f"/pages/{page_id}", {"archived": True})
+
+    def get_block_children(self, block_id, start_cursor=None, page_size=None):
+        """Get one page of a block's children"""
+        params = {}
+        if start_cursor:
+            params["start_cursor"] = start_cursor
+        if page_size:
+            params["page_size"] = page_size
+        return self._request("GET", f"/blocks/{block_id}/children", params=params or None)
+
+    def _paginate(self, fetch, prefetch=False):
+        """Yield results from every page of a cursor-paginated endpoint
+
+        fetch(cursor) returns one page of results. With prefetch, the next page
+        is requested in the background while the caller consumes the current one.
+        """
+        def checked(cursor):
+            result = fetch(cursor)
+            if result.get('object') == 'error':
+                raise Exception(f"Notion API error ({result.get('status')}): {result.get('message', result)}")
+            return result
+
+        if not prefetch:
+            cursor = None
+            while True:
+                result = checked(cursor)
+                yield from result.get('results', [])
+                if not result.get('has_more'):
+                    return
+                cursor = result.get('next_cursor')
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(checked, None)
+            while pending is not None:
+                result = pending.result()
+                pending = None
+                if result.get('has_more'):
+                    pending = executor.submit(checked, result.get('next_cursor'))
+                yield from result.get('results', [])
+
+    def iter_database(self, database_id, filter_obj=None, sorts=None, page_size=None, prefetch=False):
+        """Iterate over every row of a database query"""
+        return self._paginate(
+            lambda cursor: self.query_database(database_id, filter_obj, sorts, start_cursor=cursor, page_size=page_size),
+            prefetch
+        )
+
+    def iter_search(self, query, page_size=None, prefetch=False):
+        """Iterate over every page matching a search"""
+        return self._paginate(
+            lambda cursor: self.search_pages(query, start_cursor=cursor, page_size=page_size),
+            prefetch
+        )
+
+    def iter_block_children(self, block_id, page_size=None, prefetch=False):
+        """Iterate over every child of a block"""
+        return self._paginate(
+            lambda cursor: self.get_block_children(block_id, start_cursor=cursor, page_size=page_size),
+            prefetch
+        )
 
     def update_page_properties(self, page_id, properties):
         """Update properties of an existing page"""
-        url = f"https://api.notion.com/v1/pages/{page_id}"
-        
         data = {"properties": properties}
-        response = requests.patch(url, headers=self.headers, json=data)
-        return response.json()
+        return self._request("PATCH", f"/pages/{page_id}", data)
 
     def duplicate_page(self, template_page_id, new_title, parent_id):
-        """Clone a template page with a new title under specified parent"""
-        # First, get the template page content
-        url = f"https://api.notion.com/v1/blocks/{template_page_id}/children"
-        response = requests.get(url, headers=self.headers)
-        template_blocks = response.json().get('results', [])
-        
-        # Create new page with template content
-        create_url = "https://api.notion.com/v1/pages"
-        data = {
-            "parent": {"page_id": parent_id},
-            "properties": {
-                "title": {
-                    "title": [{"text": {"content": new_title}}]
-                }
-            },
-            "children": template_blocks
-        }
-        
-        create_response = requests.post(create_url, headers=self.headers, json=data)
-        return create_response.json()
+        """Clone a template page with a new title under specified parent
 
-    def create_or_update_meeting_entry(self, calendar_event):
-        """Create or update a meeting entry in Notion database from calendar event"""
-        # First, check if meeting already exists (by Google event ID)
-        existing_meeting = self.find_meeting_by_google_id(calendar_event['google_event_id'])
-        
-        # Prepare properties for the meeting entry
-        properties = {
-            "Name": {
-                "title": [{"text": {"content": calendar_event['title']}}]
-            },
-            "Date": {
-                "date": {"start": calendar_event['date'].isoformat()}
-            },
-            "Status": {
-                "select": {"name": calendar_event['status']}
-            },
-            "Google Event ID": {
-                "rich_text": [{"text": {"content": calendar_event['google_event_id']}}]
-            }
-        }
-        
-        # Add optional properties if they exist
-        if calendar_event.get('description'):
-            properties["Description"] = {
-                "rich_text": [{"text": {"content": calendar_event['description'][:2000]}}]  # Notion limit
-            }
-        
-        if calendar_event.get('location'):
-            properties["Location"] = {
-                "rich_text": [{"text": {"content": calendar_event['location']}}]
-            }
-            
-        if existing_meeting:
-            # Update existing meeting
+        The template's full block tree is cached locally and only re-fetched
+        after the template is edited.
+        """
+        from page_template import create_from_template
+        try:
+            return create_from_template(self, template_page_id, parent_id, new_title)
+        except Exception as e:
+            return {"object": "error", "status": None, "message": f"Could not copy template: {str(e)}"}
+
+    def create_or_update_meeting_entry(self, calendar_event, existing_meeting=None, lookup=True):
+        """Create or update a meeting entry in Notion database from calendar event
+
+        Pass existing_meeting (or lookup=False when it is known not to exist)
+        to skip the per-event lookup query.
+        """
+        if existing_meeting is None and lookup:
+            existing_meeting = self.find_meeting_by_google_id(calendar_event['google_event_id'])
+
+        action, properties = meeting_entry_action(calendar_event, existing_meeting)
+        if action == 'skipped':
+            return {'action': action, 'result': existing_meeting, 'meeting_id': existing_meeting['id']}
+        if action == 'updated':
             result = self.update_page_properties(existing_meeting['id'], properties)
-            return {'action': 'updated', 'result': result, 'meeting_id': existing_meeting['id']}
-        else:
-            # Create new meeting entry
-            url = "https://api.notion.com/v1/pages"
-            data = {
-                "parent": {"database_id": self.meetings_database_id},
-                "properties": properties
-            }
-            
-            response = requests.post(url, headers=self.headers, json=data)
-            result = response.json()
-            return {'action': 'created', 'result': result, 'meeting_id': result.get('id')}
+            return {'action': action, 'result': result, 'meeting_id': existing_meeting['id']}
+        result = self._request("POST", "/pages", meeting_page_body(self.meetings_database_id, properties))
+        return {'action': action, 'result': result, 'meeting_id': result.get('id')}
 
     def find_meeting_by_google_id(self, google_event_id):
         """Find existing meeting in Notion database by Google event ID"""
-        filter_obj = {
-            "property": "Google Event ID",
-            "rich_text": {
-                "equals": google_event_id
-            }
-        }
-        
-        result = self.query_database(self.meetings_database_id, filter_obj)
-        meetings = result.get('results', [])
-        
-        return meetings[0] if meetings else None
-
-    def sync_calendar_events_to_database(self, calendar_events):
-        """Sync multiple calendar events to Notion database"""
-        sync_stats = {
-            'created': 0,
-            'updated': 0,
-            'errors': []
-        }
-        
-        for event in calendar_events:
+        return first_result(self.query_database(self.meetings_database_id, google_id_filter([google_event_id]), page_size=1))
+
+    def index_meetings_by_google_id(self, calendar_events):
+        """Map google_event_id -> meeting page for the given events with paginated bulk queries
+
+        The date window spanned by the events is pulled in one paginated query.
+        Events not found there (e.g. moved from another week) are looked up
+        together with OR filters of up to MAX_FILTER_CONDITIONS ids each.
+        """
+        index = {}
+        wanted = {event['google_event_id'] for event in calendar_events}
+        if not wanted:
+            return index
+
+        window_filter = meeting_window_filter(calendar_events)
+        if window_filter:
+            index_meetings(index, wanted, self.iter_database(self.meetings_database_id, window_filter, page_size=100, prefetch=True))
+        for id_filter in missing_meeting_filters(wanted, index):
+            index_meetings(index, wanted, self.iter_database(self.meetings_database_id, id_filter, page_size=100))
+        return index
+
+    def plan_meeting_sync(self, calendar_events, state=None):
+        """Decide locally whether each event needs a create, an update or nothing
+
+        Events already in the sync state are compared against their stored
+        property hashes without touching the API. The rest are matched against
+        one bulk index of the meetings database. Returns a list of
+        (action, event, page_id, properties) where properties holds only what
+        must be sent.
+        """
+        plan, unknown = plan_known_meetings(calendar_events, state)
+        existing = self.index_meetings_by_google_id([event for event, _ in unknown]) if unknown else {}
+        return plan + plan_unknown_meetings(unknown, existing)
+
+    def apply_meeting_sync_item(self, action, event, page_id, properties, state=None):
+        """Carry out one planned meeting write and record it in the sync state"""
+        if action == 'create':
+            result = self._request("POST", "/pages", meeting_page_body(self.meetings_database_id, properties))
+            page_id = result.get('id')
+        elif action == 'update':
+            result = self.update_page_properties(page_id, properties)
+        else:
+            result = {}
+        return record_meeting_sync_result(result, event, page_id, state)
+
+    def sync_calendar_events_to_database(self, calendar_events, dry_run=False, use_state=True, concurrency=None):
+        """Sync multiple calendar events to Notion database
+
+        Only new events and changed properties are written. With dry_run, the
+        planned create/update/skip counts are reported and nothing is written.
+        With concurrency > 1, writes run concurrently: on AsyncNotionHelper
+        when aiohttp is installed, otherwise on a bounded thread pool. The
+        shared rate limiter keeps them within Notion's limits and a failing
+        event does not affect the others.
+        """
+        concurrency = int(concurrency or os.environ.get('NOTION_SYNC_CONCURRENCY') or 1)
+        if concurrency > 1:
+            from async_notion_helper import available
+            if available():
+                return self._run_async(lambda notion: notion.sync_calendar_events_to_database(calendar_events, dry_run, use_state, concurrency))
+        started = time.monotonic()
+        sync_stats = new_sync_stats()
+        calls_before = self.request_count
+        state = None
+        if use_state:
+            from sync_state import SyncState
+            state = SyncState()
+
+        try:
+            plan = self.plan_meeting_sync(calendar_events, state)
+        except Exception as e:
+            sync_stats['errors'].append(f"Failed to load existing meetings: {str(e)}")
+            plan = []
+        if dry_run:
+            plan = dry_run_plan(sync_stats, plan)
+
+        latencies = []
+
+        def apply(item):
+            action, event, page_id, properties = item
+            op_started = time.monotonic()
             try:
-                result = self.create_or_update_meeting_entry(event)
-                if result['action'] == 'created':
-                    sync_stats['created'] += 1
-                else:
-                    sync_stats['updated'] += 1
-                    
+                self.apply_meeting_sync_item(action, event, page_id, properties, state)
+                return action, None
             except Exception as e:
-                sync_stats['errors'].append(f"Failed to sync event '{event['title']}': {str(e)}")
-        
-        return sync_stats
\ No newline at end of file
+                return action, sync_item_error(event, e)
+            finally:
+                if action != 'skip':
+                    latencies.append(time.monotonic() - op_started)
+
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(concurrency, self.pool_size)) as executor:
+                outcomes = list(executor.map(apply, plan))
+        else:
+            outcomes = [apply(item) for item in plan]
+
+        if state:
+            state.close()
+        return finish_sync_stats(sync_stats, outcomes, self.request_count - calls_before, started, latencies, concurrency, 'threads')
+
+def start_detached_refresh(request):
+    """Launch a detached process that refreshes one response cache entry"""
+    from workflow_cache import start_detached
+    start_detached(__file__, 'revalidate', input=json.dumps(request))
+
+def run_detached_refresh(request):
+    """Refresh the cache entry a one-shot process handed over; failures leave it to expire"""
+    from request_scheduler import BACKGROUND
+    notion = NotionHelper(base_url=request['base_url'], priority=BACKGROUND, cache=True)
+    if notion.cache:
+        notion._fetch_into_cache(
+            request['key'], request['kind'], request['method'], request['path'], request['json_body'], request['tags']
+        )
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['revalidate']:
+        run_detached_refresh(json.load(sys.stdin))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Optional warm worker for the Alfred entry points.
+
+Usage:
+    python3 notion_worker.py start|stop|status|serve
+
+While the worker is running, quick_task.py, clipboard_keyword.py,
+clipboard_dump.py and page_access.py forward their argv and environment to it
+over a Unix domain socket and print its output, so the interpreter, imports and
+HTTP connection pool stay warm between keystrokes. When the worker is not
+running the scripts simply run in-process.
+"""
+
+import os
+import sys
+import json
+import socket
+import tempfile
+
+# Entry points the worker is allowed to run
+ENTRY_POINTS = ('quick_task', 'clipboard_keyword', 'clipboard_dump', 'page_access')
+
+DEFAULT_IDLE_TIMEOUT = 600
+CONNECT_TIMEOUT = 0.2
+REPLY_TIMEOUT = 120
+
+def socket_path():
+    """Path of the worker's Unix domain socket"""
+    default = os.path.join(tempfile.gettempdir(), f"alfred-notion-helper-{os.getuid()}.sock")
+    return os.environ.get('NOTION_WORKER_SOCKET', default)
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode('utf-8'))
+    sock.shutdown(socket.SHUT_WR)
+
+def _receive(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+def _connect():
+    """Connect to the worker, or return None when it is not running"""
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    client.settimeout(REPLY_TIMEOUT)
+    return client
+
+def _call(message):
+    client = _connect()
+    if client is None:
+        return None
+    with client:
+        _send(client, message)
+        return _receive(client)
+
+def forward_to_worker(entry_point):
+    """Run entry_point in the worker; returns False if the caller should run in-process"""
+    if os.environ.get('NOTION_WORKER') == '0':
+        return False
+
+    client = _connect()
+    if client is None:
+        return False
+
+    request = {
+        "command": "run",
+        "entry_point": entry_point,
+        "argv": sys.argv[1:],
+        "env": dict(os.environ)
+    }
+    with client:
+        try:
+            _send(client, request)
+        except OSError:
+            # Nothing was delivered, so running locally cannot duplicate work
+            return False
+        try:
+            reply = _receive(client)
+        except (OSError, ValueError) as e:
+            # The request may already have been executed; don't run it twice
+            print(f"❌ Worker error: {str(e)}")
+            sys.exit(1)
+
+    sys.stdout.write(reply.get('stdout', ''))
+    sys.stderr.write(reply.get('stderr', ''))
+    sys.stdout.flush()
+    if reply.get('exit_code'):
+        sys.exit(reply['exit_code'])
+    return True
+
+class Worker:
+    def __init__(self, idle_timeout=None):
+        self.idle_timeout = float(idle_timeout or os.environ.get('NOTION_WORKER_IDLE_TIMEOUT') or DEFAULT_IDLE_TIMEOUT)
+        self.path = socket_path()
+        self.requests_served = 0
+        self.running = False
+
+    def serve(self):
+        """Accept requests until stopped or idle for idle_timeout seconds"""
+        import time
+
+        if os.path.exists(self.path):
+            # Remove a stale socket left behind by a crashed worker
+            os.unlink(self.path)
+
+        # Make the entry point modules importable
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        # This process stays up, so stale cache entries can refresh on threads
+        import notion_helper
+        notion_helper.REFRESH_IN_PROCESS = True
+
+        self.started_at = time.time()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen(8)
+        server.settimeout(self.idle_timeout)
+        self.running = True
+
+        try:
+            while self.running:
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    break
+                with connection:
+                    connection.settimeout(REPLY_TIMEOUT)
+                    try:
+                        request = _receive(connection)
+                        reply = self.handle(request)
+                        connection.sendall(json.dumps(reply).encode('utf-8'))
+                    except (OSError, ValueError) as e:
+                        print(f"Worker request failed: {str(e)}", file=sys.stderr)
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def handle(self, request):
+        command = request.get('command')
+        if command == 'run':
+            return self.run_entry_point(request)
+        if command == 'status':
+            import time
+            return {
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started_at, 1),
+                "requests_served": self.requests_served,
+                "idle_timeout": self.idle_timeout
+            }
+        if command == 'stop':
+            self.running = False
+            return {"stopped": True}
+        return {"error": f"Unknown command: {command}"}
+
+    def run_entry_point(self, request):
+        """Run an entry point's run() with the client's argv, environment and stdio"""
+        import io
+        import importlib
+        import traceback
+        from contextlib import redirect_stdout, redirect_stderr
+
+        entry_point = request.get('entry_point')
+        if entry_point not in ENTRY_POINTS:
+            return {"stdout": "", "stderr": f"Unknown entry point: {entry_point}\n", "exit_code": 2}
+
+        module = importlib.import_module(entry_point)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved_argv, saved_env = sys.argv, dict(os.environ)
+        exit_code = 0
+
+        sys.argv = [module.__file__] + list(request.get('argv', []))
+        os.environ.clear()
+        os.environ.update(request.get('env', {}))
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    module.run()
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            sys.argv = saved_argv
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+        self.requests_served += 1
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+def start():
+    """Launch a detached worker and wait for its socket to accept connections"""
+    import time
+    from workflow_cache import cache_path, start_detached
+
+    if _call({"command": "status"}):
+        print("Worker already running")
+        return
+
+    with open(cache_path('worker.log'), 'a') as log:
+        start_detached(__file__, 'serve', log=log)
+
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        status = _call({"command": "status"})
+        if status:
+            print(f"Worker started (pid {status['pid']})")
+            return
+        time.sleep(0.05)
+    print("❌ Worker did not start; see worker.log in the workflow cache")
+    sys.exit(1)
+
+def stop():
+    if _call({"command": "stop"}):
+        print("Worker stopped")
+    else:
+        print("Worker not running")
+
+def status():
+    info = _call({"command": "status"})
+    if not info:
+        print("Worker not running")
+        return
+    print(f"Worker running (pid {info['pid']})")
+    print(f"   Socket: {socket_path()}")
+    print(f"   Uptime: {info['uptime']}s")
+    print(f"   Requests served: {info['requests_served']}")
+    print(f"   Idle timeout: {info['idle_timeout']}s")
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if command == "start":
+        start()
+    elif command == "stop":
+        stop()
+    elif command == "serve":
+        Worker().serve()
+    elif command == "status":
+        status()
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Durable local outbox for Notion writes.
+
+Usage:
+    python3 outbox.py status|flush|replay-failed
+
+Entry points commit writes (task creations, page appends) to a local SQLite
+database and return immediately; a detached flusher process then sends them to
+Notion, retrying transient failures. Entries for the same target page or
+database are always sent in the order they were captured, so an entry that
+gave up holds back the entries queued behind it until it is replayed.
+"""
+
+import os
+import sys
+import json
+import time
+from contextlib import closing
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import open_database, start_detached, file_lock
+
+MAX_ATTEMPTS = 8
+BASE_BACKOFF = 5
+MAX_BACKOFF = 3600
+# Retries while Notion is unreachable don't count toward MAX_ATTEMPTS; they
+# back off up to this cap until the network is back
+OFFLINE_MAX_BACKOFF = 900
+# How long an idle flusher waits for entries that are backing off before exiting
+FLUSHER_LINGER = 300
+
+# Notion error statuses that retrying will not fix
+PERMANENT_ERRORS = (400, 401, 403, 404)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    offline_retries INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_status_target ON outbox (status, target, id);
+CREATE INDEX IF NOT EXISTS outbox_target ON outbox (target, id);
+"""
+
+def enabled():
+    """Writes go through the outbox unless NOTION_OUTBOX=0"""
+    return os.environ.get('NOTION_OUTBOX', '1') != '0'
+
+def connect():
+    connection = open_database('outbox.sqlite3', SCHEMA, synchronous='NORMAL')
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(outbox)")]
+    if 'offline_retries' not in columns:
+        connection.execute("ALTER TABLE outbox ADD COLUMN offline_retries INTEGER NOT NULL DEFAULT 0")
+    return connection
+
+def enqueue(kind, target, payload):
+    """Commit a write locally and return its outbox id"""
+    now = time.time()
+    with closing(connect()) as connection:
+        cursor = connection.execute(
+            "INSERT INTO outbox (kind, target, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, target, json.dumps(payload), now, now)
+        )
+        return cursor.lastrowid
+
+def enqueue_blocks(target, blocks):
+    """Commit blocks for target as request-sized append entries in one transaction"""
+    from notion_helper import batch_children
+
+    now = time.time()
+    count = 0
+    with closing(connect()) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for batch in batch_children(blocks):
+                connection.execute(
+                    "INSERT INTO outbox (kind, target, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                    ('append_blocks', target, json.dumps({'blocks': batch}), now, now)
+                )
+                count += 1
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    return count
+
+def start_flusher():
+    """Launch a detached flusher process (a no-op if one is already running)"""
+    start_detached(__file__, 'flush')
+
+def submit(kind, target, payload):
+    """Enqueue a write and make sure a flusher will deliver it"""
+    entry_id = enqueue(kind, target, payload)
+    start_flusher()
+    return entry_id
+
+def submit_blocks(target, blocks):
+    """Enqueue a stream of blocks for target and make sure a flusher will deliver them"""
+    count = enqueue_blocks(target, blocks)
+    start_flusher()
+    return count
+
+# Entry kinds that append blocks to their target page and can share one request
+APPEND_KINDS = ('append', 'append_blocks')
+# Upper bound on entries merged into one batched append
+MAX_BATCH_ENTRIES = 100
+
+def coalesce_window():
+    """Seconds the flusher waits before draining so near-simultaneous dumps share a request"""
+    return float(os.environ.get('NOTION_APPEND_COALESCE_MS', 0)) / 1000
+
+def entry_blocks(kind, payload):
+    """Blocks an append entry adds to its page"""
+    if kind == 'append_blocks':
+        return payload['blocks']
+    from notion_helper import paragraph_block
+    return [paragraph_block(payload['content'])]
+
+def deliver(notion, kind, target, payload):
+    """Send one outbox entry to Notion and return the API result"""
+    if kind == 'create_task':
+        return notion.create_task(payload['title'], payload.get('description', ''), database_id=target)
+    if kind in APPEND_KINDS:
+        return notion.append_blocks(target, entry_blocks(kind, payload))
+    raise ValueError(f"Unknown outbox entry kind: {kind}")
+
+# Oldest entry per target; a failed one blocks the target until it is replayed
+HEADS = "SELECT MIN(id) FROM outbox GROUP BY target"
+
+def _ready_heads(connection, now):
+    """Oldest entry per target, if it is pending and due"""
+    return connection.execute(
+        f"""
+        SELECT id, kind, target, payload, attempts FROM outbox
+        WHERE id IN ({HEADS}) AND status = 'pending' AND next_attempt_at <= ?
+        ORDER BY id
+        """,
+        (now,)
+    ).fetchall()
+
+def _is_offline_error(error):
+    """Whether an exception means Notion could not be reached at all
+
+    Only connection failures and timeouts qualify. Every requests exception
+    is an OSError, but a bad URL, a TLS failure or an unreadable response
+    will not fix itself when the network comes back, so those count as
+    attempts like any other error.
+    """
+    import requests
+    if isinstance(error, requests.exceptions.SSLError):
+        return False
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+def _append_run(connection, head):
+    """The head append entry plus the appends queued right behind it for the same page"""
+    entry_id, kind, target, payload, attempts = head
+    followers = connection.execute(
+        "SELECT id, kind, target, payload, attempts FROM outbox WHERE status = 'pending' AND target = ? AND id > ? ORDER BY id LIMIT ?",
+        (target, entry_id, MAX_BATCH_ENTRIES - 1)
+    ).fetchall()
+    from notion_helper import MAX_REQUEST_BYTES
+
+    run = [head]
+    run_bytes = len(payload)
+    for follower in followers:
+        if follower[1] not in APPEND_KINDS:
+            break  # keep ordering relative to other kinds of writes
+        run_bytes += len(follower[3])
+        if run_bytes > MAX_REQUEST_BYTES:
+            break  # a large dump is already request-sized; send it on its own
+        run.append(follower)
+    return run
+
+def _deliver_append_run(notion, connection, run):
+    """Send a run of appends in batched requests; returns the number of entries delivered
+
+    Batches go one request at a time so it is known exactly which blocks
+    landed. If one fails, the entry it stopped in keeps only its blocks that
+    were not appended, so a retry never repeats blocks already on the page.
+    """
+    from notion_helper import batch_children
+
+    target = run[0][2]
+    blocks_per_entry = [entry_blocks(kind, json.loads(payload)) for _, kind, _, payload, _ in run]
+    blocks = [block for entry in blocks_per_entry for block in entry]
+
+    appended = 0
+    result, error, offline = {}, None, False
+    for batch in batch_children(blocks):
+        try:
+            result = notion.append_blocks(target, batch)
+        except Exception as e:
+            error, offline = str(e), _is_offline_error(e)
+            break
+        if result.get('object') == 'error':
+            error = json.dumps(result)
+            break
+        appended += len(batch)
+
+    delivered = 0
+    for (entry_id, _, _, _, attempts), entry in zip(run, blocks_per_entry):
+        if appended >= len(entry):
+            connection.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+            appended -= len(entry)
+            delivered += 1
+            continue
+        if appended:
+            # Part of this entry is on the page; keep only the rest queued
+            connection.execute(
+                "UPDATE outbox SET kind = 'append_blocks', payload = ? WHERE id = ?",
+                (json.dumps({'blocks': entry[appended:]}), entry_id)
+            )
+        # The first undelivered entry carries the error; the rest stay queued behind it
+        permanent = result.get('status') in PERMANENT_ERRORS
+        _record_failure(connection, entry_id, attempts, error, permanent, offline)
+        break
+    return delivered
+
+def _record_failure(connection, entry_id, attempts, error, permanent=False, offline=False):
+    if offline:
+        connection.execute(
+            "UPDATE outbox SET offline_retries = offline_retries + 1, last_error = ? WHERE id = ?",
+            (error, entry_id)
+        )
+        retries = connection.execute("SELECT offline_retries FROM outbox WHERE id = ?", (entry_id,)).fetchone()[0]
+        delay = min(BASE_BACKOFF * 2 ** (retries - 1), OFFLINE_MAX_BACKOFF)
+        connection.execute("UPDATE outbox SET next_attempt_at = ? WHERE id = ?", (time.time() + delay, entry_id))
+        return
+
+    attempts += 1
+    if permanent or attempts >= MAX_ATTEMPTS:
+        connection.execute(
+            "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+            (attempts, error, entry_id)
+        )
+    else:
+        delay = min(BASE_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+        connection.execute(
+            "UPDATE outbox SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+            (attempts, error, time.time() + delay, entry_id)
+        )
+
+def flush_ready(notion, connection):
+    """Send every due entry once; returns the number of entries delivered"""
+    delivered = 0
+    for head in _ready_heads(connection, time.time()):
+        entry_id, kind, target, payload, attempts = head
+        if kind in APPEND_KINDS:
+            delivered += _deliver_append_run(notion, connection, _append_run(connection, head))
+            continue
+
+        try:
+            result = deliver(notion, kind, target, json.loads(payload))
+        except Exception as e:
+            _record_failure(connection, entry_id, attempts, str(e), offline=_is_offline_error(e))
+            continue
+
+        if result.get('object') == 'error':
+            permanent = result.get('status') in PERMANENT_ERRORS
+            _record_failure(connection, entry_id, attempts, json.dumps(result), permanent)
+            continue
+
+        connection.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        delivered += 1
+    return delivered
+
+def _next_due(connection):
+    """When the next head that can be sent is due; entries behind a failed head never are"""
+    row = connection.execute(
+        f"SELECT MIN(next_attempt_at) FROM outbox WHERE id IN ({HEADS}) AND status = 'pending'"
+    ).fetchone()
+    return row[0]
+
+def flush():
+    """Drain the outbox; only one flusher runs at a time"""
+    with file_lock('outbox.lock', blocking=False) as locked:
+        if not locked:
+            return  # another flusher is already draining
+
+        from notion_helper import NotionHelper
+        from request_scheduler import BACKGROUND
+        notion = NotionHelper(priority=BACKGROUND)
+        connection = connect()
+        # Give concurrent captures a chance to land in the same batch
+        time.sleep(coalesce_window())
+        try:
+            while True:
+                if flush_ready(notion, connection):
+                    continue
+                next_due = _next_due(connection)
+                if next_due is None or next_due - time.time() > FLUSHER_LINGER:
+                    break
+                time.sleep(max(next_due - time.time(), 0.1))
+        finally:
+            connection.close()
+
+    # An entry committed while we were releasing the lock would otherwise wait
+    # for the next capture to be delivered
+    with closing(connect()) as connection:
+        next_due = _next_due(connection)
+    if next_due is not None and next_due <= time.time():
+        flush()
+
+def status():
+    """Pending/failed/blocked counts and the age of the oldest pending entry"""
+    with closing(connect()) as connection:
+        counts = dict(connection.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        blocked = connection.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND target IN (SELECT target FROM outbox WHERE status = 'failed')"
+        ).fetchone()[0]
+        oldest = connection.execute("SELECT MIN(created_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+        failures = connection.execute(
+            "SELECT id, kind, target, attempts, last_error FROM outbox WHERE status = 'failed' ORDER BY id"
+        ).fetchall()
+    return {
+        'pending': counts.get('pending', 0),
+        'failed': counts.get('failed', 0),
+        'blocked': blocked,
+        'oldest_pending_age': round(time.time() - oldest, 1) if oldest else None,
+        'failures': failures
+    }
+
+def replay_failed():
+    """Move failed entries back to pending and return how many were moved"""
+    with closing(connect()) as connection:
+        cursor = connection.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, offline_retries = 0, next_attempt_at = ? WHERE status = 'failed'",
+            (time.time(),)
+        )
+        return cursor.rowcount
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if command == "flush":
+        from tracing import invocation
+        with invocation("outbox", "flush"):
+            flush()
+    elif command == "replay-failed":
+        replayed = replay_failed()
+        print(f"🔁 {replayed} failed entries queued for retry")
+        if replayed:
+            start_flusher()
+    elif command == "status":
+        info = status()
+        print(f"Pending: {info['pending']}")
+        print(f"Failed: {info['failed']}")
+        if info['blocked']:
+            print(f"Blocked behind failed entries: {info['blocked']}")
+        if info['oldest_pending_age'] is not None:
+            print(f"Oldest pending: {info['oldest_pending_age']}s")
+        for entry_id, kind, target, attempts, last_error in info['failures']:
+            print(f"   • #{entry_id} {kind} → {target} ({attempts} attempts): {last_error}")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -2,11 +2,17 @@
 
 import sys
 import os
+import json
 sys.path.insert(0, os.path.dirname(__file__))
-from notion_helper import NotionHelper
+from notion_helper import page_url
+from tracing import invocation
 
 def main():
-    notion = NotionHelper()
+    query = sys.argv[1] if len(sys.argv) > 1 else ""
+    
+    if query.strip():
+        search_index(query.strip())
+        return
     
     # Get command center page ID from environment variable
     command_center_id = os.environ.get('COMMAND_CENTER_PAGE_ID', '')
@@ -18,9 +24,43 @@ def main():
         print('{"items": [{"title": "Configuration needed", "subtitle": "Set COMMAND_CENTER_PAGE_ID in page_access.py or INFO_DUMP_PAGE_ID in workflow", "valid": false}]}')
         return
     
-    # Always just open the command center page
-    url = notion.get_page_url(page_id)
+    # With no query, just open the command center page
+    url = page_url(page_id)
     print(f'{{"items": [{{"title": "🏠 Open Notion Command Center", "subtitle": "Press Enter to open your main page", "arg": "{url}", "valid": true}}]}}')
 
+def search_index(query):
+    """Answer the search from the local page index, refreshing it in the background"""
+    import page_index
+    
+    info = page_index.status()
+    if page_index.is_stale(info):
+        page_index.start_background_refresh()
+    
+    if not info['pages']:
+        print('{"items": [{"title": "Building page index…", "subtitle": "Your Notion pages are being indexed; try again in a moment", "valid": false}], "rerun": 1}')
+        return
+    
+    items = []
+    for page in page_index.search(query):
+        title = f"{page['icon']} {page['title']}" if page['icon'] else page['title']
+        items.append({
+            "uid": page['id'],
+            "title": title,
+            "subtitle": "Press Enter to open in Notion",
+            "arg": page['url'] or page_url(page['id']),
+            "valid": True
+        })
+    
+    if not items:
+        items.append({"title": f"No pages matching '{query}'", "subtitle": "The index refreshes in the background", "valid": False})
+    
+    print(json.dumps({"items": items}))
+
+def run():
+    with invocation("page_access", "search" if sys.argv[1:2] and sys.argv[1].strip() else "open"):
+        main()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from notion_worker import forward_to_worker
+    if not forward_to_worker("page_access"):
+        run()
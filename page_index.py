@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Local page-title index for the `np` Script Filter.
+
+Usage:
+    python3 page_index.py refresh [--full]
+    python3 page_index.py status
+
+Page ids, titles, parents, icons and last_edited_time are kept in a SQLite
+FTS5 index in the workflow cache. A full crawl walks every page the
+integration can see; incremental refreshes only pull pages edited since the
+stored high-water mark. Searches are answered locally, and a background
+refresh is started whenever the index is older than NOTION_INDEX_MAX_AGE.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+from contextlib import closing
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import open_database, get_meta, set_meta, start_detached, file_lock
+
+DEFAULT_MAX_AGE = 300
+# Incremental refreshes miss deleted/archived pages, so re-crawl fully now and then
+FULL_CRAWL_INTERVAL = 86400
+SEARCH_LIMIT = 20
+COMMIT_EVERY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    parent TEXT,
+    icon TEXT,
+    url TEXT,
+    last_edited_time TEXT,
+    crawl_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title, content='pages', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, title) VALUES (new.rowid, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO pages_fts (rowid, title) VALUES (new.rowid, new.title);
+END;
+"""
+
+def connect():
+    connection = open_database('page_index.sqlite3', SCHEMA)
+    try:
+        connection.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        pass  # SQLite built without FTS5; search() falls back to LIKE
+    return connection
+
+def has_fts(connection):
+    row = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'pages_fts'").fetchone()
+    return row is not None
+
+def page_title(page):
+    """Plain-text title of a page object"""
+    for prop in page.get('properties', {}).values():
+        if prop.get('type') == 'title':
+            return ''.join(part.get('plain_text', '') for part in prop.get('title', []))
+    return ''
+
+def page_parent(page):
+    parent = page.get('parent', {})
+    kind = parent.get('type', '')
+    return 'workspace' if kind == 'workspace' else parent.get(kind, '')
+
+def page_icon(page):
+    icon = page.get('icon') or {}
+    return icon.get('emoji', '')
+
+def store_page(connection, page, crawl_id=None):
+    connection.execute(
+        """
+        INSERT INTO pages (id, title, parent, icon, url, last_edited_time, crawl_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            title = excluded.title, parent = excluded.parent, icon = excluded.icon,
+            url = excluded.url, last_edited_time = excluded.last_edited_time,
+            crawl_id = COALESCE(excluded.crawl_id, pages.crawl_id)
+        """,
+        (page['id'], page_title(page) or 'Untitled', str(page_parent(page)), page_icon(page),
+         page.get('url', ''), page.get('last_edited_time', ''), crawl_id)
+    )
+
+def refresh(notion, full=False):
+    """Pull pages into the index; returns the number of pages stored"""
+    with closing(connect()) as connection:
+        high_water_mark = None if full else get_meta(connection, 'high_water_mark')
+        crawl_id = int(time.time()) if high_water_mark is None else None
+        newest = high_water_mark
+        stored = 0
+
+        connection.execute("BEGIN")
+        for page in notion.iter_search("", page_size=100, prefetch=True):
+            edited = page.get('last_edited_time', '')
+            # Results are sorted newest first, so stop at the high-water mark
+            if high_water_mark and edited < high_water_mark:
+                break
+            store_page(connection, page, crawl_id)
+            stored += 1
+            if not newest or edited > newest:
+                newest = edited
+            if stored % COMMIT_EVERY == 0:
+                connection.execute("COMMIT")
+                connection.execute("BEGIN")
+        connection.execute("COMMIT")
+
+        if crawl_id is not None:
+            # Pages not seen by a full crawl were deleted or lost access
+            connection.execute("DELETE FROM pages WHERE crawl_id IS NOT ?", (crawl_id,))
+            set_meta(connection, 'last_full_crawl', time.time())
+        if newest:
+            set_meta(connection, 'high_water_mark', newest)
+        set_meta(connection, 'last_refresh', time.time())
+    return stored
+
+def fts_query(query):
+    """Prefix-match every word of the query"""
+    words = [word.replace('"', '""') for word in query.split()]
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search(query, limit=SEARCH_LIMIT):
+    """Pages whose title matches query, best matches first"""
+    with closing(connect()) as connection:
+        if has_fts(connection):
+            rows = connection.execute(
+                """
+                SELECT pages.id, pages.title, pages.parent, pages.icon, pages.url FROM pages_fts
+                JOIN pages ON pages.rowid = pages_fts.rowid
+                WHERE pages_fts MATCH ?
+                ORDER BY bm25(pages_fts), pages.last_edited_time DESC
+                LIMIT ?
+                """,
+                (fts_query(query), limit)
+            ).fetchall()
+        else:
+            rows = connection.execute(
+                "SELECT id, title, parent, icon, url FROM pages WHERE title LIKE ? ORDER BY last_edited_time DESC LIMIT ?",
+                (f"%{query}%", limit)
+            ).fetchall()
+    return [dict(zip(('id', 'title', 'parent', 'icon', 'url'), row)) for row in rows]
+
+def status():
+    with closing(connect()) as connection:
+        return {
+            'pages': connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0],
+            'high_water_mark': get_meta(connection, 'high_water_mark'),
+            'last_refresh': float(get_meta(connection, 'last_refresh', 0)),
+            'last_full_crawl': float(get_meta(connection, 'last_full_crawl', 0))
+        }
+
+def is_stale(info, max_age=None):
+    max_age = float(max_age or os.environ.get('NOTION_INDEX_MAX_AGE') or DEFAULT_MAX_AGE)
+    return time.time() - info['last_refresh'] > max_age
+
+def start_background_refresh():
+    """Launch a detached refresh process"""
+    start_detached(__file__, 'refresh')
+
+def run_refresh(full=False):
+    """Refresh under a lock so overlapping background refreshes don't race"""
+    with file_lock('page_index.lock', blocking=False) as locked:
+        if not locked:
+            return None  # another refresh is running
+
+        from notion_helper import NotionHelper
+        from request_scheduler import BACKGROUND
+        info = status()
+        full = full or time.time() - info['last_full_crawl'] > FULL_CRAWL_INTERVAL
+        return refresh(NotionHelper(priority=BACKGROUND), full=full)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if command == "refresh":
+        from tracing import invocation
+        with invocation("page_index", "refresh"):
+            stored = run_refresh(full="--full" in sys.argv)
+        if stored is None:
+            print("Refresh already in progress")
+        else:
+            print(f"✅ Indexed {stored} pages")
+    elif command == "status":
+        info = status()
+        print(f"Pages: {info['pages']}")
+        print(f"High-water mark: {info['high_water_mark']}")
+        if info['last_refresh']:
+            print(f"Last refresh: {round(time.time() - info['last_refresh'])}s ago")
+    else:
+        print(__doc__)
+        sys.exit(2)
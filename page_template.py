@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Cached, create-ready copies of template pages.
+
+The block tree of a template is fetched once (every level, every page of
+children), stripped down to the fields Notion accepts on create, and stored
+in the workflow cache next to the template's last_edited_time. Later copies
+reuse it until the template is edited. Pages are then built with as few
+requests as possible: the first batch of blocks goes inline with the page
+create, the rest follow in batched appends, and nested content that could
+not be sent inline is appended under its parent blocks in parallel.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import cache_path
+from notion_helper import batch_children
+
+# Block types the API lists but will not create as children
+SKIPPED_TYPES = ('child_page', 'child_database', 'unsupported', 'link_preview', 'breadcrumb')
+# Levels of nesting Notion accepts below the blocks of one request
+INLINE_DEPTH = 2
+# How long a process trusts its in-memory copy before re-checking last_edited_time
+CHECK_INTERVAL = 60
+MAX_WORKERS = 4
+
+_memory = {}
+_memory_lock = threading.Lock()
+
+def writable_block(block):
+    """A block from the API reduced to what a create/append request accepts"""
+    block_type = block['type']
+    payload = dict(block[block_type])
+    # Notion-hosted files come back as expiring URLs and cannot be re-uploaded
+    if payload.get('type') == 'file':
+        return None
+    payload.pop('children', None)
+    return {"object": "block", "type": block_type, block_type: payload}
+
+def block_children(block):
+    return block[block['type']].get('children', [])
+
+def fetch_tree(notion, block_id):
+    """Every descendant of a block as writable blocks with nested children"""
+    blocks, parents = [], []
+    for block in notion.iter_block_children(block_id, page_size=100):
+        if block['type'] in SKIPPED_TYPES:
+            continue
+        writable = writable_block(block)
+        if writable is None:
+            continue
+        blocks.append(writable)
+        if block.get('has_children'):
+            parents.append((writable, block['id']))
+
+    if parents:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            subtrees = executor.map(lambda parent: fetch_tree(notion, parent[1]), parents)
+            for (writable, _), children in zip(parents, subtrees):
+                if children:
+                    writable[writable['type']]['children'] = children
+    return blocks
+
+def _cache_file(template_id):
+    return cache_path(f"template-{template_id.replace('-', '')}.json")
+
+def load_template(notion, template_id):
+    """The template's block tree, re-fetched only when the template has been edited"""
+    # Concurrent copies of one template wait for a single check/fetch
+    with _memory_lock:
+        return _load_template(notion, template_id)
+
+def _load_template(notion, template_id):
+    now = time.monotonic()
+    entry = _memory.get(template_id)
+    if entry and now - entry['checked'] < CHECK_INTERVAL:
+        return entry['blocks']
+
+    # A cached page could hide an edit to the template
+    page = notion.get_page(template_id, fresh=True)
+    if page.get('object') == 'error':
+        raise Exception(f"Notion API error ({page.get('status')}): {page.get('message', page)}")
+    edited = page.get('last_edited_time')
+
+    blocks = None
+    if entry and entry['last_edited_time'] == edited:
+        blocks = entry['blocks']
+    else:
+        try:
+            with open(_cache_file(template_id)) as f:
+                cached = json.load(f)
+            if cached.get('last_edited_time') == edited:
+                blocks = cached['blocks']
+        except (OSError, ValueError):
+            pass
+
+    if blocks is None:
+        blocks = fetch_tree(notion, template_id)
+        path = _cache_file(template_id)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'last_edited_time': edited, 'blocks': blocks}, f)
+        os.replace(path + '.tmp', path)
+
+    _memory[template_id] = {'last_edited_time': edited, 'blocks': blocks, 'checked': now}
+    return blocks
+
+def _fits_inline(block, depth):
+    """Whether a block's whole subtree can travel inside the request that creates it"""
+    children = block_children(block)
+    if not children:
+        return True
+    if depth == 0 or len(children) > 100:
+        return False
+    return all(_fits_inline(child, depth - 1) for child in children)
+
+def split_deferred(blocks):
+    """Payload blocks plus (index, children) for subtrees too deep or wide to send inline"""
+    payload, deferred = [], []
+    for index, block in enumerate(blocks):
+        if _fits_inline(block, INLINE_DEPTH):
+            payload.append(block)
+            continue
+        shallow = dict(block)
+        shallow[block['type']] = {key: value for key, value in block[block['type']].items() if key != 'children'}
+        payload.append(shallow)
+        deferred.append((index, block_children(block)))
+    return payload, deferred
+
+def create_from_template(notion, template_id, parent_id, title):
+    """Create a titled page under parent_id holding a copy of the template's content"""
+    blocks = load_template(notion, template_id)
+    batches = batch_children(blocks)
+    first, deferred = split_deferred(next(batches, []))
+
+    properties = {
+        "title": {
+            "title": [{"text": {"content": title}}]
+        }
+    }
+    page = notion.create_page_with_children({"page_id": parent_id}, properties, first)
+    if page.get('object') == 'error':
+        return page
+
+    # The create response omits block ids, so list them when nested content follows
+    pending = []
+    if deferred:
+        created = [block['id'] for block in notion.iter_block_children(page['id'], page_size=100)]
+        pending.extend((created[index], children) for index, children in deferred)
+
+    rest = blocks[len(first):]
+    error = None
+    if rest:
+        error, deeper = _append_children(notion, page['id'], rest)
+        pending.extend(deeper)
+    if not error:
+        error = _append_nested(notion, pending)
+    if error:
+        # The page exists but is incomplete; report it so the caller can clean up
+        error['page_id'] = page['id']
+        return error
+    return page
+
+def _append_children(notion, block_id, children):
+    """Append one block's children; returns (error, deferred subtrees of the appended blocks)"""
+    pending = []
+    for batch in batch_children(children):
+        payload, deferred = split_deferred(batch)
+        # Stripping deferred subtrees only shrinks a batch, so this is one request
+        result = notion.append_blocks(block_id, payload)
+        if result.get('object') == 'error':
+            return result, []
+        created = [block['id'] for block in result.get('results', [])]
+        pending.extend((created[index], grandchildren) for index, grandchildren in deferred)
+    return None, pending
+
+def _append_nested(notion, pending):
+    """Append deferred subtrees level by level, each level in parallel"""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while pending:
+            outcomes = list(executor.map(lambda item: _append_children(notion, *item), pending))
+            pending = []
+            for error, deeper in outcomes:
+                if error:
+                    return error
+                pending.extend(deeper)
+    return None
@@ -3,17 +3,17 @@
 import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
-from notion_helper import NotionHelper
+from tracing import invocation
 
 def main():
     query = sys.argv[1] if len(sys.argv) > 1 else ""
-    notion = NotionHelper()
     
     if not query.strip():
         print('{"items": [{"title": "Add task to Notion", "subtitle": "Type your task and press Enter", "valid": false}]}')
         return
     
-    if not notion.task_database_id:
+    # Preview only: read config directly instead of building a NotionHelper
+    if not os.environ.get('TASK_DATABASE_ID'):
         print('{"items": [{"title": "Configuration needed", "subtitle": "Set TASK_DATABASE_ID in workflow settings", "valid": false}]}')
         return
     
@@ -23,6 +23,20 @@ def main():
 def create_task():
     """Called when user presses Enter"""
     task_title = sys.argv[2] if len(sys.argv) > 2 else ""
+
+    database_id = os.environ.get('TASK_DATABASE_ID', '')
+    if not database_id:
+        print("❌ Set TASK_DATABASE_ID in workflow settings")
+        return
+
+    import outbox
+    if outbox.enabled():
+        # Commit locally and let the background flusher talk to Notion
+        outbox.submit('create_task', database_id, {'title': task_title})
+        print(f"✅ Task '{task_title}' queued for Notion")
+        return
+
+    from notion_helper import NotionHelper
     notion = NotionHelper()
     
     try:
@@ -34,8 +48,14 @@ def create_task():
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
+def run():
+    with invocation("quick_task", "--create" if sys.argv[1:2] == ["--create"] else "preview"):
+        if len(sys.argv) > 2 and sys.argv[1] == "--create":
+            create_task()
+        else:
+            main()
+
 if __name__ == "__main__":
-    if len(sys.argv) > 2 and sys.argv[1] == "--create":
-        create_task()
-    else:
-        main()
\ No newline at end of file
+    from notion_worker import forward_to_worker
+    if not forward_to_worker("quick_task"):
+        run()
\ No newline at end of file
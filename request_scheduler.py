@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Client-side rate limiting for Notion API calls.
+
+Notion allows an average of about three requests per second per integration.
+Every NotionHelper (or AsyncNotionHelper) sharing a token draws from one token
+bucket, so bursts are smoothed out instead of turning into 429s. The bucket
+lives in a locked file in the workflow cache, so the entry points, the outbox
+flusher, index refreshes and syncs share it even though each runs in its own
+process (NOTION_RATE_SHARED=0 keeps it per process). Interactive Alfred
+actions are admitted ahead of background traffic whenever both are waiting,
+in any process.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import threading
+from contextlib import contextmanager
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+DEFAULT_RATE = 3.0
+DEFAULT_BURST = 3
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# How long a waiting interactive request holds back background requests in other processes
+INTERACTIVE_CLAIM = 0.5
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def scheduler_for(token):
+    """The shared scheduler for an integration token"""
+    with _schedulers_lock:
+        if token not in _schedulers:
+            shared_path = None
+            if os.environ.get('NOTION_RATE_SHARED', '1') != '0':
+                from workflow_cache import cache_path
+                shared_path = cache_path(f"rate_limit_{hashlib.sha1(token.encode('utf-8')).hexdigest()[:12]}.json")
+            _schedulers[token] = RequestScheduler(shared_path=shared_path)
+        return _schedulers[token]
+
+def retry_safe(method, path):
+    """Whether a request can be re-sent after a 5xx without risking a duplicate
+
+    Page creations and block appends may have been applied before the error,
+    so they are only retried after a 429, which Notion rejects unprocessed.
+    """
+    parts = path.strip('/').split('/')
+    if method == 'POST' and parts == ['pages']:
+        return False
+    if method == 'PATCH' and parts[0] == 'blocks' and parts[-1] == 'children':
+        return False
+    return True
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(BASE_BACKOFF * 2 ** attempt, MAX_BACKOFF))
+
+def retry_after_delay(headers, attempt):
+    """Seconds to wait before retrying, honoring a Retry-After header when present"""
+    value = headers.get('Retry-After') if headers else None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return backoff_delay(attempt)
+
+class SharedBucket:
+    """Token bucket state kept in a locked file, shared by every process that opens it"""
+
+    def __init__(self, path, rate, capacity):
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+
+    @contextmanager
+    def _state(self):
+        """Lock the file and yield (state, now) with the bucket refilled; writes it back after"""
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state = json.loads(os.read(fd, 4096) or b'{}')
+            except ValueError:
+                state = {}
+            now = time.time()
+            updated = state.get('updated', now)
+            # Clamped so a clock step back can neither mint nor destroy tokens
+            elapsed = min(max(now - updated, 0.0), self.capacity / self.rate)
+            state['tokens'] = min(self.capacity, state.get('tokens', self.capacity) + elapsed * self.rate)
+            state['updated'] = now
+            yield state, now
+            data = json.dumps(state).encode('utf-8')
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+        finally:
+            os.close(fd)  # also releases the lock
+
+    def take(self, priority):
+        """Take a token if the request may go now; otherwise return the seconds to wait"""
+        with self._state() as (state, now):
+            paused_until = state.get('paused_until', 0.0)
+            claimed_until = state.get('interactive_until', 0.0) if priority != INTERACTIVE else 0.0
+            if now >= paused_until and state['tokens'] >= 1 and now >= claimed_until:
+                state['tokens'] -= 1
+                return None
+            delay = max(paused_until - now, claimed_until - now, (1 - state['tokens']) / self.rate, 0.01)
+            if priority == INTERACTIVE:
+                # Ask background requests everywhere to stand aside until this one goes
+                state['interactive_until'] = max(state.get('interactive_until', 0.0), now + min(delay, INTERACTIVE_CLAIM))
+            return delay
+
+    def pause(self, delay):
+        with self._state() as (state, now):
+            state['paused_until'] = max(state.get('paused_until', 0.0), now + delay)
+            state['tokens'] = 0.0
+
+class RequestScheduler:
+    def __init__(self, rate=None, burst=None, shared_path=None):
+        self.rate = float(rate or os.environ.get('NOTION_RATE_LIMIT') or DEFAULT_RATE)
+        self.capacity = float(burst or os.environ.get('NOTION_RATE_BURST') or DEFAULT_BURST)
+        self.shared = SharedBucket(shared_path, self.rate, self.capacity) if shared_path else None
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        self.stats = {
+            'requests': 0,
+            'max_queue_depth': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'throttles': 0,
+            'retries': 0
+        }
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _admissible(self, priority, now):
+        if now < self.paused_until or self.tokens < 1:
+            return False
+        # Background requests yield to any interactive request that is waiting
+        return priority == INTERACTIVE or self.waiting[INTERACTIVE] == 0
+
+    def _enqueue(self, priority):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown request priority: {priority}")
+        self.waiting[priority] += 1
+        depth = sum(self.waiting.values())
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], depth)
+
+    def _take(self, priority):
+        """Take a token if the request may go now; otherwise return the seconds to wait"""
+        if self.shared:
+            if priority != INTERACTIVE and self.waiting[INTERACTIVE]:
+                return 0.01  # woken as soon as the interactive request goes
+            return self.shared.take(priority)
+        now = time.monotonic()
+        self._refill(now)
+        if self._admissible(priority, now):
+            self.tokens -= 1
+            return None
+        return max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.01)
+
+    def _dequeue(self, priority, start):
+        self.waiting[priority] -= 1
+        self.condition.notify_all()
+        waited = time.monotonic() - start
+        self.stats['requests'] += 1
+        self.stats['total_wait'] += waited
+        self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+        return waited
+
+    def acquire(self, priority=INTERACTIVE):
+        """Block until a request may be sent; returns the seconds spent waiting"""
+        start = time.monotonic()
+        with self.condition:
+            self._enqueue(priority)
+            try:
+                while True:
+                    delay = self._take(priority)
+                    if delay is None:
+                        break
+                    self.condition.wait(timeout=delay)
+            finally:
+                waited = self._dequeue(priority, start)
+        return waited
+
+    async def acquire_async(self, priority=INTERACTIVE):
+        """acquire() for coroutines: waits with asyncio.sleep so the event loop keeps running"""
+        import asyncio
+
+        start = time.monotonic()
+        with self.condition:
+            self._enqueue(priority)
+        try:
+            while True:
+                with self.condition:
+                    delay = self._take(priority)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            with self.condition:
+                waited = self._dequeue(priority, start)
+        return waited
+
+    def throttled(self, delay):
+        """Record a 429 and hold every request for this token for delay seconds"""
+        with self.condition:
+            self.stats['throttles'] += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            # Drain the bucket so requests resume at the steady rate
+            self.tokens = 0.0
+            if self.shared:
+                self.shared.pause(delay)
+            self.condition.notify_all()
+
+    def record_retry(self):
+        with self.condition:
+            self.stats['retries'] += 1
+
+    def metrics(self):
+        """Snapshot of queue depth, wait times, throttles and retries"""
+        with self.condition:
+            snapshot = dict(self.stats)
+            snapshot['queue_depth'] = sum(self.waiting.values())
+            snapshot['queued_by_priority'] = dict(self.waiting)
+            snapshot['avg_wait'] = snapshot['total_wait'] / snapshot['requests'] if snapshot['requests'] else 0.0
+        return snapshot
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""On-disk cache of Notion read responses, shared by every process.
+
+Responses are stored in SQLite in the workflow cache with a per-endpoint
+time to live. Once an entry expires it is still served for a while
+(stale-while-revalidate) as long as a background refresh is started, and
+after that it is treated as a miss. Only one process at a time refreshes
+an entry: it claims the key first, and storing the result releases the
+claim. The file is kept under
+NOTION_CACHE_MAX_BYTES by evicting the least recently used entries.
+
+Each entry carries tags (the database it queried, the pages in its results,
+its endpoint kind) so a write can drop exactly the entries it may have made
+wrong, including entries written by other processes.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import cache_path, open_database, transaction
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Seconds an entry is fresh, then seconds it may still be served while refreshing
+TTLS = {
+    'search': (60, 3600),
+    'database_query': (30, 600),
+    'page': (60, 600),
+}
+# Seconds other processes leave a claimed refresh alone; a refresh that
+# died simply lets the claim lapse
+REFRESH_CLAIM_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS response_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS response_tags_key ON response_tags (key);
+CREATE TABLE IF NOT EXISTS refreshes (
+    key TEXT PRIMARY KEY,
+    claimed_until REAL NOT NULL
+);
+"""
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def cache_for(path=None):
+    """The shared cache for a database file"""
+    path = path or cache_path('response_cache.sqlite3')
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+        return _caches[path]
+
+def request_key(token, method, url, json_body=None, params=None):
+    """Cache key for a request; the token is part of it so integrations never share entries"""
+    raw = json.dumps([token, method, url, json_body, params], sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def normal_tag(tag):
+    """Ids are compared without dashes, as Notion accepts both forms"""
+    kind, _, value = tag.partition(':')
+    return f"{kind}:{value.replace('-', '')}"
+
+def result_tags(result):
+    """Tags for every page or block listed in a response"""
+    if result.get('object') == 'list':
+        return [f"page:{item['id']}" for item in result.get('results', []) if 'id' in item]
+    if 'id' in result:
+        return [f"page:{result['id']}"]
+    return []
+
+def write_tags(method, path, json_body=None):
+    """Tags of the cached reads a successful write can invalidate"""
+    parts = path.strip('/').split('/')
+    if method == 'POST' and parts == ['pages']:
+        parent = (json_body or {}).get('parent', {})
+        tags = ['kind:search']
+        if parent.get('database_id'):
+            tags.append(f"db:{parent['database_id']}")
+        return tags
+    if method == 'PATCH' and parts[0] == 'pages' and len(parts) == 2:
+        # Property changes can move a page into or out of any filter
+        return [f"page:{parts[1]}", 'kind:database_query', 'kind:search']
+    if method == 'PATCH' and parts[0] == 'blocks' and parts[-1] == 'children':
+        return [f"page:{parts[1]}"]
+    if method == 'DELETE' and parts[0] == 'blocks':
+        return [f"page:{parts[1]}", 'kind:database_query', 'kind:search']
+    return []
+
+def best_effort(write, *args):
+    """Run a cache write, logging instead of raising
+
+    The cache only speeds up reads. A Notion write that already landed must
+    not be reported as failed because of the cache, or a caller such as the
+    outbox would send it again.
+    """
+    try:
+        write(*args)
+    except Exception as e:
+        print(f"Response cache write failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = int(max_bytes or os.environ.get('NOTION_CACHE_MAX_BYTES') or DEFAULT_MAX_BYTES)
+        self.lock = threading.Lock()
+        self.connection = open_database(path, SCHEMA, threads=True)
+        self.counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'bytes_served': 0,
+            'bytes_stored': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def get(self, key):
+        """(result, FRESH or STALE) for a usable entry, or (None, None)"""
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body, size, fresh_until, stale_until FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if not row or row[3] < now:
+                self.counters['misses'] += 1
+                return None, None
+            try:
+                self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError:
+                pass  # only the LRU order suffers if another process holds the lock
+            state = FRESH if row[2] >= now else STALE
+            self.counters['hits' if state == FRESH else 'stale_hits'] += 1
+            self.counters['bytes_served'] += row[1]
+        return json.loads(row[0]), state
+
+    def put(self, key, kind, result, tags=()):
+        body = json.dumps(result)
+        fresh, stale = TTLS[kind]
+        now = time.time()
+        tags = {normal_tag(tag) for tag in tags} | {f"kind:{kind}"}
+        with self.lock, transaction(self.connection):
+            self.connection.execute(
+                """
+                INSERT INTO responses (key, kind, body, size, fresh_until, stale_until, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    body = excluded.body, size = excluded.size, fresh_until = excluded.fresh_until,
+                    stale_until = excluded.stale_until, accessed_at = excluded.accessed_at
+                """,
+                (key, kind, body, len(body), now + fresh, now + fresh + stale, now)
+            )
+            self.connection.execute("DELETE FROM response_tags WHERE key = ?", (key,))
+            self.connection.execute("DELETE FROM refreshes WHERE key = ? OR claimed_until < ?", (key, now))
+            self.connection.executemany("INSERT OR IGNORE INTO response_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+            self._evict()
+        self.counters['bytes_stored'] += len(body)
+
+    def claim_refresh(self, key, seconds=REFRESH_CLAIM_SECONDS):
+        """True if the caller should refresh key, False if another process already is"""
+        now = time.time()
+        with self.lock:
+            try:
+                cursor = self.connection.execute(
+                    """
+                    INSERT INTO refreshes (key, claimed_until) VALUES (?, ?)
+                    ON CONFLICT(key) DO UPDATE SET claimed_until = excluded.claimed_until
+                    WHERE refreshes.claimed_until < ?
+                    """,
+                    (key, now + seconds, now)
+                )
+            except sqlite3.OperationalError:
+                return False  # the stale entry is served again and refreshed later
+        return cursor.rowcount == 1
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.connection.executemany("DELETE FROM response_tags WHERE key = ?", victims)
+        self.counters['evictions'] += len(victims)
+
+    def invalidate(self, tags):
+        """Drop every entry carrying any of the tags"""
+        if not tags:
+            return
+        with self.lock, transaction(self.connection):
+            keys = set()
+            for tag in {normal_tag(tag) for tag in tags}:
+                keys.update(row[0] for row in self.connection.execute("SELECT key FROM response_tags WHERE tag = ?", (tag,)))
+            victims = [(key,) for key in keys]
+            self.connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self.connection.executemany("DELETE FROM response_tags WHERE key = ?", victims)
+        self.counters['invalidations'] += len(victims)
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.execute("DELETE FROM response_tags")
+            self.connection.execute("DELETE FROM refreshes")
+
+    def stats(self):
+        """This process's hit/miss/byte counters plus the size of the shared cache"""
+        with self.lock:
+            entries, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            snapshot = dict(self.counters)
+        lookups = snapshot['hits'] + snapshot['stale_hits'] + snapshot['misses']
+        snapshot['hit_rate'] = (snapshot['hits'] + snapshot['stale_hits']) / lookups if lookups else 0.0
+        snapshot['entries'] = entries
+        snapshot['bytes'] = size
+        snapshot['max_bytes'] = self.max_bytes
+        return snapshot
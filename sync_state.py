@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Local record of what the calendar sync last wrote to Notion.
+
+For every google_event_id the store keeps the Notion page id and a hash of
+each meeting property as last synced. The sync compares freshly built
+properties against these hashes, so unchanged events cost no API calls and
+changed events only send the properties that differ.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from workflow_cache import cache_path, open_database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meeting_sync_state (
+    google_event_id TEXT PRIMARY KEY,
+    page_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    property_hashes TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+def value_hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def property_hashes(properties):
+    """Hash of each property's comparable value"""
+    from notion_helper import property_value
+    return {name: value_hash(property_value(prop)) for name, prop in properties.items()}
+
+class SyncState:
+    def __init__(self, path=None):
+        self.path = path or cache_path('sync_state.sqlite3')
+        self.lock = threading.Lock()
+        self.connection = open_database(self.path, SCHEMA, threads=True)
+
+    def get(self, google_event_id):
+        """The stored record for an event, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT page_id, content_hash, property_hashes FROM meeting_sync_state WHERE google_event_id = ?",
+                (google_event_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'page_id': row[0], 'content_hash': row[1], 'property_hashes': json.loads(row[2])}
+
+    def changed(self, record, properties):
+        """The subset of properties whose hash differs from the stored record"""
+        hashes = property_hashes(properties)
+        if value_hash(hashes) == record['content_hash']:
+            return {}
+        stored = record['property_hashes']
+        return {name: prop for name, prop in properties.items() if stored.get(name) != hashes[name]}
+
+    def record(self, google_event_id, page_id, properties):
+        """Remember what is now in Notion for an event"""
+        hashes = property_hashes(properties)
+        with self.lock:
+            self.connection.execute(
+                """
+                INSERT INTO meeting_sync_state (google_event_id, page_id, content_hash, property_hashes, synced_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(google_event_id) DO UPDATE SET
+                    page_id = excluded.page_id, content_hash = excluded.content_hash,
+                    property_hashes = excluded.property_hashes, synced_at = excluded.synced_at
+                """,
+                (google_event_id, page_id, value_hash(hashes), json.dumps(hashes), time.time())
+            )
+
+    def forget(self, google_event_id):
+        with self.lock:
+            self.connection.execute("DELETE FROM meeting_sync_state WHERE google_event_id = ?", (google_event_id,))
+
+    def close(self):
+        self.connection.close()
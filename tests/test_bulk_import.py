@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Resuming interrupted bulk imports against the fake Notion API.
+
+    python3 -m unittest discover tests
+
+Each test sets up the journal and Notion the way a killed run leaves them
+(rows marked as sending whose pages may or may not have been created) and
+checks that running the import again creates every page exactly once.
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+import unittest
+from collections import Counter
+from contextlib import closing
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import bulk_import
+from fake_notion import FakeNotion
+from notion_helper import paragraph_block
+
+TASK_SCHEMA = {
+    "Task": {"id": "title", "type": "title", "title": {}},
+    "Points": {"id": "points", "type": "number", "number": {}}
+}
+
+class BulkImportTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeNotion().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        env = mock.patch.dict(os.environ, {
+            'NOTION_API_BASE_URL': self.fake.base_url,
+            'NOTION_TOKEN': 'import-test',
+            'NOTION_HELPER_CACHE_DIR': tempfile.mkdtemp(),
+            'NOTION_RESPONSE_CACHE': '0',
+            'NOTION_RATE_LIMIT': '1000',
+            'NOTION_RATE_BURST': '1000'
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        quiet = mock.patch('sys.stderr', io.StringIO())
+        quiet.start()
+        self.addCleanup(quiet.stop)
+
+    def journal(self, kind, source, target):
+        connection = bulk_import.connect()
+        self.addCleanup(connection.close)
+        return bulk_import.Journal(connection, kind, source, target)
+
+    def live_titles(self, parent_id):
+        pages = (self.fake.pages[child] for child in self.fake.children[parent_id] if child in self.fake.pages)
+        return Counter(self.fake._title(page) for page in pages if not page['archived'])
+
+    def requests(self, route):
+        return self.fake.snapshot_stats()['by_route'].get(route, 0)
+
+    def write_note(self, name, title, lines):
+        with open(os.path.join(self.folder, name), 'w') as f:
+            f.write(f"# {title}\n\n" + '\n\n'.join(lines) + '\n')
+
+    def test_notes_resume_without_duplicates(self):
+        parent = self.fake.add_page("Imported notes")
+        for i in range(5):
+            self.write_note(f"n{i}.md", f"Note {i}", [f"Body of note {i}"])
+        # Long enough to need a second request after the page is created
+        self.write_note("n5.md", "Note 5", [f"Paragraph {i}" for i in range(150)])
+
+        journal = self.journal('notes', self.folder, parent)
+        sent_at = time.time()
+        done = self.fake.add_page("Note 0", parent={"type": "page_id", "page_id": parent})
+        journal.mark("note:n0.md", "n0.md", bulk_import.DONE, page_id=done)
+        # The killed run had created note 1 but not yet recorded it...
+        self.fake.add_page("Note 1", parent={"type": "page_id", "page_id": parent},
+                           children=[paragraph_block("Body of note 1")])
+        journal.mark("note:n1.md", "n1.md", bulk_import.SENDING, sent_at=sent_at)
+        # ...had not reached Notion with note 2...
+        journal.mark("note:n2.md", "n2.md", bulk_import.SENDING, sent_at=sent_at)
+        # ...and had created note 5 without its remaining blocks
+        partial = self.fake.add_page("Note 5", parent={"type": "page_id", "page_id": parent},
+                                     children=[paragraph_block(f"Paragraph {i}") for i in range(100)])
+        journal.mark("note:n5.md", "n5.md", bulk_import.SENDING, sent_at=sent_at)
+
+        listings, creates = self.requests('GET /blocks/children'), self.requests('POST /pages')
+        progress = bulk_import.import_notes(self.folder, parent, concurrency=3)
+
+        self.assertEqual(progress.counts[bulk_import.DONE], 5)
+        self.assertEqual(progress.counts['skipped'], 1)
+        self.assertEqual(self.live_titles(parent), Counter(f"Note {i}" for i in range(6)))
+        self.assertTrue(self.fake.pages[partial]['archived'])
+        # Notes 2, 3, 4 and a complete note 5; the parent is listed once for every resumed note
+        self.assertEqual(self.requests('POST /pages') - creates, 4)
+        self.assertEqual(self.requests('GET /blocks/children') - listings, 1)
+
+        again = bulk_import.import_notes(self.folder, parent, concurrency=3)
+        self.assertEqual(again.counts['skipped'], 6)
+
+    def test_tasks_resume_without_duplicates(self):
+        database = self.fake.add_database(TASK_SCHEMA)
+        path = os.path.join(self.folder, 'tasks.csv')
+        with open(path, 'w') as f:
+            f.write("Task,Points\n")
+            for i in range(8):
+                f.write(f"Task {i},{i}\n")
+            f.write("Task 0,0\n")  # an identical row is a second task, not a duplicate
+            f.write("Broken,many\n")
+
+        journal = self.journal('tasks', path, database)
+        keys = [key for key, _, _ in bulk_import.keyed(bulk_import.read_rows(path))]
+        self.fake.add_page("Task 3", parent={"type": "database_id", "database_id": database},
+                           properties={"Task": {"title": [{"text": {"content": "Task 3"}}]}})
+        journal.mark(keys[3], "line 5", bulk_import.SENDING, sent_at=time.time())
+        journal.mark(keys[4], "line 6", bulk_import.SENDING, sent_at=time.time())
+
+        progress = bulk_import.import_tasks(path, database, concurrency=3)
+
+        self.assertEqual(progress.counts[bulk_import.DONE], 9)
+        self.assertEqual(progress.counts[bulk_import.INVALID], 1)
+        expected = Counter(f"Task {i}" for i in range(8)) + Counter(["Task 0"])
+        self.assertEqual(self.live_titles(database), expected)
+
+        with closing(bulk_import.connect()) as connection:
+            page_ids = bulk_import.Journal(connection, 'tasks', path, database).page_ids()
+        self.assertEqual(len(page_ids), 9)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Large text chunking, checked against the fake Notion API's size limits.
+
+    python3 -m unittest discover tests
+
+The fake rejects rich_text objects over 2000 characters like the real API,
+so every test appends its blocks and compares what landed with the input.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from fake_notion import FakeNotion
+from chunker import text_blocks, MAX_SEGMENTS_PER_BLOCK
+from notion_helper import NotionHelper, MAX_TEXT_LENGTH
+from request_scheduler import BACKGROUND
+
+class ChunkerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeNotion().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {
+            'NOTION_API_BASE_URL': self.fake.base_url,
+            'NOTION_TOKEN': 'chunker-test',
+            'NOTION_HELPER_CACHE_DIR': tempfile.mkdtemp(),
+            'NOTION_RESPONSE_CACHE': '0',
+            'NOTION_RATE_LIMIT': '1000',
+            'NOTION_RATE_BURST': '1000'
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+    def upload(self, text):
+        """Chunk text, append it to a new page and return the blocks as stored"""
+        blocks = list(text_blocks(io.StringIO(text)))
+        for block in blocks:
+            segments = block[block['type']]['rich_text']
+            self.assertLessEqual(len(segments), MAX_SEGMENTS_PER_BLOCK)
+            for segment in segments:
+                self.assertLessEqual(len(segment['text']['content']), MAX_TEXT_LENGTH)
+
+        page = self.fake.add_page("Chunks")
+        result = NotionHelper(priority=BACKGROUND).append_blocks(page, iter(blocks))
+        self.assertEqual(result.get('object'), 'list', result)
+        return [self.fake.blocks[block_id] for block_id in self.fake.children[page]]
+
+    def contents(self, block):
+        return [segment['text']['content'] for segment in block[block['type']]['rich_text']]
+
+    def test_long_lines_are_cut_at_the_limit(self):
+        line = 'x' * (2 * MAX_TEXT_LENGTH + 123)
+        (block,) = self.upload(line)
+        self.assertEqual([len(content) for content in self.contents(block)], [MAX_TEXT_LENGTH, MAX_TEXT_LENGTH, 123])
+
+    def test_segments_end_on_line_boundaries(self):
+        lines = [f"{i:04d} " + 'word ' * 30 for i in range(400)]
+        stored = self.upload('\n'.join(lines) + '\n')
+        contents = [content for block in stored for content in self.contents(block)]
+        self.assertGreater(len(stored), 1)
+        # Every segment but a block's last ends with a whole line
+        for block in stored:
+            for content in self.contents(block)[:-1]:
+                self.assertTrue(content.endswith('\n'))
+        self.assertEqual(''.join(contents).replace('\n', ''), ''.join(lines))
+
+    def test_exactly_full_segments_are_not_split(self):
+        line = 'y' * (MAX_TEXT_LENGTH - 1) + '\n'
+        stored = self.upload(line * 3)
+        self.assertEqual([len(content) for content in self.contents(stored[0])], [MAX_TEXT_LENGTH] * 2 + [MAX_TEXT_LENGTH - 1])
+
+    def test_log_runs_become_code_blocks(self):
+        log = '\n'.join(f"2026-10-18 09:00:{i:02d} ERROR worker {i} failed" for i in range(50))
+        prose = "The deploy failed twice before the retry worked."
+        stored = self.upload(f"{prose}\n\n{log}\n\n{prose}\n")
+        self.assertEqual([block['type'] for block in stored], ['paragraph', 'code', 'paragraph'])
+        self.assertEqual(''.join(self.contents(stored[1])), log)
+
+    def test_oversized_text_is_rejected_by_the_fake(self):
+        # Guards the tests above: the fake must enforce the limit they rely on
+        page = self.fake.add_page("Too long")
+        block = {"object": "block", "type": "paragraph",
+                 "paragraph": {"rich_text": [{"type": "text", "text": {"content": 'z' * (MAX_TEXT_LENGTH + 1)}}]}}
+        result = NotionHelper(priority=BACKGROUND).append_blocks(page, [block])
+        self.assertEqual((result.get('status'), result.get('code')), (400, 'validation_error'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""GoogleCalendarHelper multi-calendar fetching against the fake Calendar API.
+
+    python3 -m unittest discover tests
+
+Covers batch chunking at MAX_BATCH_REQUESTS, pagination inside batches,
+iCalUID de-duplication across calendars and the per-thread transports of
+parallel mode. Skipped when the Google client libraries are not installed.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+sys.path.insert(0, os.path.join(ROOT, 'archived_functions'))
+from fake_calendar import FakeCalendar
+
+try:
+    import httplib2
+    from googleapiclient.http import HttpMock
+    from googleapiclient.discovery_cache import get_static_doc
+    from google.oauth2.credentials import Credentials
+    from google_calendar_helper import GoogleCalendarHelper, build_service, MAX_BATCH_REQUESTS, PAGE_SIZE
+except ImportError:
+    GoogleCalendarHelper = None
+
+DAY = date(2026, 3, 2)
+
+def at(hour, minute=0):
+    return datetime(DAY.year, DAY.month, DAY.day, hour, minute, tzinfo=timezone.utc)
+
+@unittest.skipIf(GoogleCalendarHelper is None, "Google client libraries are not installed")
+class GoogleCalendarTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeCalendar().start()
+        cls.document = get_static_doc('calendar', 'v3')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        self.fake.calendars.clear()
+        self.fake.reset_stats()
+        cache = mock.patch.dict(os.environ, {'NOTION_HELPER_CACHE_DIR': tempfile.mkdtemp()})
+        cache.start()
+        self.addCleanup(cache.stop)
+
+    def helper(self, credentials=None):
+        http = None if credentials else httplib2.Http(timeout=7)
+        service = build_service(self.document, credentials=credentials, http=http, api_endpoint=self.fake.root_url)
+        return GoogleCalendarHelper(service=service)
+
+    def fetch(self, calendar_ids, mode='batch', helper=None):
+        return (helper or self.helper()).get_events_for_calendars(calendar_ids, DAY, DAY, mode=mode)
+
+    def test_batches_hold_at_most_the_api_limit(self):
+        calendar_ids = [f"team-{i}@example.com" for i in range(2 * MAX_BATCH_REQUESTS + 20)]
+        for i, calendar_id in enumerate(calendar_ids):
+            self.fake.add_event(calendar_id, f"Standup {i}", at(9) + timedelta(minutes=i))
+
+        events = self.fetch(calendar_ids)
+
+        self.assertEqual(self.fake.stats['batches'], [MAX_BATCH_REQUESTS, MAX_BATCH_REQUESTS, 20])
+        self.assertEqual(len(events), len(calendar_ids))
+        self.assertEqual([event['calendar_id'] for event in events], calendar_ids)
+
+    def test_batches_follow_page_tokens(self):
+        busy = self.fake.add_calendar('busy@example.com')
+        for i in range(2 * PAGE_SIZE + 10):
+            self.fake.add_event(busy, f"Slot {i}", at(8) + timedelta(seconds=i))
+        self.fake.add_event('quiet@example.com', "Lunch", at(12))
+        self.fake.add_event('quiet@example.com', "Tomorrow", at(12) + timedelta(days=1))
+
+        events = self.fetch([busy, 'quiet@example.com'])
+
+        # Only the busy calendar has further pages to fetch
+        self.assertEqual(self.fake.stats['batches'], [2, 1, 1])
+        self.assertEqual(len(events), 2 * PAGE_SIZE + 11)
+        self.assertEqual(events[-1]['title'], "Lunch")
+        starts = [event['start_datetime'] for event in events]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_shared_events_are_kept_once(self):
+        self.fake.add_event('mine@example.com', "Planning", at(10), ical_uid='planning@example.com')
+        self.fake.add_event('team@example.com', "Planning", at(10), ical_uid='planning@example.com')
+        # Same iCalUID at another start is a different instance of a recurring event
+        self.fake.add_event('team@example.com', "Planning", at(15), ical_uid='planning@example.com')
+        self.fake.add_event('team@example.com', "Retro", at(11))
+
+        for mode in ('batch', 'parallel'):
+            events = self.fetch(['mine@example.com', 'team@example.com'], mode=mode)
+            self.assertEqual([(e['title'], e['calendar_id']) for e in events], [
+                ("Planning", 'mine@example.com'),
+                ("Retro", 'team@example.com'),
+                ("Planning", 'team@example.com')
+            ], mode)
+
+    def test_parallel_mode_matches_batch_mode(self):
+        calendar_ids = [f"room-{i}@example.com" for i in range(6)]
+        for i, calendar_id in enumerate(calendar_ids):
+            self.fake.add_calendar(calendar_id)
+            for j in range(PAGE_SIZE // 2 * i):
+                self.fake.add_event(calendar_id, f"Booking {i}.{j}", at(7) + timedelta(seconds=10 * j + i))
+
+        helper = self.helper()
+        batch = self.fetch(calendar_ids, helper=helper)
+        self.fake.reset_stats()
+        parallel = self.fetch(calendar_ids, mode='parallel', helper=helper)
+
+        self.assertEqual(self.fake.stats['batches'], [])
+        # One request per page of 0, 125, 250, 375, 500 and 625 events
+        self.assertEqual(self.fake.stats['requests'], 1 + 1 + 1 + 2 + 2 + 3)
+        self.assertEqual([(e['id'], e['calendar_id']) for e in parallel], [(e['id'], e['calendar_id']) for e in batch])
+
+    def test_thread_transports_keep_credentials_and_settings(self):
+        credentials = Credentials(token='fake-calendar-token')
+        helper = self.helper(credentials=credentials)
+        copy = helper._copy_service_http()
+        self.assertIsNot(copy, helper.service._http)
+        self.assertIsNot(copy.http, helper.service._http.http)
+        self.assertIs(copy.credentials, credentials)
+
+        plain = self.helper()
+        copy = plain._copy_service_http()
+        self.assertIsInstance(copy, httplib2.Http)
+        self.assertIsNot(copy, plain.service._http)
+        self.assertEqual(copy.timeout, 7)
+
+        self.fake.add_event('mine@example.com', "Focus", at(14))
+        self.fake.add_event('other@example.com', "Gym", at(18))
+        events = self.fetch(['mine@example.com', 'other@example.com'], mode='parallel', helper=helper)
+        self.assertEqual([event['title'] for event in events], ["Focus", "Gym"])
+        self.assertEqual(self.fake.stats['authorization'], {'Bearer fake-calendar-token'})
+
+    def test_mock_transports_are_shared(self):
+        service = build_service(self.document, http=HttpMock(headers={'status': '200'}))
+        helper = GoogleCalendarHelper(service=service)
+        self.assertIs(helper._copy_service_http(), service._http)
+
+if __name__ == "__main__":
+    unittest.main()
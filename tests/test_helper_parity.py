@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""NotionHelper and AsyncNotionHelper must behave the same against the fake Notion API.
+
+    python3 -m unittest discover tests
+
+Each helper works on its own copy of the same data (a FakeNotion database or
+page and a separate workflow cache), and the results and request counts are
+compared. Skipped when aiohttp is not installed.
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from fake_notion import FakeNotion
+from suite import calendar_events
+from notion_helper import NotionHelper, paragraph_block
+from async_notion_helper import AsyncNotionHelper, available
+from request_scheduler import BACKGROUND
+
+def summary(stats):
+    """The parts of sync stats that do not depend on timing"""
+    return {key: stats.get(key) for key in ('created', 'updated', 'skipped', 'errors', 'api_calls', 'planned')}
+
+@unittest.skipUnless(available(), "aiohttp is not installed")
+class HelperParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeNotion().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def environment(self, **overrides):
+        env = {
+            'NOTION_API_BASE_URL': self.fake.base_url,
+            'NOTION_TOKEN': 'parity-test',
+            'NOTION_HELPER_CACHE_DIR': tempfile.mkdtemp(),
+            'NOTION_RESPONSE_CACHE': '0',
+            # The fake does not rate limit, so neither should the helpers
+            'NOTION_RATE_LIMIT': '1000',
+            'NOTION_RATE_BURST': '1000',
+            'NOTION_SYNC_CONCURRENCY': '1'
+        }
+        env.update(overrides)
+        return mock.patch.dict(os.environ, env)
+
+    def both(self, work, async_work, setup=lambda: {}):
+        """Run work on a NotionHelper and async_work on an AsyncNotionHelper, each on fresh data"""
+        results = []
+        for transport in ('threads', 'asyncio'):
+            with self.environment(**setup()):
+                if transport == 'threads':
+                    notion = NotionHelper(priority=BACKGROUND)
+                    results.append((work(notion), notion.request_count))
+                    continue
+
+                async def run():
+                    async with AsyncNotionHelper(priority=BACKGROUND) as notion:
+                        return await async_work(notion), notion.request_count
+                results.append(asyncio.run(run()))
+        return results
+
+    def meetings_database(self):
+        return {'MEETINGS_DATABASE_ID': self.fake.add_database()}
+
+    def test_calendar_sync(self):
+        events = calendar_events(30, prefix='parity-event')
+        edited = [dict(event, title='Renamed') if i < 3 else event for i, event in enumerate(events)]
+
+        def work(notion):
+            return [summary(notion.sync_calendar_events_to_database(batch)) for batch in (events, events, edited)]
+
+        async def async_work(notion):
+            return [summary(await notion.sync_calendar_events_to_database(batch)) for batch in (events, events, edited)]
+
+        threads, asyncio_ = self.both(work, async_work, self.meetings_database)
+        self.assertEqual(threads, asyncio_)
+        self.assertEqual([run['created'] for run in threads[0]], [30, 0, 0])
+        self.assertEqual(threads[0][2]['updated'], 3)
+
+    def test_calendar_sync_without_state(self):
+        events = calendar_events(12, prefix='parity-stateless')
+
+        def work(notion):
+            return [summary(notion.sync_calendar_events_to_database(events, dry_run=dry_run, use_state=False))
+                    for dry_run in (True, False, False)]
+
+        async def async_work(notion):
+            return [summary(await notion.sync_calendar_events_to_database(events, dry_run=dry_run, use_state=False))
+                    for dry_run in (True, False, False)]
+
+        threads, asyncio_ = self.both(work, async_work, self.meetings_database)
+        self.assertEqual(threads, asyncio_)
+        self.assertEqual(threads[0][0]['planned'], {'create': 12, 'update': 0, 'skip': 0})
+        self.assertEqual(threads[0][2]['skipped'], 12)
+
+    def test_meeting_lookup(self):
+        event = calendar_events(1, prefix='parity-lookup')[0]
+
+        def work(notion):
+            before = notion.find_meeting_by_google_id(event['google_event_id'])
+            entry = notion.create_or_update_meeting_entry(event)
+            again = notion.create_or_update_meeting_entry(event)
+            return before, entry['action'], again['action'], sorted(notion.index_meetings_by_google_id([event]))
+
+        async def async_work(notion):
+            before = await notion.find_meeting_by_google_id(event['google_event_id'])
+            entry = await notion.create_or_update_meeting_entry(event)
+            again = await notion.create_or_update_meeting_entry(event)
+            return before, entry['action'], again['action'], sorted(await notion.index_meetings_by_google_id([event]))
+
+        threads, asyncio_ = self.both(work, async_work, self.meetings_database)
+        self.assertEqual(threads, asyncio_)
+        self.assertEqual(threads[0], (None, 'created', 'skipped', [event['google_event_id']]))
+
+    def test_reads_and_appends(self):
+        blocks = [paragraph_block(f"Line {i}") for i in range(150)]
+
+        def setup():
+            return {'PARITY_PAGE_ID': self.fake.add_page("Parity")}
+
+        def work(notion):
+            page_id = os.environ['PARITY_PAGE_ID']
+            appended = notion.append_blocks(page_id, blocks)
+            children = list(notion.iter_block_children(page_id, page_size=40))
+            return notion.get_page(page_id)['id'] == page_id, len(appended['results']), len(children)
+
+        async def async_work(notion):
+            page_id = os.environ['PARITY_PAGE_ID']
+            appended = await notion.append_blocks(page_id, blocks)
+            children = [block async for block in notion.iter_block_children(page_id, page_size=40)]
+            return (await notion.get_page(page_id))['id'] == page_id, len(appended['results']), len(children)
+
+        threads, asyncio_ = self.both(work, async_work, setup)
+        self.assertEqual(threads, asyncio_)
+        self.assertEqual(threads[0], (True, 150, 150))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Outbox delivery against the fake Notion API.
+
+    python3 -m unittest discover tests
+
+Covers per-target ordering, resuming an append run that failed part way,
+and the split between offline errors (retried without spending attempts)
+and permanent ones (which fail the entry and hold back its target).
+"""
+
+import os
+import sys
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import requests
+import outbox
+from fake_notion import FakeNotion, plain_text
+from notion_helper import NotionHelper, paragraph_block
+from request_scheduler import BACKGROUND
+
+def closed_port():
+    """A local port nothing listens on"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class OutboxTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeNotion().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {
+            'NOTION_API_BASE_URL': self.fake.base_url,
+            'NOTION_TOKEN': 'outbox-test',
+            'NOTION_HELPER_CACHE_DIR': tempfile.mkdtemp(),
+            'NOTION_RESPONSE_CACHE': '0',
+            'NOTION_RATE_LIMIT': '1000',
+            'NOTION_RATE_BURST': '1000',
+            # Failures go straight to the outbox instead of being retried in the helper
+            'NOTION_MAX_RETRIES': '0'
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        self.fake.faults.clear()
+        self.notion = NotionHelper(priority=BACKGROUND)
+        self.connection = outbox.connect()
+        self.addCleanup(self.connection.close)
+
+    def lines(self, page_id):
+        """Text of every block on a page, in order"""
+        blocks = (self.fake.blocks[block_id] for block_id in self.fake.children[page_id])
+        return [plain_text(block[block['type']]['rich_text']) for block in blocks]
+
+    def entries(self):
+        return self.connection.execute(
+            "SELECT target, status, attempts, offline_retries, payload FROM outbox ORDER BY id"
+        ).fetchall()
+
+    def make_due(self):
+        self.connection.execute("UPDATE outbox SET next_attempt_at = 0")
+
+    def test_targets_keep_capture_order(self):
+        first, second = self.fake.add_page("First"), self.fake.add_page("Second")
+        outbox.enqueue('append', first, {'content': 'first 1'})
+        outbox.enqueue('append', second, {'content': 'second 1'})
+        outbox.enqueue('append', first, {'content': 'first 2'})
+        self.fake.fail_next('PATCH /blocks/children', status=502)
+
+        # The failed request held both of first's entries; second is not held up
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 1)
+        self.assertEqual(self.lines(first), [])
+        self.assertEqual(self.lines(second), ['second 1'])
+        self.assertEqual([entry[:3] for entry in self.entries()], [(first, 'pending', 1), (first, 'pending', 0)])
+
+        # Not due yet: nothing may overtake the entry that is backing off
+        outbox.enqueue('append', first, {'content': 'first 3'})
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 0)
+
+        self.make_due()
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 3)
+        self.assertEqual(self.lines(first), ['first 1', 'first 2', 'first 3'])
+        self.assertEqual(self.entries(), [])
+
+    def test_partial_append_resumes_after_the_blocks_that_landed(self):
+        page = self.fake.add_page("Dump")
+        outbox.enqueue_blocks(page, [paragraph_block(f"a{i}") for i in range(60)])
+        outbox.enqueue_blocks(page, [paragraph_block(f"b{i}") for i in range(80)])
+        # 140 blocks go out as 100 + 40; the second request fails
+        self.fake.fail_next('PATCH /blocks/children', status=502, after=1)
+
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 1)
+        landed = [f"a{i}" for i in range(60)] + [f"b{i}" for i in range(40)]
+        self.assertEqual(self.lines(page), landed)
+        (entry,) = self.entries()
+        self.assertEqual(entry[1:3], ('pending', 1))
+        self.assertIn('"b40"', entry[4])
+        self.assertNotIn('"b39"', entry[4])
+
+        self.make_due()
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 1)
+        self.assertEqual(self.lines(page), landed + [f"b{i}" for i in range(40, 80)])
+
+    def test_offline_errors_do_not_spend_attempts(self):
+        page = self.fake.add_page("Offline")
+        outbox.enqueue('append', page, {'content': 'written offline'})
+        offline = NotionHelper(base_url=f"http://127.0.0.1:{closed_port()}/v1", priority=BACKGROUND)
+
+        for _ in range(outbox.MAX_ATTEMPTS + 2):
+            self.make_due()
+            self.assertEqual(outbox.flush_ready(offline, self.connection), 0)
+        self.assertEqual([entry[1:4] for entry in self.entries()], [('pending', 0, outbox.MAX_ATTEMPTS + 2)])
+
+        self.make_due()
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 1)
+        self.assertEqual(self.lines(page), ['written offline'])
+
+    def test_only_connection_failures_and_timeouts_count_as_offline(self):
+        self.assertTrue(outbox._is_offline_error(requests.ConnectionError("refused")))
+        self.assertTrue(outbox._is_offline_error(requests.Timeout("read timed out")))
+        self.assertTrue(outbox._is_offline_error(TimeoutError()))
+        self.assertFalse(outbox._is_offline_error(requests.exceptions.SSLError("bad certificate")))
+        self.assertFalse(outbox._is_offline_error(requests.exceptions.InvalidURL("no host")))
+        self.assertFalse(outbox._is_offline_error(ValueError("bad JSON")))
+
+    def test_permanent_errors_fail_the_entry_and_hold_its_target(self):
+        missing = '0' * 32
+        outbox.enqueue('append', missing, {'content': 'lost'})
+        outbox.enqueue('append', missing, {'content': 'behind it'})
+        self.fake.fail_next('POST /pages', status=400)
+        database = self.fake.add_database({"Task": {"id": "title", "type": "title", "title": {}}})
+        outbox.enqueue('create_task', database, {'title': 'rejected'})
+
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 0)
+        self.assertEqual([entry[:3] for entry in self.entries()], [
+            (missing, 'failed', 1), (missing, 'pending', 0), (database, 'failed', 1)
+        ])
+        self.assertIsNone(outbox._next_due(self.connection))
+        self.make_due()
+        self.assertEqual(outbox.flush_ready(self.notion, self.connection), 0)
+        self.assertEqual(outbox.status()['blocked'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
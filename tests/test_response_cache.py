@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Response cache invalidation and lock handling against the fake Notion API.
+
+    python3 -m unittest discover tests
+
+Writes must drop the cached reads they make wrong and nothing else, and a
+cache database locked by another process must neither fail a write that
+reached Notion nor leave the shared connection inside a transaction.
+"""
+
+import io
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from fake_notion import FakeNotion
+from notion_helper import NotionHelper
+from request_scheduler import BACKGROUND
+from response_cache import ResponseCache, FRESH, cache_for, request_key
+
+TASK_SCHEMA = {"Task": {"id": "title", "type": "title", "title": {}}}
+
+class ResponseCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeNotion().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {
+            'NOTION_API_BASE_URL': self.fake.base_url,
+            'NOTION_TOKEN': 'cache-test',
+            'NOTION_HELPER_CACHE_DIR': tempfile.mkdtemp(),
+            'NOTION_RATE_LIMIT': '1000',
+            'NOTION_RATE_BURST': '1000'
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_writes_drop_the_reads_they_affect(self):
+        database = self.fake.add_database(TASK_SCHEMA)
+        page, other = self.fake.add_page("Edited"), self.fake.add_page("Untouched")
+        reader = NotionHelper()
+        # A background helper writes without reading from the cache, like the outbox flusher
+        writer = NotionHelper(priority=BACKGROUND)
+
+        self.assertEqual(reader.query_database(database)['results'], [])
+        reader.get_page(page)
+        reader.get_page(other)
+        before = reader.request_count
+        reader.query_database(database)
+        reader.get_page(page)
+        self.assertEqual(reader.request_count, before)
+
+        writer.create_task("Cached away", database_id=database)
+        # Tags match whether or not the id has dashes
+        writer.append_to_page(page.replace('-', ''), "New line")
+
+        self.assertEqual(len(reader.query_database(database)['results']), 1)
+        reader.get_page(page)
+        reader.get_page(other)
+        self.assertEqual(reader.request_count, before + 2)
+
+    def test_invalidate_matches_any_tag(self):
+        cache = ResponseCache(os.path.join(tempfile.mkdtemp(), 'cache.sqlite3'))
+        cache.put('query', 'database_query', {'object': 'list', 'results': []}, ['db:aaaa-bbbb'])
+        cache.put('page', 'page', {'object': 'page', 'id': 'cccc-dddd'}, ['page:cccc-dddd'])
+        cache.put('search', 'search', {'object': 'list', 'results': []})
+
+        cache.invalidate(['db:aaaabbbb', 'kind:search'])
+
+        self.assertEqual(cache.get('query'), (None, None))
+        self.assertEqual(cache.get('search'), (None, None))
+        self.assertEqual(cache.get('page')[1], FRESH)
+        self.assertEqual(cache.stats()['invalidations'], 2)
+
+    def test_locked_database(self):
+        page = self.fake.add_page("Locked")
+        notion = NotionHelper()
+        notion.get_page(page)
+        cache = cache_for()
+        # Fail fast instead of waiting out the usual 10 second busy timeout
+        cache.connection.execute("PRAGMA busy_timeout = 50")
+
+        other_process = sqlite3.connect(cache.path, isolation_level=None)
+        self.addCleanup(other_process.close)
+        other_process.execute("BEGIN EXCLUSIVE")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            cache.put('key', 'page', {'object': 'page', 'id': page})
+        self.assertFalse(cache.connection.in_transaction)
+
+        # The append lands even though its invalidation cannot be written
+        with mock.patch('sys.stderr', io.StringIO()) as stderr:
+            result = notion.append_to_page(page, "Written while locked")
+        self.assertEqual(result.get('object'), 'list')
+        self.assertIn("Response cache write failed", stderr.getvalue())
+        self.assertEqual(len(self.fake.children[page]), 1)
+
+        # Reads still work, and the cache recovers once the lock is gone
+        key = request_key(notion.token, "GET", f"{notion.base_url}/pages/{page}")
+        self.assertEqual(cache.get(key)[1], FRESH)
+        other_process.execute("ROLLBACK")
+        cache.invalidate([f"page:{page}"])
+        self.assertEqual(cache.get(key), (None, None))
+
+if __name__ == "__main__":
+    unittest.main()
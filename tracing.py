@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Opt-in tracing of entry point invocations and Notion API calls.
+
+Usage:
+    python3 tracing.py stats [--last N]
+    python3 tracing.py clear
+
+With NOTION_TRACE=1, every entry point invocation and every Notion API call
+is written as one JSON line to trace.jsonl in the workflow cache. API spans
+carry the endpoint template, status, bytes sent and received, time spent
+queued by the rate limiter, retries and duration. Invocation spans carry the
+entry point, the action flag, CPU time spent before the invocation started
+(interpreter startup and imports) and the outcome. Steps such as reading the
+clipboard can be timed with span(). The file rotates at
+NOTION_TRACE_MAX_BYTES, keeping TRACE_FILES generations.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+TRACE_FILES = 3
+DEFAULT_LAST = 100
+
+# Notion ids (with or without dashes) in a path become {id}
+ID_PATTERN = r'^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$'
+
+_write_lock = threading.Lock()
+_current = {'invocation': None, 'entry_point': None}
+_first_invocation = [True]
+
+def enabled():
+    return os.environ.get('NOTION_TRACE', '0') not in ('', '0')
+
+def trace_path(generation=0):
+    from workflow_cache import cache_path
+    name = 'trace.jsonl' if generation == 0 else f'trace.jsonl.{generation}'
+    return cache_path(name)
+
+def endpoint_template(method, path):
+    """'PATCH /blocks/<uuid>/children' -> 'PATCH /blocks/{id}/children'"""
+    import re
+    segments = ['{id}' if re.match(ID_PATTERN, segment) else segment for segment in path.split('?')[0].split('/')]
+    return f"{method} {'/'.join(segments)}"
+
+def _rotate(path, max_bytes):
+    try:
+        if os.path.getsize(path) < max_bytes:
+            return
+    except OSError:
+        return
+    for generation in range(TRACE_FILES - 1, 0, -1):
+        older = trace_path(generation)
+        newer = trace_path(generation - 1)
+        if os.path.exists(newer):
+            os.replace(newer, older)
+
+def record(span):
+    """Append one span to the trace file"""
+    span.setdefault('ts', round(time.time(), 3))
+    span.setdefault('invocation', _current['invocation'])
+    span.setdefault('entry_point', _current['entry_point'])
+    line = json.dumps(span, default=str) + '\n'
+    max_bytes = int(os.environ.get('NOTION_TRACE_MAX_BYTES') or DEFAULT_MAX_BYTES)
+    with _write_lock:
+        path = trace_path()
+        _rotate(path, max_bytes)
+        with open(path, 'a') as f:
+            f.write(line)
+
+@contextmanager
+def invocation(entry_point, action=None):
+    """Trace one run of an entry point; a no-op unless NOTION_TRACE is set"""
+    if not enabled():
+        yield
+        return
+
+    # Imported here so untraced previews stay cheap
+    import uuid
+
+    # CPU time already used by this process is interpreter startup plus imports;
+    # later invocations in the warm worker have no startup of their own
+    startup_cpu = time.process_time()
+    saved = dict(_current)
+    _current['invocation'] = uuid.uuid4().hex[:12]
+    _current['entry_point'] = entry_point
+    started = time.perf_counter()
+    span = {'kind': 'invocation', 'action': action, 'pid': os.getpid()}
+    if _first_invocation[0]:
+        span['startup_cpu_ms'] = round(startup_cpu * 1000, 1)
+        _first_invocation[0] = False
+    try:
+        yield
+        span['outcome'] = 'ok'
+    except SystemExit as e:
+        span['outcome'] = 'ok' if not e.code else 'exit'
+        raise
+    except BaseException as e:
+        span['outcome'] = 'error'
+        span['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        record(span)
+        _current.update(saved)
+
+@contextmanager
+def span(name, **fields):
+    """Time a step inside an invocation, e.g. reading the clipboard"""
+    if not enabled():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(dict(fields, kind='step', name=name, duration_ms=round((time.perf_counter() - started) * 1000, 2)))
+
+def api_span(method, path, status, bytes_out, bytes_in, queue_wait, retries, duration, error=None):
+    """Record one Notion API call (including its retries)"""
+    span = {
+        'kind': 'api',
+        'endpoint': endpoint_template(method, path),
+        'status': status,
+        'bytes_out': bytes_out,
+        'bytes_in': bytes_in,
+        'queue_wait_ms': round(queue_wait * 1000, 2),
+        'retries': retries,
+        'duration_ms': round(duration * 1000, 2)
+    }
+    if error:
+        span['error'] = error
+    record(span)
+
+def read_spans():
+    """Every span in the trace files, oldest first"""
+    spans = []
+    for generation in range(TRACE_FILES - 1, -1, -1):
+        try:
+            with open(trace_path(generation)) as f:
+                for line in f:
+                    try:
+                        spans.append(json.loads(line))
+                    except ValueError:
+                        continue  # a line cut short by a crash
+        except OSError:
+            continue
+    return spans
+
+def summarize(spans, last=DEFAULT_LAST):
+    """Latency percentiles per entry point and per endpoint over the last invocations"""
+    from notion_helper import percentile
+
+    invocations = [s for s in spans if s.get('kind') == 'invocation'][-last:]
+    keep = {s['invocation'] for s in invocations}
+    api = [s for s in spans if s.get('kind') == 'api' and s.get('invocation') in keep]
+
+    def group(items, key):
+        groups = {}
+        for item in items:
+            groups.setdefault(key(item), []).append(item)
+        return groups
+
+    def row(items):
+        durations = [item['duration_ms'] for item in items]
+        return {
+            'count': len(items),
+            'p50_ms': percentile(durations, 0.50),
+            'p95_ms': percentile(durations, 0.95),
+            'max_ms': max(durations)
+        }
+
+    entry_points = {}
+    for name, items in group(invocations, lambda s: s['entry_point'] + (f" {s['action']}" if s.get('action') else '')).items():
+        entry_points[name] = row(items)
+        entry_points[name]['errors'] = sum(1 for item in items if item.get('outcome') == 'error')
+        calls = [s for s in api if s['invocation'] in {item['invocation'] for item in items}]
+        entry_points[name]['api_calls_per_run'] = round(len(calls) / len(items), 2)
+
+    endpoints = {}
+    for name, items in group(api, lambda s: s['endpoint']).items():
+        endpoints[name] = row(items)
+        endpoints[name]['errors'] = sum(1 for item in items if item.get('error'))
+        endpoints[name]['retries'] = sum(item.get('retries', 0) for item in items)
+        endpoints[name]['avg_queue_wait_ms'] = round(sum(item['queue_wait_ms'] for item in items) / len(items), 2)
+        endpoints[name]['avg_bytes_in'] = round(sum(item['bytes_in'] for item in items) / len(items))
+    return {'invocations': len(invocations), 'entry_points': entry_points, 'endpoints': endpoints}
+
+def print_stats(last):
+    summary = summarize(read_spans(), last)
+    print(f"Last {summary['invocations']} invocations")
+    print()
+    print(f"{'entry point':<30} {'runs':>5} {'p50':>9} {'p95':>9} {'max':>9} {'calls/run':>9} {'errors':>6}")
+    for name, stats in sorted(summary['entry_points'].items()):
+        print(f"{name:<30} {stats['count']:>5} {stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms "
+              f"{stats['max_ms']:>7.1f}ms {stats['api_calls_per_run']:>9} {stats['errors']:>6}")
+    print()
+    print(f"{'endpoint':<36} {'calls':>5} {'p50':>9} {'p95':>9} {'queued':>9} {'retries':>7} {'errors':>6}")
+    for name, stats in sorted(summary['endpoints'].items()):
+        print(f"{name:<36} {stats['count']:>5} {stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms "
+              f"{stats['avg_queue_wait_ms']:>7.1f}ms {stats['retries']:>7} {stats['errors']:>6}")
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+
+    if command == "stats":
+        last = int(sys.argv[sys.argv.index('--last') + 1]) if '--last' in sys.argv else DEFAULT_LAST
+        print_stats(last)
+    elif command == "clear":
+        for generation in range(TRACE_FILES):
+            if os.path.exists(trace_path(generation)):
+                os.unlink(trace_path(generation))
+        print("Trace cleared")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+from contextlib import contextmanager
+
+def cache_dir():
+    """Directory for local state (Alfred's workflow cache when available)"""
+    path = (
+        os.environ.get('NOTION_HELPER_CACHE_DIR')
+        or os.environ.get('alfred_workflow_cache')
+        or os.path.join(os.path.expanduser('~'), '.cache', 'alfred-notion-helper')
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def cache_path(name):
+    """Path of a file inside the workflow cache directory"""
+    return os.path.join(cache_dir(), name)
+
+@contextmanager
+def transaction(connection, mode=""):
+    """BEGIN ... COMMIT on an autocommit SQLite connection, rolled back on any error
+
+    A failed statement (e.g. 'database is locked') must not leave a shared
+    connection inside an open transaction, or every later BEGIN fails.
+    """
+    connection.execute(f"BEGIN {mode}".strip())
+    try:
+        yield connection
+        connection.execute("COMMIT")
+    except BaseException:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+
+def open_database(name, schema, synchronous=None, threads=False):
+    """Autocommit SQLite connection to a file in the workflow cache (or a full path), schema applied
+
+    WAL keeps commits cheap and lets readers run while another process
+    writes. threads=True allows use from several threads behind a lock.
+    """
+    import sqlite3
+    path = name if os.path.isabs(name) else cache_path(name)
+    connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=not threads)
+    connection.execute("PRAGMA journal_mode=WAL")
+    if synchronous:
+        connection.execute(f"PRAGMA synchronous={synchronous}")
+    connection.executescript(schema)
+    return connection
+
+def get_meta(connection, key, default=None):
+    """Value from a database's meta (key, value) table"""
+    row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def set_meta(connection, key, value):
+    connection.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, str(value))
+    )
+
+def start_detached(script, *args, input=None, log=None):
+    """Run a Python script in its own session so it outlives the calling entry point
+
+    input (text) is written to its stdin; output goes to log or nowhere.
+    """
+    import subprocess
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(script), *args],
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=log or subprocess.DEVNULL,
+        stderr=log or subprocess.DEVNULL,
+        start_new_session=True,
+        text=True
+    )
+    if input is not None:
+        process.stdin.write(input)
+        process.stdin.close()
+    return process
+
+@contextmanager
+def file_lock(name, blocking=True):
+    """Exclusive fcntl lock on a file in the workflow cache, held for the block
+
+    With blocking=False it yields False instead of waiting when another
+    process holds the lock.
+    """
+    import fcntl
+    with open(cache_path(name), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            if blocking:
+                raise
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)